@@ -1,11 +1,13 @@
 # mcp/app/core/config.py - 方式B対応版
 import os
+import socket
 import dotenv
 
 # プロジェクトルートの .env を自動検出
 dotenv.load_dotenv(dotenv.find_dotenv())
 
-OPENAI_WSS = "wss://api.openai.com/v1/realtime"
+# ベンチマーク等ではローカルのスタンドイン（benchmarks/fake_realtime.py）を指せる
+OPENAI_WSS = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # ✅ 公式ドキュメントに従った正確なモデル名
@@ -43,6 +45,131 @@ SESSION_CONFIG = {
     }
 }
 
+# ✅ 音声フォーマット（Realtime API の pcm16 は 24kHz 固定）
+UPSTREAM_SAMPLE_RATE = 24000
+CLIENT_INPUT_SAMPLE_RATE = int(os.getenv("CLIENT_INPUT_SAMPLE_RATE", "16000"))    # Unity録音レート
+CLIENT_OUTPUT_SAMPLE_RATE = int(os.getenv("CLIENT_OUTPUT_SAMPLE_RATE", "24000"))  # 未宣言時はそのまま転送
+# G.711 を宣言したクライアントは Realtime API にも g711_* を要求して素通し（false ならリレーで変換）
+REALTIME_NATIVE_G711 = os.getenv("REALTIME_NATIVE_G711", "true").lower() == "true"
+
+# ✅ 下り音声キュー（Unityへの送信を実時間でペーシング）
+DOWNLINK_QUEUE_CONFIG = {
+    "max_bytes": int(os.getenv("DOWNLINK_QUEUE_MAX_BYTES", "2000000")),  # 上限（約40秒@24kHz）
+    "lead_ms": int(os.getenv("DOWNLINK_LEAD_MS", "200")),                 # クライアントに先行して送る量
+    "frame_ms": int(os.getenv("DOWNLINK_FRAME_MS", "40")),
+    "policy": os.getenv("DOWNLINK_QUEUE_POLICY", "drop_oldest"),         # drop_oldest | block
+}
+
+# ✅ VAD設定（フレーム単位の発話検出）
+VAD_CONFIG = {
+    "min_peak": int(os.getenv("VAD_MIN_PEAK", "100")),          # 従来の振幅閾値
+    "min_rms": float(os.getenv("VAD_MIN_RMS", "60")),
+    "start_ratio": float(os.getenv("VAD_START_RATIO", "3.0")),  # ノイズフロア比（発話開始）
+    "stop_ratio": float(os.getenv("VAD_STOP_RATIO", "1.8")),    # ノイズフロア比（発話終了）
+    "attack_frames": int(os.getenv("VAD_ATTACK_FRAMES", "2")),
+    "release_frames": int(os.getenv("VAD_RELEASE_FRAMES", "4")),
+}
+
+# ✅ 事前接続プール（設定済みセッションを待機させて接続遅延を削減）
+REALTIME_POOL_SIZE = int(os.getenv("REALTIME_POOL_SIZE", "2"))                      # 0 で無効
+REALTIME_POOL_MAX_AGE = float(os.getenv("REALTIME_POOL_MAX_AGE", "600"))            # 秒: 待機セッションの最大寿命
+REALTIME_POOL_IDLE_TIMEOUT = float(os.getenv("REALTIME_POOL_IDLE_TIMEOUT", "300"))  # 秒: 需要がなければプールを空に
+REALTIME_POOL_HEALTH_INTERVAL = float(os.getenv("REALTIME_POOL_HEALTH_INTERVAL", "15"))
+
+# ✅ ターン管理（フレーム単位でバージイン・コミットを判定）
+TURN_CONFIG = {
+    "hangover_ms": int(os.getenv("TURN_HANGOVER_MS", "150")),        # 発話終了後コミットまでの猶予
+    "min_speech_ms": int(os.getenv("TURN_MIN_SPEECH_MS", "200")),    # これより短い発話は破棄
+    "clear_after_ms": int(os.getenv("TURN_CLEAR_AFTER_MS", "1000")), # 無音がこれだけ溜まったらクリア
+}
+
+# ✅ 応答生成パラメータ（response.create）
+RESPONSE_CONFIG = {
+    "modalities": ["audio", "text"],
+    "instructions": "あなたは親切な医療アシスタントです。簡潔に応答してください。",
+    "voice": "alloy",
+    "temperature": 0.7,
+}
+
+# ✅ 音声合成（realtime: Realtime API の音声 / voicevox: テキスト応答を文ごとに VOICEVOX で合成）
+TTS_MODE = os.getenv("TTS_MODE", "realtime")
+VOICEVOX_URL = os.getenv("VOICEVOX_URL", "http://localhost:50021")
+VOICEVOX_SPEAKER = int(os.getenv("VOICEVOX_SPEAKER", "3"))                      # /speakers の style id
+VOICEVOX_PARAMS = {                                                             # audio_query に上書き
+    "speedScale": float(os.getenv("VOICEVOX_SPEED", "1.0")),
+    "pitchScale": float(os.getenv("VOICEVOX_PITCH", "0.0")),
+    "intonationScale": float(os.getenv("VOICEVOX_INTONATION", "1.0")),
+}
+VOICEVOX_MAX_CONNECTIONS = int(os.getenv("VOICEVOX_MAX_CONNECTIONS", "8"))      # HTTP 接続プール
+VOICEVOX_PARALLEL = int(os.getenv("VOICEVOX_PARALLEL", "3"))                    # 1応答で同時に合成する文の数
+VOICEVOX_TIMEOUT = float(os.getenv("VOICEVOX_TIMEOUT", "10"))
+VOICEVOX_CACHE_BYTES = int(os.getenv("VOICEVOX_CACHE_BYTES", "64000000"))       # フレーズキャッシュ（PCM）の上限
+
+if TTS_MODE == "voicevox":
+    # Realtime API にはテキストだけを生成させる（音声は VOICEVOX）
+    SESSION_CONFIG["modalities"] = ["text"]
+    RESPONSE_CONFIG["modalities"] = ["text"]
+elif TTS_MODE != "realtime":
+    raise RuntimeError(f"TTS_MODE は realtime か voicevox: {TTS_MODE!r}")
+
+# ✅ Function calling（functions.json のツール定義・結果キャッシュ）
+FUNCTIONS_PATH = os.getenv(
+    "FUNCTIONS_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "functions.json")
+)
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "300"))   # 秒（ツール個別の cache_ttl が優先）
+REDIS_URL = os.getenv("REDIS_URL")                            # 例: redis://redis:6379/0（未設定ならプロセス内のみ）
+
+# ✅ 定型応答キャッシュ（既定は無効。許可リストの発話だけに、承認済みの応答文の音声を返す）
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_DIR = os.getenv(
+    "RESPONSE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "response_cache")
+)
+RESPONSE_CACHE_ALLOWLIST = os.getenv(
+    "RESPONSE_CACHE_ALLOWLIST",
+    os.path.join(os.path.dirname(__file__), "..", "..", "response_cache_allowlist.json"),
+)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", "200000000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))           # 秒（許可リストの ttl が優先）
+RESPONSE_CACHE_WAIT_MS = int(os.getenv("RESPONSE_CACHE_WAIT_MS", "1500"))      # 文字起こし待ちの上限
+RESPONSE_CACHE_MS_PER_CHAR = float(os.getenv("RESPONSE_CACHE_MS_PER_CHAR", "250"))  # これより長い発話は待たない
+TRANSCRIPTION_MODEL = os.getenv("TRANSCRIPTION_MODEL", "whisper-1")            # キャッシュキー（・会話要約）用の文字起こし
+
+# ✅ セッションレジストリ（REDIS_URL があれば Redis、なければプロセス内）と再接続（既定は無効）
+# 会話の文字起こしは SESSION_STORE_TRANSCRIPTS=true のときだけレジストリに保存する
+# （保存しなければ、別のワーカーでの再開は会話を引き継がない。同じワーカーなら上流セッションごと引き継ぐ）
+SESSION_RESUME_TTL = float(os.getenv("SESSION_RESUME_TTL", "0"))       # 切断後に再開できる時間（0 で無効）
+SESSION_STORE_TRANSCRIPTS = os.getenv("SESSION_STORE_TRANSCRIPTS", "false").lower() == "true"
+SESSION_KEEPALIVE = float(os.getenv("SESSION_KEEPALIVE", "30"))         # 切断後に上流セッションを保持する時間
+SESSION_SUMMARY_TURNS = int(os.getenv("SESSION_SUMMARY_TURNS", "20"))  # 再開時に再生する会話の最大ターン数
+NODE_ID = os.getenv("NODE_ID") or f"{socket.gethostname()}-{os.getpid()}"  # ワーカーごとに一意
+NODE_ADDRESS = os.getenv("NODE_ADDRESS", "")                           # フロントエンドが振り分けに使う宛先
+NODE_REPORT_INTERVAL = float(os.getenv("NODE_REPORT_INTERVAL", "5"))   # 負荷報告の間隔（秒）
+
+# ✅ 受付制御（ワーカーあたり。0 で無制限）
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "20"))                  # 同時セッション上限（benchmarks.load_test で決める）
+SESSIONS_PER_MIN = float(os.getenv("SESSIONS_PER_MIN", "60"))        # 新規セッション / 分
+SESSION_BURST = int(os.getenv("SESSION_BURST", "10"))
+RESPONSES_PER_MIN = float(os.getenv("RESPONSES_PER_MIN", "300"))     # response.create / 分
+RESPONSE_BURST = int(os.getenv("RESPONSE_BURST", "20"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "50"))  # 待ち行列の長さ
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "15"))    # 待ち行列で待てる秒数（超えたら 1013）
+UPSTREAM_CONNECT_RETRIES = int(os.getenv("UPSTREAM_CONNECT_RETRIES", "3"))  # 429/5xx の再試行回数
+
+# ✅ ログ（整形・書き込みは別スレッド）
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")                         # text | json（1行1 JSON）
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))           # 溢れた分は捨てて数える
+
+# ✅ セッション録音（既定は無効。患者の音声を含むので保存先の扱いに注意）
+SESSION_RECORD = os.getenv("SESSION_RECORD", "false").lower() == "true"
+SESSION_RECORD_DIR = os.getenv(
+    "SESSION_RECORD_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "recordings")
+)
+SESSION_RECORD_SAMPLE = float(os.getenv("SESSION_RECORD_SAMPLE", "1.0"))          # 録音するセッションの割合
+SESSION_RECORD_MAX_FILE_BYTES = int(os.getenv("SESSION_RECORD_MAX_FILE_BYTES", "64000000"))
+SESSION_RECORD_MAX_BYTES = int(os.getenv("SESSION_RECORD_MAX_BYTES", "2000000000"))  # 超えたら古い順に削除
+
 # ✅ WebSocket URL生成関数
 def get_websocket_url():
     return f"{OPENAI_WSS}?model={MODEL_NAME}"
@@ -51,8 +178,14 @@ print(f"✅ 環境変数チェック完了")
 print(f"📍 エンドポイント: {get_websocket_url()}")
 print(f"🔑 APIキー: {OPENAI_API_KEY[:10]}..." if OPENAI_API_KEY else "未設定")
 print(f"🤖 モデル: {MODEL_NAME}")
-print(f"🎵 音声フォーマット: PCM16, 16kHz")
-print(f"📊 期待チャンクサイズ: 1,600 bytes（16kHz×50ms×2bytes）")
+print(f"🎵 音声フォーマット: PCM16 / G.711（format で宣言）, クライアント {CLIENT_INPUT_SAMPLE_RATE}Hz → OpenAI {UPSTREAM_SAMPLE_RATE}Hz（サーバー側でリサンプリング）")
+print(f"📊 期待チャンクサイズ: {CLIENT_INPUT_SAMPLE_RATE // 20 * 2:,} bytes（{CLIENT_INPUT_SAMPLE_RATE // 1000}kHz×50ms×2bytes）")
 print(f"🎙️ 音声検出: サーバー側VAD有効（手動制御モード）")
+print(f"🏊 事前接続プール: {REALTIME_POOL_SIZE} セッション")
+print(f"🚦 受付制御: 同時 {MAX_SESSIONS or '無制限'} セッション, {SESSIONS_PER_MIN:g} セッション/分, {RESPONSES_PER_MIN:g} 応答/分")
+print(f"🗂️ セッション再開: {'有効 (' + str(int(SESSION_RESUME_TTL)) + '秒, 文字起こし' + ('保存' if SESSION_STORE_TRANSCRIPTS else '保存なし') + ')' if SESSION_RESUME_TTL > 0 else '無効'}, ノード {NODE_ID}")
+print(f"🗣️ 音声合成: {'VOICEVOX (' + VOICEVOX_URL + ', speaker ' + str(VOICEVOX_SPEAKER) + ')' if TTS_MODE == 'voicevox' else 'Realtime API'}")
+print(f"🎞️ セッション録音: {'有効 (' + format(SESSION_RECORD_SAMPLE, '.0%') + ')' if SESSION_RECORD else '無効'}, ログ {LOG_FORMAT}")
+print(f"💾 定型応答キャッシュ: {'有効（許可リストの承認済み応答のみ）' if RESPONSE_CACHE_ENABLED else '無効'}")
 
 
@@ -1,13 +1,45 @@
 # mcp/app/main.py
-import logging
+import asyncio
+import atexit
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from .routers import realtime  # 相対インポートに変更
+from .core.config import LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE, NODE_REPORT_INTERVAL
+from .services import metrics as relay_metrics
+from .services.structured_log import setup_logging
+
+# ログ設定（整形・書き込みはリスナースレッドで。イベントループは止めない）
+log_listener = setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE,
+                             on_drop=relay_metrics.LOG_DROPPED.inc)
+atexit.register(log_listener.stop)
+
+from .routers import metrics, realtime  # noqa: E402  相対インポートに変更
+from .services.metrics import monitor_loop_lag  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 起動時: Realtime セッションの事前接続を開始
+    await realtime.upstream_pool.start()
+    lag_monitor = asyncio.create_task(monitor_loop_lag())
+    load_reporter = asyncio.create_task(realtime.report_node_load(NODE_REPORT_INTERVAL))
+    yield
+    # 終了時: 待機中・保持中のセッションを閉じる
+    lag_monitor.cancel()
+    load_reporter.cancel()
+    await realtime.upstream_pool.stop()
+    await realtime.parking.close()
+    if realtime.response_cache is not None:
+        realtime.response_cache.close()
+    if realtime.recorder is not None:
+        realtime.recorder.close()
+    if realtime.tts is not None:
+        await realtime.tts.close()
 
-# ログレベルの設定（INFO以上を出力）
-logging.basicConfig(level=logging.INFO)
 
 # FastAPI アプリ起動
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # ルーター登録
 app.include_router(realtime.router)
+app.include_router(metrics.router)
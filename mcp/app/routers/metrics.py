@@ -0,0 +1,13 @@
+# mcp/app/routers/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..services.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus テキスト形式のメトリクス"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
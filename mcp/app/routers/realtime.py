@@ -6,6 +6,7 @@
 1. 音声重複の防止: response_in_progressフラグで厳密に管理
 2. 空バッファエラーの解消: 無音検出を改善
 3. バージイン改善: 応答キャンセルのタイミング最適化
+4. ターン判定: 20チャンク窓をやめ、フレーム単位で判定（TurnManager）
 """
 
 from __future__ import annotations
@@ -14,23 +15,203 @@ import asyncio
 import base64
 import json
 import logging
+import time
+import uuid
 from typing import Any
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Header, HTTPException, WebSocket, WebSocketDisconnect
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException, InvalidStatusCode
 
 from ..core.config import (
     get_websocket_url,
-    OPENAI_API_KEY,
+    HEADERS,
     SESSION_CONFIG,
     MODEL_NAME,
+    VAD_CONFIG,
+    RESPONSE_CONFIG,
+    FUNCTIONS_PATH,
+    TOOL_CACHE_SIZE,
+    TOOL_CACHE_TTL,
+    REDIS_URL,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_DIR,
+    RESPONSE_CACHE_ALLOWLIST,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_WAIT_MS,
+    RESPONSE_CACHE_MS_PER_CHAR,
+    TRANSCRIPTION_MODEL,
+    SESSION_RESUME_TTL,
+    SESSION_STORE_TRANSCRIPTS,
+    SESSION_KEEPALIVE,
+    SESSION_SUMMARY_TURNS,
+    NODE_ID,
+    NODE_ADDRESS,
+    MAX_SESSIONS,
+    SESSIONS_PER_MIN,
+    SESSION_BURST,
+    RESPONSES_PER_MIN,
+    RESPONSE_BURST,
+    ADMISSION_QUEUE_SIZE,
+    ADMISSION_MAX_WAIT,
+    UPSTREAM_CONNECT_RETRIES,
+    SESSION_RECORD,
+    SESSION_RECORD_DIR,
+    SESSION_RECORD_SAMPLE,
+    SESSION_RECORD_MAX_FILE_BYTES,
+    SESSION_RECORD_MAX_BYTES,
+    TTS_MODE,
+    VOICEVOX_URL,
+    VOICEVOX_SPEAKER,
+    VOICEVOX_PARAMS,
+    VOICEVOX_MAX_CONNECTIONS,
+    VOICEVOX_PARALLEL,
+    VOICEVOX_TIMEOUT,
+    VOICEVOX_CACHE_BYTES,
+    TURN_CONFIG,
+    UPSTREAM_SAMPLE_RATE,
+    DOWNLINK_QUEUE_CONFIG,
+    CLIENT_INPUT_SAMPLE_RATE,
+    CLIENT_OUTPUT_SAMPLE_RATE,
+    REALTIME_NATIVE_G711,
+    REALTIME_POOL_SIZE,
+    REALTIME_POOL_MAX_AGE,
+    REALTIME_POOL_IDLE_TIMEOUT,
+    REALTIME_POOL_HEALTH_INTERVAL,
 )
-from ..services.function import handle_function
+from ..services.admission import AdmissionController, AdmissionRejected
+from ..services.audio_pipeline import AudioFormatError, AudioPipeline, negotiate
+from ..services.downlink import (
+    AUDIO_DELTA_TYPE,
+    AudioDelta,
+    audio_delta_from_event,
+    dispatcher,
+    parse_audio_delta,
+)
+from ..services import function as functions
+from ..services.cache import ResultCache
+from ..services.openai_ws import (
+    UpstreamError,
+    UpstreamParking,
+    UpstreamSessionPool,
+    open_session,
+    safe_close,
+)
+from ..services import metrics
+from ..services.response_cache import CachedResponse, ResponseCache, load_allowlist
+from ..services.session import RelaySession, ResponseRecording
+from ..services.session_recorder import SessionRecorder, SessionTape, TapedUpstream
+from ..services.session_registry import (
+    ProcessLoad,
+    ResumeRejected,
+    SessionRecord,
+    SessionRegistry,
+    new_resume_token,
+    new_session_id,
+)
+from ..services.structured_log import bind_session
+from ..services.tts import PhraseCache, SpeechStream, VoicevoxClient
+from ..services.turn_manager import CANCEL, CLEAR, COMMIT
+from ..services.vad import VoiceActivityDetector
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 受付制御（同時セッション上限・セッション開始 / response.create のレート）
+admission = AdmissionController(
+    MAX_SESSIONS,
+    SESSIONS_PER_MIN,
+    SESSION_BURST,
+    RESPONSES_PER_MIN,
+    RESPONSE_BURST,
+    max_queue=ADMISSION_QUEUE_SIZE,
+    max_wait=ADMISSION_MAX_WAIT,
+)
+
+# Function calling エンジン（functions.json + 結果キャッシュ）
+function_engine = functions.configure(
+    FUNCTIONS_PATH,
+    ResultCache.from_url(REDIS_URL, TOOL_CACHE_SIZE, TOOL_CACHE_TTL),
+    RESPONSE_CONFIG,
+    respond=lambda session: _request_followup(session),
+)
+
+
+def _make_response_cache() -> ResponseCache | None:
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    try:
+        allowlist = load_allowlist(RESPONSE_CACHE_ALLOWLIST)
+    except FileNotFoundError:
+        logger.warning("response cache allowlist not found: %s", RESPONSE_CACHE_ALLOWLIST)
+        allowlist = {}
+    return ResponseCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL,
+                         allowlist, ms_per_char=RESPONSE_CACHE_MS_PER_CHAR)
+
+
+# 定型応答キャッシュ（RESPONSE_CACHE_ENABLED のときのみ）
+response_cache = _make_response_cache()
+
+
+# セッションレジストリ（再接続時の再開・ノード負荷）と切断後の上流セッション保持
+registry = SessionRegistry.from_url(REDIS_URL, NODE_ID, ttl=SESSION_RESUME_TTL,
+                                    max_turns=SESSION_SUMMARY_TURNS)
+parking = UpstreamParking(SESSION_KEEPALIVE if SESSION_RESUME_TTL > 0 else 0)
+_process_load = ProcessLoad()
+
+# VOICEVOX 音声合成（TTS_MODE=voicevox のときのみ。PCM は Realtime API の pcm16 と同じ 24kHz）
+tts = VoicevoxClient(
+    VOICEVOX_URL,
+    VOICEVOX_SPEAKER,
+    params=VOICEVOX_PARAMS,
+    sample_rate=UPSTREAM_SAMPLE_RATE,
+    max_connections=VOICEVOX_MAX_CONNECTIONS,
+    timeout=VOICEVOX_TIMEOUT,
+    cache=PhraseCache(VOICEVOX_CACHE_BYTES),
+) if TTS_MODE == "voicevox" else None
+
+# セッション録音（SESSION_RECORD のときのみ。benchmarks/replay.py で再生できる）
+recorder = SessionRecorder(
+    SESSION_RECORD_DIR,
+    sample_rate=SESSION_RECORD_SAMPLE,
+    max_file_bytes=SESSION_RECORD_MAX_FILE_BYTES,
+    max_total_bytes=SESSION_RECORD_MAX_BYTES,
+) if SESSION_RECORD else None
+
+
+# 会話の文字起こしをレジストリに保存するか（明示的に有効にしたときだけ）
+_store_transcripts = SESSION_STORE_TRANSCRIPTS and SESSION_RESUME_TTL > 0
+
+
+def _session_config() -> dict:
+    """SESSION_CONFIG + 登録済みツール（+ キャッシュキー・会話要約用の文字起こし）"""
+    config = {**SESSION_CONFIG, **function_engine.session_fields()}
+    if TRANSCRIPTION_MODEL and (response_cache is not None or _store_transcripts):
+        config["input_audio_transcription"] = {"model": TRANSCRIPTION_MODEL}
+    return config
+
+
+# 設定済み Realtime セッションの事前接続プール（main.py の lifespan で起動）
+upstream_pool = UpstreamSessionPool(
+    lambda: open_session(get_websocket_url(), HEADERS, _session_config(),
+                         retries=UPSTREAM_CONNECT_RETRIES),
+    REALTIME_POOL_SIZE,
+    max_age=REALTIME_POOL_MAX_AGE,
+    idle_timeout=REALTIME_POOL_IDLE_TIMEOUT,
+    health_interval=REALTIME_POOL_HEALTH_INTERVAL,
+)
+
+# 接続中のセッション（メトリクス集計用）
+_active_sessions: set[RelaySession] = set()
+metrics.SESSIONS_ACTIVE.set_function(lambda: len(_active_sessions))
+metrics.ADMISSION_QUEUE.set_function(lambda: admission.metrics()["queue"])
+metrics.DOWNLINK_QUEUED_BYTES.set_function(
+    lambda: sum(s.audio_out.queued_bytes for s in _active_sessions)
+)
+_UP_FRAMES, _UP_BYTES = metrics.FRAMES.labels("uplink"), metrics.BYTES.labels("uplink")
+_DOWN_FRAMES, _DOWN_BYTES = metrics.FRAMES.labels("downlink"), metrics.BYTES.labels("downlink")
+
 # -----------------------------------------------------------------------------
 # WebSocket relay
 # -----------------------------------------------------------------------------
@@ -38,56 +219,124 @@ router = APIRouter()
 @router.websocket("/ws/audio")
 async def relay(ws: WebSocket) -> None:  # noqa: C901
     """Unity ↔ FastAPI ↔ OpenAI realtime audio relay"""
-    await ws.accept()
-    logger.info("Unity WS connected: %s", id(ws))
+    # セッションID と再開トークン（X-Session-Id / X-Resume-Token ヘッダーで返す）
+    session_id, token = await _resolve_session(ws)
+    await ws.accept(headers=[(b"x-session-id", session_id.encode()),
+                             (b"x-resume-token", token.encode())])
+    bind_session(session_id)  # 以降のログ（上り/下りタスクを含む）に session_id を付ける
+    metrics.SESSIONS_TOTAL.inc()
+    logger.info("Unity WS connected: %s (session %s)", id(ws), session_id)
 
-    url = get_websocket_url()
-    extra_headers = [
-        ("Authorization", f"Bearer {OPENAI_API_KEY}"),
-        ("OpenAI-Beta", "realtime=v1"),
-    ]
+    # -- クライアント音声フォーマットのネゴシエーション -------------------------
+    try:
+        client_format = negotiate(
+            ws.query_params, CLIENT_INPUT_SAMPLE_RATE, CLIENT_OUTPUT_SAMPLE_RATE
+        )
+    except AudioFormatError as exc:
+        logger.warning("format negotiation failed: %s", exc)
+        try:
+            await ws.close(code=1008, reason=str(exc))
+        except Exception:
+            pass
+        return
+    # VOICEVOX の下り音声は pcm16 なので、G.711 の素通しは Realtime API の音声を使うときだけ
+    pipeline = AudioPipeline(client_format, UPSTREAM_SAMPLE_RATE,
+                             REALTIME_NATIVE_G711 and tts is None)
+    logger.info("🎵 audio format: %s", pipeline.describe())
+
+    # -- 受付制御（上限・レート超過なら待ち行列、待ちきれなければ 1013） ------------
+    try:
+        waited = await admission.admit()
+    except AdmissionRejected as exc:
+        metrics.ADMISSION_REJECTED.labels(exc.reason).inc()
+        await _reject_busy(ws, exc.reason, exc.retry_after)
+        return
+    metrics.ADMISSION_WAIT.observe(waited)
+    if waited:
+        logger.info("🚦 admitted after %.1fs in queue (%s)", waited, admission.metrics())
+    admitted_at = time.monotonic()  # 待ち行列の時間は ADMISSION_WAIT に別に記録
 
     openai_ws: websockets.WebSocketClientProtocol | None = None
+    session: RelaySession | None = None
+    record: SessionRecord | None = None
+    tape: SessionTape | None = None
 
     try:
-        # --------------------------- connect to OpenAI ------------------------
-        openai_ws = await websockets.connect(
-            url,
-            extra_headers=extra_headers,
-            ping_interval=None,
-            ping_timeout=None,
-            close_timeout=10,
-        )
-        logger.info("✅ OpenAI WS connected (ping disabled)")
-
-        # -- wait session.created ---------------------------------------------
-        created = await _expect_json(openai_ws, "session.created", 10)
-        if created is None:
-            await _abort(ws, "session.created timeout")
+        # ------------------ セッション再開 / OpenAI session -------------------
+        try:
+            record, resumed = await registry.attach(session_id, token)
+        except ResumeRejected:
+            await ws.close(code=1008, reason="invalid resume token")
             return
+        record.metadata["format"] = client_format._asdict()
+        if resumed:
+            # 同じワーカーに保持していた上流セッションがあればそのまま使う
+            openai_ws = parking.take(session_id)
+        reattached = openai_ws is not None
+        if openai_ws is None:
+            try:
+                openai_ws = await upstream_pool.acquire()
+            except UpstreamError as exc:
+                if exc.retry_after is not None:  # Realtime API 側の混雑
+                    metrics.ADMISSION_REJECTED.labels("upstream busy").inc()
+                    await _reject_busy(ws, "upstream busy", exc.retry_after)
+                else:
+                    await _abort(ws, str(exc))
+                return
+        metrics.SESSION_ACQUIRE.observe(time.monotonic() - admitted_at)
+        logger.info("✅ OpenAI session ready (%s)", "reattached" if reattached else upstream_pool.metrics())
 
-        # -- send session.update ----------------------------------------------
-        await openai_ws.send(json.dumps({
-            "type": "session.update",
-            "session": SESSION_CONFIG,
-        }))
-        logger.info("📤 session.update sent (create_response: False)")
+        # 録音中は上流との送受信をテープ経由にする（保持・クローズは元の openai_ws で行う）
+        upstream = openai_ws
+        if recorder is not None:
+            tape = recorder.open(session_id, {
+                "query": dict(ws.query_params),
+                "format": client_format._asdict(),
+                "node_id": NODE_ID,
+                "model": MODEL_NAME,
+                "resumed": resumed,
+            })
+            if tape is not None:
+                upstream = TapedUpstream(openai_ws, tape)
 
-        # wait for session.updated
-        updated = await _expect_json(openai_ws, "session.updated", 5)
-        if updated:
-            logger.info("✅ session.updated received")
+        # G.711 を素通しする場合はこのセッションだけフォーマットを切り替える
+        # （以降の append/delta は Realtime API 側で順に処理されるので応答は待たない）
+        # 再接続では前回のフォーマットが残っているので常に送る
+        formats = pipeline.session_update()
+        if reattached:
+            formats = {"input_audio_format": pipeline.upstream_input_format,
+                       "output_audio_format": pipeline.upstream_output_format}
+        if formats:
+            await upstream.send(json.dumps({"type": "session.update", "session": formats}))
+        if reattached:
+            await upstream.send(json.dumps({"type": "input_audio_buffer.clear"}))
+            logger.info("🔁 session %s reattached to kept-alive upstream", session_id)
+        elif resumed:
+            await _replay_summary(upstream, record)
 
         # 🌟 共有状態
-        assistant_speaking = asyncio.Event()
-        response_in_progress = asyncio.Event()  # 応答生成中フラグ
+        session = RelaySession(ws, upstream, pipeline, DOWNLINK_QUEUE_CONFIG, TURN_CONFIG)
+        session.record = record
+        session.tape = tape
+        if reattached:
+            _restore_turn_state(session, record.state)
+        _active_sessions.add(session)
 
         # --------------------------- start proxy tasks -----------------------
-        await asyncio.gather(
-            _unity_to_openai(ws, openai_ws, assistant_speaking, response_in_progress),
-            _openai_to_unity(ws, openai_ws, assistant_speaking, response_in_progress),
-            return_exceptions=True,
-        )
+        # どれか1つが終わったら（切断など）残りも止める
+        tasks = [
+            asyncio.create_task(_unity_to_openai(session)),
+            asyncio.create_task(_openai_to_unity(session)),
+            asyncio.create_task(session.audio_out.run()),
+        ]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, (WebSocketDisconnect, ConnectionClosed)):
+                logger.warning("relay task ended: %r", exc)
 
     except WebSocketDisconnect:
         logger.info("Unity disconnected")
@@ -97,187 +346,594 @@ async def relay(ws: WebSocket) -> None:  # noqa: C901
         logger.exception("relay fatal: %s", exc)
         await _abort(ws, "internal error")
     finally:
-        if openai_ws is not None:
-            await _safe_close(openai_ws)
+        admission.release()
+        if tape is not None:
+            tape.close()
+        if session is not None:
+            _active_sessions.discard(session)
+            function_engine.close_session(session)
+            if session.transcript_wait is not None:
+                session.transcript_wait.cancel()
+            if session.response_task is not None:
+                session.response_task.cancel()
+            if session.speech is not None:
+                session.speech.cancel()
+        if openai_ws is not None and not await _detach(session, record, openai_ws):
+            await safe_close(openai_ws)
         logger.info("session ended: %s", id(ws))
 
+
+async def _resolve_session(ws: WebSocket) -> tuple[str, str]:
+    """再接続（発行済みの session_id + 再開トークン）ならそのまま、それ以外は新規発行
+
+    ID だけ・期限切れ・トークン不一致は新しいセッションとして始める（会話は引き継がない）。
+    """
+    requested = ws.query_params.get("session_id", "")
+    token = ws.headers.get("x-resume-token") or ws.query_params.get("resume_token", "")
+    if requested and token and await registry.verify(requested, token) is not None:
+        return requested, token
+    if requested:
+        logger.info("🔁 session %.8s… not resumable (expired or token mismatch), starting a new one",
+                    requested)
+    return new_session_id(), new_resume_token()
+
+
+async def _detach(session: RelaySession | None, record: SessionRecord | None, openai_ws) -> bool:
+    """切断を記録し、再接続に備えて上流セッションを保持する（保持したら True）"""
+    if record is None or SESSION_RESUME_TTL <= 0:
+        return False
+    if session is not None:
+        _save_turn_state(session)
+    if not await registry.detach(record):
+        return False  # 既に別のワーカーで再開されている
+    if session is not None and (session.response_in_progress.is_set()
+                                or session.assistant_speaking.is_set()):
+        try:
+            await openai_ws.send(json.dumps({"type": "response.cancel"}))
+        except ConnectionClosed:
+            return False
+    return parking.park(record.session_id, openai_ws)
+
+
+async def _replay_summary(openai_ws, record: SessionRecord) -> None:
+    """別のワーカーで再開: 直近の会話を conversation.item.create で再構築する"""
+    for role, text in record.turns:
+        content_type = "input_text" if role == "user" else "text"
+        await openai_ws.send(json.dumps({
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": role,
+                "content": [{"type": content_type, "text": text}],
+            },
+        }, ensure_ascii=False))
+    logger.info("🔁 session %s resumed from summary (%d turns)", record.session_id, len(record.turns))
+
+
+def _save_turn_state(session: RelaySession) -> None:
+    record = session.record
+    if record is not None:
+        record.state = {
+            "assistant_speaking": session.assistant_speaking.is_set(),
+            "response_in_progress": session.response_in_progress.is_set(),
+            "response_id": session.response_id,
+            "created_pending": session.created_pending,
+            "turns": len(record.turns),
+        }
+
+
+def _restore_turn_state(session: RelaySession, state: dict) -> None:
+    """保持していた上流セッションに再接続: 切断時にキャンセルした応答の残りを捨てる
+
+    _detach の response.cancel より前に上流が送った音声 delta は保持中のソケットに残っていて、
+    新しい接続の下りループに届く。バージインと同じく、その応答を打ち切り済みとして扱う。
+    """
+    if not (state.get("response_in_progress") or state.get("assistant_speaking")):
+        return
+    if state.get("response_id"):
+        session.cancelled_responses.add(state["response_id"])
+    if state.get("created_pending"):
+        session.cancel_before_created = True  # ID は response.created で分かる
+    # response.done（cancelled）が届くまで次の response.create を送らない
+    session.response_in_progress.set()
+
+
+async def _save_record(session: RelaySession) -> None:
+    if session.record is not None and SESSION_RESUME_TTL > 0:
+        _save_turn_state(session)
+        await registry.save(session.record)
+
 # -----------------------------------------------------------------------------
 # Task 1: Unity → OpenAI（音声重複防止版）
 # -----------------------------------------------------------------------------
 # mcp/app/routers/realtime.py の _unity_to_openai 関数を修正
 
-async def _unity_to_openai(
-    unity_ws: WebSocket, 
-    openai_ws: websockets.WebSocketClientProtocol,
-    assistant_speaking: asyncio.Event,
-    response_in_progress: asyncio.Event
-) -> None:
-    """PCM16 chunks → base64 & append/commit with duplicate prevention"""
-    idx = 0
-    audio_buffer_size = 0
-    has_voice = False  # 実際の音声があるか
-    
-    async for pcm in unity_ws.iter_bytes():
-        if not pcm:
+async def _unity_to_openai(session: RelaySession) -> None:
+    """Client audio chunks → base64 append, per-frame barge-in / commit decisions"""
+    vad = VoiceActivityDetector(**VAD_CONFIG)  # セッションごとのVAD状態
+    bytes_per_ms = session.pipeline.client.input_rate * 2 / 1000  # デコード後の PCM16
+
+    async for data in session.unity_ws.iter_bytes():
+        if not data:
+            continue
+        _UP_FRAMES.inc()
+        _UP_BYTES.inc(len(data))
+        if session.tape is not None:
+            session.tape.uplink(data)
+
+        # 音声レベルチェック（フレーム単位VAD）→ ターン判定
+        pcm = session.pipeline.input_pcm(data)
+        frame = vad.process(pcm)
+        if frame.onset:
+            logger.debug("🎤 音声検出: peak=%d rms=%.1f floor=%.1f",
+                         frame.peak, frame.rms, frame.noise_floor)
+        actions = session.turns.on_frame(frame, len(pcm) / bytes_per_ms, _assistant_active(session))
+
+        # バージインはこのフレームを送る前に
+        if CANCEL in actions:
+            await _barge_in(session)
+
+        # 音声データを追加（Realtime API 側のフォーマットへ変換。同じなら素通し）
+        audio = session.pipeline.uplink(data)
+        if audio:
+            await session.openai_ws.send(json.dumps({
+                "type": "input_audio_buffer.append",
+                "audio": base64.b64encode(audio).decode(),
+            }))
+
+        await _apply_turn_actions(session, actions)
+
+
+def _assistant_active(session: RelaySession) -> bool:
+    return (session.assistant_speaking.is_set() or session.audio_out.pending
+            or (session.speech is not None and session.speech.active))
+
+
+async def _apply_turn_actions(session: RelaySession, actions: list[str]) -> None:
+    """TurnManager の判定（CANCEL 以外）を実行"""
+    for action in actions:
+        if action == COMMIT:
+            await _commit_turn(session)
+        elif action == CLEAR:
+            await session.openai_ws.send(json.dumps({"type": "input_audio_buffer.clear"}))
+            logger.debug("🔇 無音のためバッファクリア")
+
+
+async def _commit_turn(session: RelaySession) -> None:
+    await session.openai_ws.send(json.dumps({"type": "input_audio_buffer.commit"}))
+    speech_end_ms = session.turns.latency["speech_end_to_commit_ms"][-1]
+    metrics.SPEECH_END_TO_COMMIT.observe(speech_end_ms / 1000)
+
+    # 応答生成中でない場合のみリクエスト
+    if (session.response_in_progress.is_set() or session.assistant_speaking.is_set()
+            or session.transcript_wait is not None):
+        logger.info("📤 コミットのみ（応答生成中）")
+        return
+    session.response_requested_at = time.monotonic()
+    if response_cache is not None:
+        if response_cache.may_match(session.turns.last_speech_ms):
+            # 文字起こしが届くまで保留し、キャッシュにあれば上流に応答を依頼しない
+            session.transcript_wait = asyncio.create_task(_transcript_timeout(session))
+            logger.info("📤 コミット（文字起こし待ち） speech end → commit %.0f ms", speech_end_ms)
+            return
+        metrics.RESPONSE_CACHE.labels("too_long").inc()  # 許可リストのどの発話より長い
+    await _request_response(session)
+    logger.info("📤 応答リクエスト送信 (speech end → commit %.0f ms)", speech_end_ms)
+
+
+async def _request_response(session: RelaySession, cache_key: str | None = None) -> None:
+    """response.create を送る（cache_key があれば承認済みの応答文を読み上げさせて記録する）
+
+    レート制限（受付制御）でトークンがなければ、待つのは別タスクで行う
+    （上り/下りのループは止めない。待っている間のバージインで取り消す）。
+    """
+    session.response_in_progress.set()  # フラグを立てる
+    if admission.try_acquire_response():
+        await _send_response_create(session, cache_key)
+        return
+    logger.info("🚦 response.create delayed by rate limit")
+    session.response_task = asyncio.create_task(_send_when_admitted(session, cache_key))
+
+
+async def _send_when_admitted(session: RelaySession, cache_key: str | None) -> None:
+    await admission.acquire_response()
+    session.response_task = None
+    try:
+        await _send_response_create(session, cache_key)
+    except ConnectionClosed:
+        pass
+
+
+async def _send_response_create(session: RelaySession, cache_key: str | None) -> None:
+    response = RESPONSE_CONFIG
+    if cache_key is not None:
+        # 許可リストの発話にはモデルに答えさせず、承認済みの応答文をそのまま読み上げさせる
+        response = {
+            **RESPONSE_CONFIG,
+            "instructions": _READ_ALOUD + response_cache.approved_answer(cache_key),
+            "tool_choice": "none",
+        }
+    await session.openai_ws.send(json.dumps({
+        "type": "response.create",
+        "response": response,
+    }, ensure_ascii=False))
+    session.created_pending = session.first_audio_pending = True
+    # VOICEVOX は response.done の後も合成が続くので応答キャッシュには記録しない（フレーズキャッシュを使う）
+    session.recording = ResponseRecording(cache_key) if cache_key and tts is None else None
+
+
+async def _request_followup(session: RelaySession) -> None:
+    """関数呼び出しの結果を受けた続きの応答（FunctionEngine から）"""
+    session.response_requested_at = time.monotonic()
+    await _request_response(session)
+    logger.info("📤 応答リクエスト送信（関数呼び出しの結果）")
+
+# -----------------------------------------------------------------------------
+# 定型応答キャッシュ
+# -----------------------------------------------------------------------------
+
+# 許可リストの発話への応答（キャッシュにないとき）。この後に承認済みの応答文を続ける
+_READ_ALOUD = "次の文章を一字一句変えずにそのまま読み上げてください。ほかには何も言わないでください。\n\n"
+
+# キャッシュ再生で1回に積む音声（約1秒分）
+_CACHE_CHUNK_BYTES = {"pcm16": UPSTREAM_SAMPLE_RATE * 2, "g711_ulaw": 8000, "g711_alaw": 8000}
+
+
+async def _transcript_timeout(session: RelaySession) -> None:
+    """文字起こしが間に合わなければ通常どおり応答を依頼"""
+    await asyncio.sleep(RESPONSE_CACHE_WAIT_MS / 1000)
+    session.transcript_wait = None
+    metrics.RESPONSE_CACHE.labels("timeout").inc()
+    logger.info("⌛ 文字起こし待ちタイムアウト → 通常応答")
+    try:
+        await _request_response(session)
+    except ConnectionClosed:
+        pass
+
+
+async def _resolve_transcript(session: RelaySession, transcript: str) -> None:
+    """保留中のターンをキャッシュから返すか、上流に依頼する"""
+    session.transcript_wait.cancel()
+    session.transcript_wait = None
+    key = response_cache.key(transcript, RESPONSE_CONFIG.get("instructions", ""),
+                             RESPONSE_CONFIG.get("voice", ""),
+                             session.pipeline.upstream_output_format)
+    if key is None:
+        metrics.RESPONSE_CACHE.labels("uncacheable").inc()
+        await _request_response(session)
+        return
+    cached = response_cache.get(key)
+    if cached is None:
+        metrics.RESPONSE_CACHE.labels("miss").inc()
+        await _request_response(session, key)
+        return
+    metrics.RESPONSE_CACHE.labels("hit").inc()
+    await _play_cached(session, cached)
+
+
+async def _play_cached(session: RelaySession, cached: CachedResponse) -> None:
+    """キャッシュした応答音声を Unity に流し、会話履歴には応答テキストを追加する"""
+    item_id = f"cache_{uuid.uuid4().hex[:16]}"
+    session.cached_items.add(item_id)
+    await session.openai_ws.send(json.dumps({
+        "type": "conversation.item.create",
+        "item": {
+            "id": item_id,
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": cached.answer}],
+        },
+    }, ensure_ascii=False))
+
+    pipeline = session.pipeline
+    pipeline.reset_downlink()
+    step = _CACHE_CHUNK_BYTES.get(pipeline.upstream_output_format, _CACHE_CHUNK_BYTES["pcm16"])
+    audio = cached.audio
+    for i in range(0, len(audio), step):
+        chunk = pipeline.downlink(bytes(audio[i:i + step]))
+        await session.audio_out.put(item_id, chunk)
+        _DOWN_FRAMES.inc()
+        _DOWN_BYTES.inc(len(chunk))
+        await asyncio.sleep(0)  # 長い応答でも他の処理を止めない
+    metrics.COMMIT_TO_FIRST_AUDIO.observe(time.monotonic() - session.response_requested_at)
+    logger.info("💾 キャッシュから応答: %s (%d bytes)", cached.answer[:30], len(audio))
+
+
+# -----------------------------------------------------------------------------
+# Task 2: OpenAI → Unity（応答管理改善版）
+# -----------------------------------------------------------------------------
+
+async def _openai_to_unity(session: RelaySession) -> None:
+    """OpenAI events → Unity (audio fast path + dispatch table)"""
+
+    async for m in session.openai_ws:
+        if not isinstance(m, str):
+            continue
+
+        # 音声データは JSON 全体をパースせずに転送（最頻出イベント）
+        delta = parse_audio_delta(m)
+        if delta is not None:
+            await _forward_audio(session, delta)
             continue
-        
-        # 音声レベルチェック（無音検出）
-        import struct
+
         try:
-            samples = struct.unpack(f"{len(pcm)//2}h", pcm)
-            max_amplitude = max(abs(s) for s in samples) if samples else 0
-            # 閾値を下げる（500 → 100）
-            if max_amplitude > 100:  # より敏感に音声を検出
-                has_voice = True
-                logger.debug(f"🎤 音声検出: 振幅 {max_amplitude}")
-        except Exception as e:
-            logger.error(f"音声解析エラー: {e}")
-            pass
-        
-        # バージイン処理（最初のチャンクでのみ）
-        if idx == 0 and assistant_speaking.is_set():
-            await openai_ws.send(json.dumps({"type": "response.cancel"}))
-            logger.info("🛑 User interrupted - cancelling AI response")
-            assistant_speaking.clear()
-            response_in_progress.clear()
-        
-        # 音声データを追加
-        await openai_ws.send(json.dumps({
-            "type": "input_audio_buffer.append",
-            "audio": base64.b64encode(pcm).decode(),
+            d: dict[str, Any] = json.loads(m)
+        except json.JSONDecodeError:
+            continue
+        await dispatcher.dispatch(session, d)
+
+
+async def _forward_audio(session: RelaySession, delta: AudioDelta, block: bool | None = None) -> None:
+    if not delta.audio or delta.response_id in session.cancelled_responses:
+        return  # キャンセル後に届いた残りの音声は捨てる
+    session.response_id = delta.response_id
+    recording = session.recording
+    if recording is not None and delta.response_id == recording.response_id:
+        recording.audio += delta.audio
+    # 送信は audio_out の送信タスクが実時間で行う（ここでは積むだけ）
+    audio_bytes = session.pipeline.downlink(delta.audio)
+    await session.audio_out.put(delta.item_id, audio_bytes, block=block)
+    _DOWN_FRAMES.inc()
+    _DOWN_BYTES.inc(len(audio_bytes))
+    if session.first_audio_pending:
+        session.first_audio_pending = False
+        metrics.COMMIT_TO_FIRST_AUDIO.observe(time.monotonic() - session.response_requested_at)
+    # 初回の音声データで話し始めを記録
+    if not session.assistant_speaking.is_set():
+        session.assistant_speaking.set()
+        logger.info("🔊 Assistant started speaking")
+        logger.info("📤 最初の音声データ: %d bytes", len(audio_bytes))
+
+
+async def _barge_in(session: RelaySession) -> None:
+    """未送信音声を破棄し、応答をキャンセルして会話履歴を実際に聞かせた位置で切る"""
+    if session.speech is not None:
+        # 音声が届く前でも、この応答の残りの text.delta で合成し直さないように
+        session.cancelled_responses.add(session.speech.response_id)
+        session.speech.cancel()  # 合成待ちの文も捨てる
+        session.speech = None
+    truncation = session.audio_out.flush()
+    if session.response_id:
+        session.cancelled_responses.add(session.response_id)
+    if session.created_pending:
+        session.cancel_before_created = True  # ID は response.created で分かる
+    queued = session.response_task is not None
+    if queued:
+        session.response_task.cancel()  # まだ送っていない response.create は取り消すだけ
+        session.response_task = None
+    if session.assistant_speaking.is_set() or (session.response_in_progress.is_set() and not queued):
+        await session.openai_ws.send(json.dumps({"type": "response.cancel"}))
+        session.cancel_sent_at = time.monotonic()
+        session.created_pending = session.first_audio_pending = False
+        onset_ms = session.turns.latency["onset_to_cancel_ms"]
+        if onset_ms:
+            metrics.ONSET_TO_CANCEL.observe(onset_ms[-1] / 1000)
+        logger.info("🛑 User interrupted - cancelling AI response")
+    if truncation is not None and truncation.item_id and truncation.item_id not in session.cached_items:
+        await session.openai_ws.send(json.dumps({
+            "type": "conversation.item.truncate",
+            "item_id": truncation.item_id,
+            "content_index": 0,
+            "audio_end_ms": truncation.audio_end_ms,
         }))
-        
-        idx += 1
-        audio_buffer_size += len(pcm)
-        
-        # 20チャンク（約1秒）ごとに処理
-        if idx >= 20:
-            logger.info(f"📊 音声バッファ: {audio_buffer_size} bytes, 音声あり: {has_voice}")
-            
-            # 音声がある場合のみコミット
-            if has_voice and audio_buffer_size > 3200:  # 2チャンク分以上
-                await openai_ws.send(json.dumps({"type": "input_audio_buffer.commit"}))
-                
-                # 応答生成中でない場合のみリクエスト
-                if not response_in_progress.is_set() and not assistant_speaking.is_set():
-                    response_in_progress.set()  # フラグを立てる
-                    await openai_ws.send(json.dumps({
-                        "type": "response.create",
-                        "response": {
-                            "modalities": ["audio", "text"],
-                            "instructions": "あなたは親切な医療アシスタントです。簡潔に応答してください。",
-                            "voice": "alloy",
-                            "temperature": 0.7,
-                        },
-                    }))
-                    logger.info("📤 応答リクエスト送信")
-                else:
-                    logger.info("📤 コミットのみ（応答生成中）")
-            else:
-                # 無音の場合はバッファをクリア
-                await openai_ws.send(json.dumps({"type": "input_audio_buffer.clear"}))
-                logger.info("🔇 無音のためバッファクリア")
-            
-            # リセット
-            idx = 0
-            audio_buffer_size = 0
-            has_voice = False
+        logger.info("✂️ truncate %s at %d ms", truncation.item_id, truncation.audio_end_ms)
+    session.assistant_speaking.clear()
+    session.response_in_progress.clear()
+
 # -----------------------------------------------------------------------------
-# Task 2: OpenAI → Unity（応答管理改善版）
+# 下りイベントハンドラ（dispatcher に登録）
 # -----------------------------------------------------------------------------
 
-async def _openai_to_unity(
-    unity_ws: WebSocket, 
-    openai_ws: websockets.WebSocketClientProtocol,
-    assistant_speaking: asyncio.Event,
-    response_in_progress: asyncio.Event
-) -> None:
-    """OpenAI events → Unity with improved response management"""
-    
-    async for m in openai_ws:
-        if isinstance(m, str):
-            try:
-                d: dict[str, Any] = json.loads(m)
-            except json.JSONDecodeError:
-                continue
-                
-            t = d.get("type", "?")
-            
-            # 音声データの転送
-            if t == "response.audio.delta":
-                delta = d.get("delta", "")
-                if delta:
-                    try:
-                        audio_bytes = base64.b64decode(delta)
-                        await unity_ws.send_bytes(audio_bytes)
-                        # 初回の音声データで話し始めを記録
-                        if not assistant_speaking.is_set():
-                            assistant_speaking.set()
-                            logger.info("🔊 Assistant started speaking")
-                            logger.info(f"📤 最初の音声データ送信: {len(audio_bytes)} bytes")
-                    except Exception as e:
-                        logger.error(f"❌ 音声データ送信エラー: {e}")
-                        
-            # 応答完了
-            elif t == "response.done":
-                assistant_speaking.clear()
-                response_in_progress.clear()  # フラグをクリア
-                logger.info("✅ Assistant finished speaking")
-                
-            # 応答キャンセル完了
-            elif t == "response.cancelled":
-                assistant_speaking.clear()
-                response_in_progress.clear()
-                logger.info("❌ Response cancelled")
-                
-            # 音声認識結果
-            elif t == "conversation.item.input_audio_transcription.completed":
-                transcript = d.get("transcript", "")
-                if transcript:
-                    logger.info(f"📝 User said: {transcript}")
-                    
-            # AI応答のテキスト
-            elif t == "response.audio_transcript.delta":
-                transcript = d.get("delta", "")
-                if transcript:
-                    logger.info(f"🤖 AI: {transcript}")
-                    
-            # 音声検出イベント
-            elif t == "input_audio_buffer.speech_started":
-                logger.debug("🎙️ Speech detected")
-            elif t == "input_audio_buffer.speech_stopped":
-                logger.debug("🎙️ Speech ended")
-                
-            # Function calling
-            elif t == "response.function_call_arguments.done":
-                await handle_function(d)
-                
-            # エラー
-            elif t.startswith("error"):
-                error_code = d.get("error", {}).get("code", "")
-                # 空バッファエラーは無視
-                if error_code != "input_audio_buffer_commit_empty":
-                    logger.error(f"❌ OpenAI error: {d}")
-                
-            # デバッグ用
-            else:
-                if t not in ["session.created", "session.updated", "response.created"]:
-                    logger.debug(f"📨 OpenAI event: {t}")
+@dispatcher.on(AUDIO_DELTA_TYPE)
+async def _on_audio_delta(session: RelaySession, d: dict) -> None:
+    # 高速パスで解析できなかった音声データ（空白入りJSONなど）
+    delta = audio_delta_from_event(d)
+    if delta is not None:
+        await _forward_audio(session, delta)
+
+
+# 応答生成開始
+@dispatcher.on("response.created")
+async def _on_response_created(session: RelaySession, d: dict) -> None:
+    response_id = d.get("response", {}).get("id", "")
+    # 最初の音声 delta より前にバージインしても、この応答の残りを捨てられるように
+    session.response_id = response_id
+    if session.cancel_before_created:
+        session.cancel_before_created = False
+        session.cancelled_responses.add(response_id)  # response.cancel は送信済み
+        return
+    if session.created_pending:
+        session.created_pending = False
+        metrics.COMMIT_TO_RESPONSE_CREATED.observe(time.monotonic() - session.response_requested_at)
+    if session.recording is not None and not session.recording.response_id:
+        session.recording.response_id = response_id
+
+
+def _observe_cancel_ack(session: RelaySession) -> None:
+    if session.cancel_sent_at is not None:
+        metrics.CANCEL_TO_ACK.observe(time.monotonic() - session.cancel_sent_at)
+        session.cancel_sent_at = None
+
+
+# 応答完了
+@dispatcher.on("response.done")
+async def _on_response_done(session: RelaySession, d: dict) -> None:
+    if d.get("response", {}).get("status") == "cancelled":
+        _observe_cancel_ack(session)
+    if session.speech is not None:
+        session.speech.finish()
+    session.pipeline.reset_downlink()
+    session.assistant_speaking.clear()
+    session.response_in_progress.clear()  # フラグをクリア
+    logger.info("✅ Assistant finished speaking")
+    if response_cache is not None:
+        _finish_recording(session, d.get("response", {}))
+    _record_assistant_turn(session, d.get("response", {}))
+    await _save_record(session)
+    # 関数呼び出しの結果待ちなら続きの応答を依頼
+    await function_engine.on_response_done(session, d.get("response", {}).get("id", ""))
+
+
+def _record_assistant_turn(session: RelaySession, response: dict) -> None:
+    """応答テキストを会話要約に追加（キャンセルされた応答も聞こえた分として残す）"""
+    if session.record is None or not _store_transcripts:
+        return
+    texts = [
+        part.get("transcript") or part.get("text") or ""
+        for item in response.get("output", []) if item.get("type") == "message"
+        for part in item.get("content", [])
+    ]
+    session.record.add_turn("assistant", "".join(texts), registry.max_turns)
+
+
+def _finish_recording(session: RelaySession, response: dict) -> None:
+    """完了した読み上げだけをキャッシュに保存（キャンセル・関数呼び出しを含む応答は捨てる。
+    承認済みの応答文と一致するかは response_cache.put が確かめる）"""
+    recording = session.recording
+    if recording is None or recording.response_id != response.get("id"):
+        return
+    session.recording = None
+    if response.get("status") != "completed":
+        return
+    if any(item.get("type") == "function_call" for item in response.get("output", [])):
+        return
+    response_cache.put(recording.key, "".join(recording.text), bytes(recording.audio))
+    logger.info("💾 応答をキャッシュ: %d bytes", len(recording.audio))
+
+
+# 応答キャンセル完了
+@dispatcher.on("response.cancelled")
+async def _on_response_cancelled(session: RelaySession, d: dict) -> None:
+    _observe_cancel_ack(session)
+    session.pipeline.reset_downlink()
+    session.assistant_speaking.clear()
+    session.response_in_progress.clear()
+    logger.info("❌ Response cancelled")
+
+
+# 音声認識結果
+@dispatcher.on("conversation.item.input_audio_transcription.completed")
+async def _on_user_transcript(session: RelaySession, d: dict) -> None:
+    transcript = d.get("transcript", "")
+    if transcript:
+        logger.info("📝 User said: %s", transcript)
+        if session.record is not None and _store_transcripts:
+            session.record.add_turn("user", transcript, registry.max_turns)
+    if session.transcript_wait is not None:
+        await _resolve_transcript(session, transcript)
+    await _save_record(session)
+
+
+# 会話 item（ユーザー音声・応答）の ID をレジストリに記録
+@dispatcher.on("conversation.item.created")
+async def _on_item_created(session: RelaySession, d: dict) -> None:
+    if session.record is not None:
+        session.record.add_item(d.get("item", {}).get("id", ""))
+
+
+@dispatcher.on("conversation.item.input_audio_transcription.failed")
+async def _on_user_transcript_failed(session: RelaySession, d: dict) -> None:
+    logger.warning("📝 transcription failed: %s", d.get("error", {}).get("message", ""))
+    if session.transcript_wait is not None:
+        await _resolve_transcript(session, "")
+
+
+# AI応答のテキスト
+@dispatcher.on("response.audio_transcript.delta")
+async def _on_ai_transcript(session: RelaySession, d: dict) -> None:
+    transcript = d.get("delta", "")
+    if transcript:
+        logger.debug("🤖 AI (delta): %s", transcript)
+        recording = session.recording
+        if recording is not None and d.get("response_id") == recording.response_id:
+            recording.text.append(transcript)
+
+
+# AI応答のテキスト（全文。delta ごとには INFO で出さない）
+@dispatcher.on("response.audio_transcript.done")
+async def _on_ai_transcript_done(session: RelaySession, d: dict) -> None:
+    if d.get("transcript"):
+        logger.info("🤖 AI: %s", d["transcript"])
+
+
+# テキスト応答（TTS_MODE=voicevox）→ 文ごとに VOICEVOX で合成して流す
+@dispatcher.on("response.text.delta")
+async def _on_text_delta(session: RelaySession, d: dict) -> None:
+    response_id = d.get("response_id", "")
+    if tts is None or response_id in session.cancelled_responses:
+        return
+    speech = session.speech
+    if speech is None or speech.response_id != response_id:
+        speech = session.speech = _start_speech(session, response_id, d.get("item_id", ""))
+    speech.feed(d.get("delta", ""))
+
+
+@dispatcher.on("response.text.done")
+async def _on_text_done(session: RelaySession, d: dict) -> None:
+    if d.get("text"):
+        logger.info("🤖 AI: %s", d["text"])
+    if session.speech is not None and session.speech.response_id == d.get("response_id"):
+        session.speech.finish()
+
+
+def _start_speech(session: RelaySession, response_id: str, item_id: str) -> SpeechStream:
+    session.cached_items.add(item_id)  # テキストの item は truncate できない
+
+    async def sink(pcm: bytes) -> None:
+        # 合成は実時間より速いので、キューが一杯なら捨てずに待つ
+        await _forward_audio(session, AudioDelta(item_id, response_id, pcm), block=True)
+
+    return SpeechStream(tts, sink, parallel=VOICEVOX_PARALLEL, after=session.speech,
+                        response_id=response_id)
+
+
+# 音声検出イベント（サーバーVAD）→ ローカル判定と統合
+@dispatcher.on("input_audio_buffer.speech_started")
+async def _on_speech_started(session: RelaySession, d: dict) -> None:
+    logger.debug("🎙️ Speech detected")
+    actions = session.turns.on_server_speech_started(_assistant_active(session))
+    if CANCEL in actions:
+        await _barge_in(session)
+
+
+@dispatcher.on("input_audio_buffer.speech_stopped")
+async def _on_speech_stopped(session: RelaySession, d: dict) -> None:
+    logger.debug("🎙️ Speech ended")
+    await _apply_turn_actions(session, session.turns.on_server_speech_stopped())
+
+
+# エラー
+@dispatcher.on_prefix("error")
+async def _on_error(session: RelaySession, d: dict) -> None:
+    error_code = d.get("error", {}).get("code", "")
+    # 空バッファエラーは無視
+    if error_code != "input_audio_buffer_commit_empty":
+        logger.error("❌ OpenAI error: %s", d)
+
+
+# デバッグ用
+_QUIET_EVENTS = frozenset({"session.created", "session.updated"})
+
+
+@dispatcher.on_default()
+async def _on_other(session: RelaySession, d: dict) -> None:
+    t = d.get("type", "?")
+    if t not in _QUIET_EVENTS:
+        logger.debug("📨 OpenAI event: %s", t)
 
 # -----------------------------------------------------------------------------
 # Utilities
 # -----------------------------------------------------------------------------
 
-async def _expect_json(ws: websockets.WebSocketClientProtocol, typ: str, timeout: float):
+async def _reject_busy(unity_ws: WebSocket, reason: str, retry_after: float) -> None:
+    """混雑: 1013 (Try Again Later) と再接続までの秒数を返す"""
+    logger.warning("🚦 busy (%s), retry after %ss", reason, retry_after)
     try:
-        raw = await asyncio.wait_for(ws.recv(), timeout)
-        if isinstance(raw, str):
-            data = json.loads(raw)
-            if data.get("type") == typ:
-                return data
-    except asyncio.TimeoutError:
+        await unity_ws.close(code=1013, reason=json.dumps(
+            {"error": "busy", "reason": reason, "retry_after": retry_after}))
+    except Exception:
         pass
-    return None
+
 
 async def _abort(unity_ws: WebSocket, reason: str):
     logger.error("abort: %s", reason)
@@ -286,12 +942,6 @@ async def _abort(unity_ws: WebSocket, reason: str):
     except Exception:
         pass
 
-async def _safe_close(ws: websockets.WebSocketClientProtocol):
-    try:
-        await ws.close()
-    except Exception:
-        pass
-
 # -----------------------------------------------------------------------------
 
 @router.get("/health")
@@ -304,4 +954,58 @@ async def health():
         "barge_in": "enabled",
         "duplicate_prevention": "enabled",
         "url": get_websocket_url(),
+        "upstream_pool": upstream_pool.metrics(),
+        "admission": admission.metrics(),
+        "functions": function_engine.metrics(),
+        "response_cache": response_cache.metrics() if response_cache is not None else None,
+        "sessions": {**registry.metrics(), "parking": parking.metrics()},
+        "recorder": recorder.metrics() if recorder is not None else None,
+        "tts": tts.metrics() if tts is not None else {"mode": TTS_MODE},
+        "metrics": metrics.REGISTRY.summary(),
+    }
+
+
+# -----------------------------------------------------------------------------
+# セッション・ノード（フロントエンドの振り分け用）
+# -----------------------------------------------------------------------------
+
+def node_load() -> dict:
+    return {
+        "address": NODE_ADDRESS,
+        "sessions": len(_active_sessions),
+        "detached": len(parking),
+        "pool_ready": upstream_pool.metrics()["ready"],
+        **_process_load.sample(),
+    }
+
+
+async def report_node_load(interval: float) -> None:
+    """このワーカーの負荷を定期的にレジストリへ書く（lifespan で起動）"""
+    while True:
+        await registry.report_load(node_load(), ttl=interval * 3)
+        await asyncio.sleep(interval)
+
+
+@router.get("/nodes")
+async def nodes():
+    """報告中のワーカー（負荷の低い順。先頭に新規セッションを振る）"""
+    return {"nodes": await registry.nodes()}
+
+
+@router.get("/sessions/{session_id}")
+async def session_info(session_id: str, x_resume_token: str = Header(default="")):
+    """再接続先の判断用: 最後に接続していたワーカーと状態（再開トークンが必要）"""
+    record = await registry.verify(session_id, x_resume_token)
+    if record is None:
+        raise HTTPException(status_code=404, detail="session not found")
+    return {
+        "session_id": record.session_id,
+        "node_id": record.node_id,
+        "status": record.status,
+        "updated_at": record.updated_at,
+        "turns": len(record.turns),
+        "items": len(record.items),
+        "state": record.state,
+        "reattachable": record.status == "detached" and record.node_id == NODE_ID
+                        and parking.has(session_id),
     }
@@ -0,0 +1,205 @@
+# mcp/app/services/admission.py
+"""受付制御（同時セッション上限・トークンバケット・FIFO 待ち行列）
+----------------------------------------------------------------
+- 同時セッション数の上限（ワーカーあたり）
+- セッション開始 / response.create の毎分レートをトークンバケットで制限
+  （Realtime API のレート制限に当たる前にこちらで平準化する）
+- 空きがなければ FIFO で待たせ、max_wait を超えたら AdmissionRejected（retry_after 付き）
+  → realtime.py がクローズコード 1013（Try Again Later）でクライアントに返す
+
+上限・レートは 0 で無制限。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """受付できなかった（混雑）。retry_after 秒後の再接続を促す"""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """毎分 rate 個・最大 burst 個のトークンバケット（rate 0 なら無制限）"""
+
+    def __init__(self, rate_per_min: float, burst: int) -> None:
+        self.rate = rate_per_min / 60.0
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._at = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._at) * self.rate)
+        self._at = now
+
+    def try_take(self) -> bool:
+        if self.unlimited:
+            return True
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until(self, n: int = 1) -> float:
+        """n 個目のトークンが貯まるまでの秒数"""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        return max(0.0, (n - self.tokens) / self.rate)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_sessions: int = 0,
+        sessions_per_min: float = 0,
+        session_burst: int = 10,
+        responses_per_min: float = 0,
+        response_burst: int = 20,
+        *,
+        max_queue: int = 50,
+        max_wait: float = 15.0,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.sessions = TokenBucket(sessions_per_min, session_burst)
+        self.responses = TokenBucket(responses_per_min, response_burst)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._queue: deque[asyncio.Future] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+        self._response_lock = asyncio.Lock()
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,              # 待ち行列を経由して受付
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "responses_delayed": 0,   # response.create をレート制限で待たせた
+        }
+
+    # ------------------------------------------------------------------ sessions
+
+    def _has_slot(self) -> bool:
+        return not self.max_sessions or self.active < self.max_sessions
+
+    async def admit(self) -> float:
+        """セッションを1つ受け付ける（待った秒数を返す）。release() と対で呼ぶ"""
+        if not self._queue and self._has_slot() and self.sessions.try_take():
+            self.active += 1
+            self.stats["admitted"] += 1
+            return 0.0
+        if len(self._queue) >= self.max_queue:
+            self.stats["rejected_queue_full"] += 1
+            raise AdmissionRejected("queue full", self._retry_after())
+
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.append(waiter)
+        self._schedule()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return self._granted(start)  # タイムアウトと同時に受付された
+            waiter.cancel()
+            self._discard(waiter)
+            self.stats["rejected_timeout"] += 1
+            raise AdmissionRejected("wait timeout", self._retry_after()) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # 受付直後にクライアントが切断
+            else:
+                waiter.cancel()
+                self._discard(waiter)
+            raise
+        return self._granted(start)
+
+    def _granted(self, start: float) -> float:
+        self.stats["admitted"] += 1
+        self.stats["queued"] += 1
+        return time.monotonic() - start
+
+    def release(self) -> None:
+        self.active = max(0, self.active - 1)
+        self._schedule()
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._queue.remove(waiter)
+        except ValueError:
+            pass
+
+    def _schedule(self) -> None:
+        """先頭から順に受付。トークン待ちならタイマーで再試行"""
+        while self._queue and self._has_slot():
+            head = self._queue[0]
+            if head.done():
+                self._queue.popleft()
+                continue
+            if not self.sessions.try_take():
+                if self._timer is None:
+                    delay = self.sessions.time_until()
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+            self._queue.popleft()
+            self.active += 1
+            head.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._schedule()
+
+    def _retry_after(self) -> float:
+        """待ち行列が捌けてトークンが貯まるまでの目安"""
+        return max(self.sessions.time_until(len(self._queue) + 1), self.max_wait)
+
+    # ------------------------------------------------------------------ responses
+
+    def try_acquire_response(self) -> bool:
+        """待たずに response.create を送れるか（待っているものがいれば順番を守って False）"""
+        return not self._response_lock.locked() and self.responses.try_take()
+
+    async def acquire_response(self) -> None:
+        """response.create の前に呼ぶ。トークンがなければ max_wait まで待つ（超えたら送る）
+
+        上り/下りのループからは直接 await しない（realtime.py は別タスクで待つ）。
+        """
+        if self.try_acquire_response():
+            return
+        self.stats["responses_delayed"] += 1
+        deadline = time.monotonic() + self.max_wait
+        async with self._response_lock:  # 待っているものは到着順に
+            while not self.responses.try_take():
+                delay = min(self.responses.time_until(), deadline - time.monotonic())
+                if delay <= 0:
+                    logger.warning("⏳ response.create rate limit exceeded; sending anyway")
+                    return
+                await asyncio.sleep(delay)
+
+    def metrics(self) -> dict:
+        return {
+            "active": self.active,
+            "max_sessions": self.max_sessions,
+            "queue": len(self._queue),
+            "max_queue": self.max_queue,
+            "session_tokens": None if self.sessions.unlimited else round(self.sessions.tokens, 2),
+            "response_tokens": None if self.responses.unlimited else round(self.responses.tokens, 2),
+            **self.stats,
+        }
@@ -0,0 +1,167 @@
+# mcp/app/services/audio_pipeline.py
+"""クライアント音声フォーマットのネゴシエーションと変換ステージ
+----------------------------------------------------------------
+/ws/audio のクエリパラメータでクライアントが自身のフォーマットを宣言する:
+
+    ws://host:8000/ws/audio?input_rate=16000&output_rate=16000&format=pcm16
+    ws://host:8000/ws/audio?format=g711_ulaw
+    ws://host:8000/ws/audio?input_format=pcm16&output_format=g711_alaw
+
+- input_rate   : クライアントが送るPCMのサンプルレート（省略時 16kHz）
+- output_rate  : クライアントが受け取りたいサンプルレート（省略時 24kHz）
+- format       : 音声フォーマット pcm16 / g711_ulaw / g711_alaw（上り下り共通）
+- input_format / output_format : 方向ごとに format を上書き
+G.711 は 8kHz 固定（rate を省略するか 8000 を指定する）。
+
+Realtime API 側は pcm16 = 24kHz、g711_* = 8kHz。
+native_g711 が有効なら G.711 の方向は Realtime API にも同じフォーマットを要求し
+（セッションごとの session.update）、リレーは素通しする。
+無効なら Realtime API 側は pcm16 のままで、リレーがデコード・リサンプリング・エンコードする。
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, NamedTuple
+
+from .codec import CODECS, Codec
+from .resampler import StreamingResampler
+
+UPSTREAM_SAMPLE_RATE = 24000
+SUPPORTED_FORMATS = tuple(CODECS)
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+
+class AudioFormatError(ValueError):
+    """クライアントが宣言したフォーマットが不正"""
+
+
+class ClientAudioFormat(NamedTuple):
+    input_rate: int
+    output_rate: int
+    input_format: str = "pcm16"
+    output_format: str = "pcm16"
+
+
+def _parse_rate(value: str | None, default: int, name: str) -> int:
+    if value is None or value == "":
+        return default
+    try:
+        rate = int(value)
+    except ValueError:
+        raise AudioFormatError(f"{name} must be an integer: {value!r}") from None
+    if not MIN_SAMPLE_RATE <= rate <= MAX_SAMPLE_RATE:
+        raise AudioFormatError(f"{name} out of range: {rate}")
+    return rate
+
+
+def _parse_format(value: str, name: str) -> str:
+    if value not in SUPPORTED_FORMATS:
+        raise AudioFormatError(f"unsupported {name}: {value!r}")
+    return value
+
+
+def _rate_for(fmt: str, value: str | None, default: int, name: str) -> int:
+    fixed = CODECS[fmt].sample_rate
+    if fixed is None:
+        return _parse_rate(value, default, name)
+    if value not in (None, "") and _parse_rate(value, fixed, name) != fixed:
+        raise AudioFormatError(f"{name} must be {fixed} for {fmt}: {value}")
+    return fixed
+
+
+def negotiate(
+    params: Mapping[str, str],
+    default_input_rate: int,
+    default_output_rate: int,
+) -> ClientAudioFormat:
+    """クエリパラメータからクライアントの音声フォーマットを決定する"""
+    fmt = _parse_format(params.get("format") or "pcm16", "format")
+    input_format = _parse_format(params.get("input_format") or fmt, "input_format")
+    output_format = _parse_format(params.get("output_format") or fmt, "output_format")
+    return ClientAudioFormat(
+        input_rate=_rate_for(input_format, params.get("input_rate"), default_input_rate, "input_rate"),
+        output_rate=_rate_for(output_format, params.get("output_rate"), default_output_rate, "output_rate"),
+        input_format=input_format,
+        output_format=output_format,
+    )
+
+
+class _Stage:
+    """1方向分: デコード → リサンプリング → エンコード（同じ形式・レートなら素通し）"""
+
+    def __init__(self, src: Codec, src_rate: int, dst: Codec, dst_rate: int) -> None:
+        self.src = src
+        self.dst = dst
+        self.resampler = StreamingResampler(src_rate, dst_rate)
+        self.passthrough = src.name == dst.name and self.resampler.passthrough
+
+    def process(self, data: bytes) -> bytes:
+        if self.passthrough:
+            return data
+        pcm = self.src.decode(data)
+        if not self.resampler.passthrough:
+            pcm = self.resampler.process(pcm)
+        return self.dst.encode(pcm)
+
+
+class AudioPipeline:
+    """セッションごとの上り/下り変換ステージ（状態はチャンク間で保持）"""
+
+    def __init__(
+        self,
+        client: ClientAudioFormat,
+        upstream_rate: int = UPSTREAM_SAMPLE_RATE,
+        native_g711: bool = True,
+    ) -> None:
+        self.client = client
+        self.upstream_rate = upstream_rate
+        # Realtime API 側のフォーマット（G.711 は素通しできるならそのまま使う）
+        self.upstream_input_format = client.input_format if native_g711 else "pcm16"
+        self.upstream_output_format = client.output_format if native_g711 else "pcm16"
+        self.input_codec = CODECS[client.input_format]
+        self.output_codec = CODECS[client.output_format]
+        self._up = _Stage(self.input_codec, client.input_rate,
+                          CODECS[self.upstream_input_format],
+                          self._upstream_rate_for(self.upstream_input_format))
+        self._down = _Stage(CODECS[self.upstream_output_format],
+                            self._upstream_rate_for(self.upstream_output_format),
+                            self.output_codec, client.output_rate)
+
+    def _upstream_rate_for(self, fmt: str) -> int:
+        return CODECS[fmt].sample_rate or self.upstream_rate
+
+    @property
+    def delay_ms(self) -> tuple[float, float]:
+        """(上り, 下り) のリサンプラ群遅延"""
+        return self._up.resampler.delay_ms, self._down.resampler.delay_ms
+
+    def session_update(self) -> dict:
+        """既定（pcm16）と異なる場合に session.update で送るフォーマット"""
+        if self.upstream_input_format == self.upstream_output_format == "pcm16":
+            return {}
+        return {
+            "input_audio_format": self.upstream_input_format,
+            "output_audio_format": self.upstream_output_format,
+        }
+
+    def input_pcm(self, data: bytes) -> bytes:
+        """クライアント音声を PCM16 で（VAD 用。レートは client.input_rate のまま）"""
+        return self.input_codec.decode(data)
+
+    def uplink(self, data: bytes) -> bytes:
+        """クライアント → Realtime API"""
+        return self._up.process(data)
+
+    def downlink(self, data: bytes) -> bytes:
+        """Realtime API → クライアント"""
+        return self._down.process(data)
+
+    def reset_downlink(self) -> None:
+        """応答の切り替わり（キャンセル等）で下りのフィルタ状態を捨てる"""
+        self._down.resampler.reset()
+
+    def describe(self) -> str:
+        c = self.client
+        return (f"in={c.input_format}@{c.input_rate}Hz out={c.output_format}@{c.output_rate}Hz "
+                f"(upstream in={self.upstream_input_format} out={self.upstream_output_format})")
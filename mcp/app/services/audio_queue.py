@@ -0,0 +1,171 @@
+# mcp/app/services/audio_queue.py
+"""Unity への下り音声キュー（上限付き・実時間ペーシング・即時フラッシュ）
+----------------------------------------------------------------
+- 下りイベント処理は put() で積むだけにして、送信の遅いクライアントで詰まらない
+- 送信タスク run() はクライアントの再生バッファが ``lead_ms`` を超えないよう実時間で送る
+- 実際に送った音声の長さを item_id ごとに記録（truncate の audio_end_ms に使う）
+- バージイン時は flush() で未送信分を一括破棄
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("drop_oldest", "block")
+
+
+class Truncation(NamedTuple):
+    """フラッシュ時点で送信済みだった音声"""
+
+    item_id: str
+    audio_end_ms: int
+
+
+class OutboundAudioQueue:
+    """mono の下り音声キュー（PCM16 / G.711 など sample_width で1サンプルの長さを指定）
+
+    policy:
+      - drop_oldest: 上限を超えたら古いフレームから捨てる（上りイベント処理を止めない）
+      - block      : 空きができるまで put() を待たせる
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes], Awaitable[None]],
+        sample_rate: int,
+        *,
+        sample_width: int = 2,
+        max_bytes: int = 2_000_000,
+        lead_ms: int = 200,
+        frame_ms: int = 40,
+        policy: str = "drop_oldest",
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy: {policy!r}")
+        self._send = send
+        self.bytes_per_sec = sample_rate * sample_width
+        self.max_bytes = max_bytes
+        self.lead = lead_ms / 1000
+        self.frame_bytes = max(sample_width,
+                               self.bytes_per_sec * frame_ms // 1000 // sample_width * sample_width)
+        self.policy = policy
+
+        self._frames: deque[tuple[str, bytes]] = deque()
+        self._queued = 0
+        self._has_data = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._play_clock = 0.0        # 送信済み音声をクライアントが再生し終える時刻
+        self._item_id = ""            # 最後に送信した item
+        self._item_sent = 0           # その item で送信済みのバイト数
+        self._flushes = 0             # flush() の回数（送信中のフレームを古い item に数えない）
+        self.stats = {
+            "delivered_bytes": 0,
+            "dropped_bytes": 0,   # 上限超過で破棄
+            "flushed_bytes": 0,   # バージインで破棄
+        }
+
+    # ------------------------------------------------------------------ producer
+
+    @property
+    def queued_bytes(self) -> int:
+        return self._queued
+
+    @property
+    def pending(self) -> bool:
+        """未送信の音声がある、またはクライアントがまだ再生中"""
+        return bool(self._frames) or self._play_clock > time.monotonic()
+
+    async def put(self, item_id: str, audio: bytes, *, block: bool | None = None) -> None:
+        """音声を積む（frame_ms 単位に分割）
+
+        block で policy を上書きできる（TTS のように実時間より速く届く音声は待たせる）
+        """
+        if not audio:
+            return
+        if self.policy == "block" if block is None else block:
+            while self._queued + len(audio) > self.max_bytes and self._queued:
+                self._has_space.clear()
+                await self._has_space.wait()
+        step = self.frame_bytes
+        for i in range(0, len(audio), step):
+            frame = audio[i:i + step]
+            self._frames.append((item_id, frame))
+            self._queued += len(frame)
+        if not (self.policy == "block" if block is None else block):
+            while self._queued > self.max_bytes and self._frames:
+                _, old = self._frames.popleft()
+                self._queued -= len(old)
+                self.stats["dropped_bytes"] += len(old)
+        self._has_data.set()
+
+    def flush(self) -> Truncation | None:
+        """未送信の音声を全て破棄し、送信済みの位置を返す
+
+        位置を返すのは item ごとに1回だけ（続けてバージインしても同じ item を二重に truncate しない）。
+        """
+        flushed = self._queued
+        self._frames.clear()
+        self._queued = 0
+        self._has_space.set()
+        self._flushes += 1
+        self.stats["flushed_bytes"] += flushed
+        if flushed:
+            logger.debug("🧹 flushed %d bytes of queued audio", flushed)
+        if not self._item_id:
+            return None
+        truncation = Truncation(self._item_id, self.delivered_ms())
+        self._item_id = ""
+        self._item_sent = 0
+        return truncation
+
+    def delivered_ms(self) -> int:
+        """最後の item について送信済みの音声長（ms）"""
+        return self._item_sent * 1000 // self.bytes_per_sec
+
+    # ------------------------------------------------------------------ consumer
+
+    async def run(self) -> None:
+        """送信タスク（セッション終了までキャンセルされない限り動き続ける）"""
+        while True:
+            if not self._frames:
+                self._has_data.clear()
+                await self._has_data.wait()
+                continue
+
+            now = time.monotonic()
+            ahead = self._play_clock - now
+            if ahead > self.lead:
+                await asyncio.sleep(ahead - self.lead)
+                continue
+
+            item_id, frame = self._frames.popleft()
+            self._queued -= len(frame)
+            if self._queued < self.max_bytes:
+                self._has_space.set()
+
+            flushes = self._flushes
+            await self._send(frame)
+
+            # 送信中にフラッシュされたフレームは truncate 済みの item なので数えない
+            if flushes == self._flushes:
+                if item_id != self._item_id:
+                    self._item_id = item_id
+                    self._item_sent = 0
+                self._item_sent += len(frame)
+            self.stats["delivered_bytes"] += len(frame)
+            self._play_clock = max(self._play_clock, now) + len(frame) / self.bytes_per_sec
+
+    def metrics(self) -> dict:
+        return {
+            "queued_bytes": self._queued,
+            "queued_ms": self._queued * 1000 // self.bytes_per_sec,
+            "buffered_ms": max(0, int((self._play_clock - time.monotonic()) * 1000)),
+            **self.stats,
+        }
@@ -0,0 +1,135 @@
+# mcp/app/services/cache.py
+"""LRU + TTL キャッシュ（任意で Redis をバックエンドに利用）
+----------------------------------------------------------------
+- TTLCache: プロセス内の LRU + TTL（同期・マイクロ秒で返る）
+- ResultCache: TTLCache を L1、Redis を L2 にした非同期キャッシュ
+  （Redis クライアントは redis.asyncio 互換なら何でもよい。テストでは fakeredis も可）
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC・大文字小文字・空白の揺れを吸収する"""
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+def make_key(namespace: str, arguments: Any, normalize: Iterable[str] = ()) -> str:
+    """引数をキャッシュキーにする（キー順に依存しない）
+
+    表記揺れを吸収するのは normalize に挙げた自由記述のフィールド（dict の文字列値）だけ。
+    それ以外（患者IDなどの識別子）は大文字小文字・全角半角も区別してそのまま使う。
+    """
+    fields = set(normalize)
+    if fields and isinstance(arguments, dict):
+        arguments = {k: normalize_text(v) if k in fields and isinstance(v, str) else v
+                     for k, v in arguments.items()}
+    body = json.dumps(arguments, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return f"{namespace}:{body}"
+
+
+class TTLCache:
+    """件数上限付き LRU + エントリごとの TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class ResultCache:
+    """L1: TTLCache / L2: Redis（任意）。値は JSON 化できるものに限る"""
+
+    def __init__(self, local: TTLCache, redis: Any | None = None, prefix: str = "mcp:") -> None:
+        self.local = local
+        self.redis = redis
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str | None, max_entries: int, ttl: float) -> "ResultCache":
+        client = None
+        if url:
+            import redis.asyncio as aioredis
+            client = aioredis.from_url(url)
+        return cls(TTLCache(max_entries, ttl), client)
+
+    async def get(self, key: str) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.redis is None:
+            return _MISSING
+        try:
+            raw = await self.redis.get(self.prefix + key)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("redis get failed: %s", exc)
+            return _MISSING
+        if raw is None:
+            return _MISSING
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.local.ttl if ttl is None else ttl
+        self.local.set(key, value, ttl)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False),
+                                 ex=max(1, int(ttl)))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("redis set failed: %s", exc)
+
+    @staticmethod
+    def is_miss(value: Any) -> bool:
+        return value is _MISSING
+
+    def metrics(self) -> dict:
+        return {
+            "entries": len(self.local),
+            "hits": self.local.hits,
+            "misses": self.local.misses,
+            "redis": self.redis is not None,
+        }
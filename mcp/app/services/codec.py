@@ -0,0 +1,100 @@
+# mcp/app/services/codec.py
+"""G.711（μ-law / A-law）のテーブル駆動コーデック
+----------------------------------------------------------------
+- デコード: 256 要素の int16 テーブルを1回引くだけ
+- エンコード: int16 の全 65536 値に対する uint8 テーブルを1回引くだけ
+  （int16 を uint16 として見たものをそのまま添字にする）
+テーブルはインポート時に numpy で一度だけ作る（ITU-T G.711 / Sun g711.c と同じ量子化）。
+
+Realtime API の g711_ulaw / g711_alaw は 8kHz 固定、pcm16 は 24kHz 固定。
+"""
+
+from __future__ import annotations
+
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+G711_SAMPLE_RATE = 8000
+
+_ALL_INT16 = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+
+
+def _ulaw_tables() -> tuple[np.ndarray, np.ndarray]:
+    # デコード
+    u = ~np.arange(256) & 0xFF
+    t = (((u & 0x0F) << 3) + 0x84) << ((u & 0x70) >> 4)
+    decode = np.where(u & 0x80, 0x84 - t, t - 0x84).astype("<i2")
+
+    # エンコード（14bit に落としてからセグメント探索）
+    x = _ALL_INT16 >> 2
+    mask = np.where(x < 0, 0x7F, 0xFF)
+    mag = np.minimum(np.abs(x), 8159) + 0x21
+    seg = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), mag)
+    uval = (np.minimum(seg, 7) << 4) | ((mag >> (seg + 1)) & 0x0F)
+    uval = np.where(seg >= 8, 0x7F, uval)
+    encode = (uval ^ mask).astype(np.uint8)
+    return decode, encode
+
+
+def _alaw_tables() -> tuple[np.ndarray, np.ndarray]:
+    # デコード
+    a = np.arange(256) ^ 0x55
+    seg = (a & 0x70) >> 4
+    t = (a & 0x0F) << 4
+    t = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+    decode = np.where(a & 0x80, t, -t).astype("<i2")
+
+    # エンコード（13bit に落としてからセグメント探索）
+    x = _ALL_INT16 >> 3
+    mask = np.where(x >= 0, 0xD5, 0x55)
+    mag = np.where(x >= 0, x, -x - 1)
+    seg = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), mag)
+    shift = np.where(seg < 2, 1, seg)
+    aval = (np.minimum(seg, 7) << 4) | ((mag >> shift) & 0x0F)
+    aval = np.where(seg >= 8, 0x7F, aval)
+    encode = (aval ^ mask).astype(np.uint8)
+    return decode, encode
+
+
+_ULAW_DECODE, _ULAW_ENCODE = _ulaw_tables()
+_ALAW_DECODE, _ALAW_ENCODE = _alaw_tables()
+
+
+def _decoder(table: np.ndarray) -> Callable[[bytes], bytes]:
+    def decode(data: bytes) -> bytes:
+        return table[np.frombuffer(data, dtype=np.uint8)].tobytes()
+    return decode
+
+
+def _encoder(table: np.ndarray) -> Callable[[bytes], bytes]:
+    def encode(pcm: bytes) -> bytes:
+        return table[np.frombuffer(pcm, dtype="<u2", count=len(pcm) // 2)].tobytes()
+    return encode
+
+
+ulaw_decode = _decoder(_ULAW_DECODE)
+ulaw_encode = _encoder(_ULAW_ENCODE)
+alaw_decode = _decoder(_ALAW_DECODE)
+alaw_encode = _encoder(_ALAW_ENCODE)
+
+
+def _identity(data: bytes) -> bytes:
+    return data
+
+
+class Codec(NamedTuple):
+    """Realtime API の音声フォーマット名と PCM16 との相互変換"""
+
+    name: str
+    sample_width: int             # 1サンプルのバイト数
+    sample_rate: int | None       # 固定レート（None ならクライアントが宣言）
+    decode: Callable[[bytes], bytes]  # → PCM16
+    encode: Callable[[bytes], bytes]  # PCM16 →
+
+
+CODECS: dict[str, Codec] = {
+    "pcm16": Codec("pcm16", 2, None, _identity, _identity),
+    "g711_ulaw": Codec("g711_ulaw", 1, G711_SAMPLE_RATE, ulaw_decode, ulaw_encode),
+    "g711_alaw": Codec("g711_alaw", 1, G711_SAMPLE_RATE, alaw_decode, alaw_encode),
+}
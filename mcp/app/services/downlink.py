@@ -0,0 +1,133 @@
+# mcp/app/services/downlink.py
+"""OpenAI → Unity 下りイベントのデコーダとディスパッチテーブル
+----------------------------------------------------------------
+- response.audio.delta は JSON 全体をパースせず、文字列走査で
+  item_id / delta を切り出して base64 を直接デコードする（高速パス）
+- それ以外のイベントは json.loads 後、type ごとの登録ハンドラへ振り分ける
+- 拡張（function calling、文字起こし保存など）は ``dispatcher.on()`` で登録する
+"""
+
+from __future__ import annotations
+
+import binascii
+import logging
+from typing import Any, Awaitable, Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+AUDIO_DELTA_TYPE = "response.audio.delta"
+_AUDIO_DELTA_MARK = '"type":"response.audio.delta"'
+_DELTA_KEY = '"delta":"'
+_ITEM_ID_KEY = '"item_id":"'
+_RESPONSE_ID_KEY = '"response_id":"'
+_TYPE_SCAN = 96  # type フィールドを探す先頭範囲
+
+Handler = Callable[[Any, dict], Awaitable[None]]
+
+
+class AudioDelta(NamedTuple):
+    item_id: str
+    response_id: str
+    audio: bytes
+
+
+def _string_field(raw: str, key: str, end: int) -> str:
+    i = raw.find(key, 0, end)
+    if i < 0:
+        return ""
+    i += len(key)
+    j = raw.find('"', i, end)
+    return raw[i:j] if j >= 0 else ""
+
+
+def parse_audio_delta(raw: str) -> AudioDelta | None:
+    """response.audio.delta なら AudioDelta を返す（それ以外・解析不能は None）
+
+    Realtime API はコンパクトな JSON を送るので、type は先頭付近にある。
+    base64 文字列は引用符やエスケープを含まないため、単純な走査で切り出せる。
+    想定外の形（空白入りなど）は None を返し、通常の json.loads 経路に任せる。
+    """
+    if raw.find(_AUDIO_DELTA_MARK, 0, _TYPE_SCAN) < 0:
+        return None
+    start = raw.find(_DELTA_KEY)
+    if start < 0:
+        return None
+    start += len(_DELTA_KEY)
+    end = raw.find('"', start)
+    if end < 0:
+        return None
+    try:
+        audio = binascii.a2b_base64(raw[start:end])
+    except binascii.Error:
+        return None
+    # item_id / response_id は delta より前に来るのが通常（後ろでも拾える）
+    head = start if raw.find(_ITEM_ID_KEY, 0, start) >= 0 else len(raw)
+    return AudioDelta(
+        _string_field(raw, _ITEM_ID_KEY, head),
+        _string_field(raw, _RESPONSE_ID_KEY, head),
+        audio,
+    )
+
+
+def audio_delta_from_event(event: dict) -> AudioDelta | None:
+    """json.loads 済みの response.audio.delta から AudioDelta を作る（低速パス）"""
+    delta = event.get("delta", "")
+    if not delta:
+        return None
+    try:
+        audio = binascii.a2b_base64(delta)
+    except binascii.Error:
+        return None
+    return AudioDelta(event.get("item_id", ""), event.get("response_id", ""), audio)
+
+
+class EventDispatcher:
+    """イベント type → ハンドラのレジストリ
+
+    - ``on(type)``        : 完全一致（1つの type に複数登録可、登録順に実行）
+    - ``on_prefix(pre)``  : 前方一致（例: "error"）
+    - ``on_default()``    : どれにも一致しなかったとき
+    ハンドラ内の例外はログに残し、下りループは止めない。
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[Handler]] = {}
+        self._prefix_handlers: list[tuple[str, Handler]] = []
+        self._default: list[Handler] = []
+
+    def register(self, event_type: str, handler: Handler) -> Handler:
+        self._handlers.setdefault(event_type, []).append(handler)
+        return handler
+
+    def on(self, event_type: str) -> Callable[[Handler], Handler]:
+        return lambda handler: self.register(event_type, handler)
+
+    def on_prefix(self, prefix: str) -> Callable[[Handler], Handler]:
+        def deco(handler: Handler) -> Handler:
+            self._prefix_handlers.append((prefix, handler))
+            return handler
+        return deco
+
+    def on_default(self) -> Callable[[Handler], Handler]:
+        def deco(handler: Handler) -> Handler:
+            self._default.append(handler)
+            return handler
+        return deco
+
+    def handlers_for(self, event_type: str) -> list[Handler]:
+        handlers = self._handlers.get(event_type)
+        if handlers:
+            return handlers
+        matched = [h for p, h in self._prefix_handlers if event_type.startswith(p)]
+        return matched or self._default
+
+    async def dispatch(self, session: Any, event: dict) -> None:
+        for handler in self.handlers_for(event.get("type", "?")):
+            try:
+                await handler(session, event)
+            except Exception:  # noqa: BLE001
+                logger.exception("handler failed: %s", event.get("type"))
+
+
+# 既定のディスパッチテーブル（realtime.py と拡張モジュールが共有する）
+dispatcher = EventDispatcher()
@@ -1,9 +1,268 @@
-# 今は空っぽの function router
-function_router: dict[str, callable] = {}
+# mcp/app/services/function.py
+"""Function calling エンジン
+----------------------------------------------------------------
+- ツール定義は functions.json から読み込み、ハンドラが登録済みのものだけ session.update で公開
+- 呼び出しは下りループの外（バックグラウンドタスク）で実行するので音声転送は止まらない
+- ツールごとの同時実行数上限とタイムアウト
+- 結果は function_call_output として返し、元の応答が終わったら続きの応答を依頼
+  （response.done 時に realtime.py から on_response_done() を呼ぶ。依頼は respond() 経由で、
+  次のターンの応答が既に依頼済みならその応答に任せる）
+- 結果は引数をキーに LRU + TTL キャッシュ（任意で Redis）。表記揺れを吸収するのは
+  runtime.normalize に挙げた自由記述のフィールドだけで、ID などはそのままキーにする
 
-async def handle_function(call: dict):
-    name = call.get("name")
-    if name in function_router:
-        await function_router[name](call.get("arguments", {}))
-    # 後日: Graph AI をここで呼ぶ
+ハンドラが1つも登録されていなければツールは公開されず、エンジンは何もしない。ハンドラの登録:
 
+    from app.services.function import register
+
+    @register("search_medical")
+    async def search_medical(args: dict) -> dict:
+        ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from websockets.exceptions import ConnectionClosed
+
+from .cache import ResultCache, make_key
+from .downlink import dispatcher
+
+logger = logging.getLogger(__name__)
+
+# ツール名 → async ハンドラ（引数 dict を受け取り JSON 化できる値を返す）
+function_router: dict[str, Callable[[dict], Awaitable[Any]]] = {}
+
+DEFAULT_RUNTIME = {"timeout": 10.0, "max_concurrency": 4, "cache_ttl": 0, "normalize": []}
+
+
+def register(name: str):
+    def deco(fn: Callable[[dict], Awaitable[Any]]):
+        function_router[name] = fn
+        return fn
+    return deco
+
+
+class ToolSpec:
+    """functions.json の1エントリ（runtime はサーバー側設定で OpenAI には送らない）"""
+
+    def __init__(self, definition: dict) -> None:
+        runtime = {**DEFAULT_RUNTIME, **definition.get("runtime", {})}
+        self.name: str = definition["name"]
+        self.definition = {
+            "type": "function",
+            "name": self.name,
+            "description": definition.get("description", ""),
+            "parameters": definition.get("parameters", {"type": "object", "properties": {}}),
+        }
+        self.timeout = float(runtime["timeout"])
+        self.cache_ttl = float(runtime["cache_ttl"])
+        self.normalize = tuple(runtime["normalize"])  # キャッシュキーで表記揺れを吸収するフィールド
+        self.semaphore = asyncio.Semaphore(int(runtime["max_concurrency"]))
+
+
+def load_tools(path: str | Path) -> dict[str, ToolSpec]:
+    with open(path, encoding="utf-8") as f:
+        return {d["name"]: ToolSpec(d) for d in json.load(f)}
+
+
+class _PendingResponse:
+    """1つの応答から出た関数呼び出しの集計"""
+
+    __slots__ = ("calls", "done")
+
+    def __init__(self) -> None:
+        self.calls = 0      # 実行中の呼び出し数
+        self.done = False   # 元の応答の response.done を受信済み
+
+
+class FunctionEngine:
+    def __init__(
+        self,
+        tools: dict[str, ToolSpec],
+        cache: ResultCache,
+        response_config: dict,
+        router: dict[str, Callable[[dict], Awaitable[Any]]] = function_router,
+        respond: Callable[[Any], Awaitable[None]] | None = None,
+    ) -> None:
+        self.tools = tools
+        self.cache = cache
+        self.response_config = response_config
+        self.router = router
+        # 続きの応答の依頼（realtime.py の計測・受付制御込み。None なら response.create を直接送る）
+        self.respond = respond
+        self._pending: dict[tuple[int, str], _PendingResponse] = {}
+        self._tasks: dict[int, set[asyncio.Task]] = {}
+        self._names: dict[str, str] = {}  # call_id → name（done に name が無い場合用）
+        self.stats = {"calls": 0, "cache_hits": 0, "timeouts": 0, "errors": 0}
+
+    @property
+    def exposed(self) -> list[str]:
+        """モデルに公開するツール（ハンドラ登録済みのもの）"""
+        return [name for name in self.tools if name in self.router]
+
+    def session_fields(self) -> dict:
+        """session.update に足すツール定義（ハンドラ登録済みのもののみ）"""
+        tools = [self.tools[name].definition for name in self.exposed]
+        return {"tools": tools, "tool_choice": "auto"} if tools else {}
+
+    # ------------------------------------------------------------------ events
+
+    def note_item(self, item: dict) -> None:
+        if item.get("type") == "function_call" and item.get("call_id"):
+            self._names[item["call_id"]] = item.get("name", "")
+
+    def submit(self, session: Any, event: dict) -> None:
+        """response.function_call_arguments.done を受けてバックグラウンド実行"""
+        call_id = event.get("call_id", "")
+        name = event.get("name") or self._names.pop(call_id, "")
+        pending = self._pending.setdefault((session.id, event.get("response_id", "")),
+                                           _PendingResponse())
+        pending.calls += 1
+        task = asyncio.create_task(self._run(session, event.get("response_id", ""),
+                                             call_id, name, event.get("arguments", "{}")))
+        tasks = self._tasks.setdefault(session.id, set())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def on_response_done(self, session: Any, response_id: str) -> None:
+        pending = self._pending.get((session.id, response_id))
+        if pending is None:
+            return
+        pending.done = True
+        await self._maybe_respond(session, response_id, pending)
+
+    def close_session(self, session: Any) -> None:
+        for task in self._tasks.pop(session.id, set()):
+            task.cancel()
+        for key in [k for k in self._pending if k[0] == session.id]:
+            del self._pending[key]
+
+    # ------------------------------------------------------------------ execution
+
+    async def call(self, name: str, arguments: dict) -> Any:
+        """ツールを実行して結果を返す（キャッシュ・同時実行数・タイムアウト込み）"""
+        spec = self.tools.get(name)
+        handler = self.router.get(name)
+        if spec is None or handler is None:
+            return {"error": f"unknown function: {name}"}
+        self.stats["calls"] += 1
+
+        key = make_key(name, arguments, spec.normalize)
+        if spec.cache_ttl > 0:
+            cached = await self.cache.get(key)
+            if not self.cache.is_miss(cached):
+                self.stats["cache_hits"] += 1
+                return cached
+
+        try:
+            async with spec.semaphore:
+                result = await asyncio.wait_for(handler(arguments), spec.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning("⏱️ function %s timed out after %.1fs", name, spec.timeout)
+            return {"error": "timeout"}
+        except Exception as exc:  # noqa: BLE001
+            self.stats["errors"] += 1
+            logger.exception("function %s failed", name)
+            return {"error": str(exc)}
+
+        if spec.cache_ttl > 0:
+            await self.cache.set(key, result, spec.cache_ttl)
+        return result
+
+    async def _run(self, session: Any, response_id: str, call_id: str, name: str, raw_args: str) -> None:
+        try:
+            arguments = json.loads(raw_args) if raw_args else {}
+        except json.JSONDecodeError:
+            arguments = None
+        result = (await self.call(name, arguments) if isinstance(arguments, dict)
+                  else {"error": "invalid arguments"})
+        logger.info("🔧 function %s → %s", name, "error" if "error" in _as_dict(result) else "ok")
+
+        try:
+            await session.openai_ws.send(json.dumps({
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "function_call_output",
+                    "call_id": call_id,
+                    "output": json.dumps(result, ensure_ascii=False),
+                },
+            }))
+            pending = self._pending.get((session.id, response_id))
+            if pending is not None:
+                pending.calls -= 1
+                await self._maybe_respond(session, response_id, pending)
+        except ConnectionClosed:
+            # 上流が切れた: 結果は返せないので、この応答の集計ごと捨てる
+            self._pending.pop((session.id, response_id), None)
+            logger.info("🔧 function %s result dropped: upstream closed", name)
+
+    async def _maybe_respond(self, session: Any, response_id: str, pending: _PendingResponse) -> None:
+        """全呼び出しが終わり、元の応答も終わっていたら続きの応答を依頼"""
+        if pending.calls > 0 or not pending.done:
+            return
+        del self._pending[(session.id, response_id)]
+        if session.turns.speaking:
+            return  # 患者が話し始めているので、次のターンに任せる
+        if session.response_in_progress.is_set() or session.transcript_wait is not None:
+            # 次のターンの応答を依頼済み（結果は会話履歴に入っているので重ねて依頼しない）
+            logger.info("🔧 follow-up skipped: next turn already requested a response")
+            return
+        if self.respond is not None:
+            await self.respond(session)
+            return
+        session.response_in_progress.set()
+        await session.openai_ws.send(json.dumps({
+            "type": "response.create",
+            "response": self.response_config,
+        }))
+
+    def metrics(self) -> dict:
+        return {**self.stats, "exposed": self.exposed, "cache": self.cache.metrics()}
+
+
+def _as_dict(value: Any) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+# -----------------------------------------------------------------------------
+# 既定エンジン（realtime.py から configure() で初期化）
+# -----------------------------------------------------------------------------
+
+engine: FunctionEngine | None = None
+
+
+def configure(
+    functions_path: str | Path,
+    cache: ResultCache,
+    response_config: dict,
+    respond: Callable[[Any], Awaitable[None]] | None = None,
+) -> FunctionEngine:
+    global engine
+    try:
+        tools = load_tools(functions_path)
+    except FileNotFoundError:
+        logger.warning("functions file not found: %s", functions_path)
+        tools = {}
+    engine = FunctionEngine(tools, cache, response_config, respond=respond)
+    inert = [name for name in tools if name not in engine.router]
+    if inert:
+        logger.info("🔧 no handler registered (not exposed to the model): %s", ", ".join(inert))
+    return engine
+
+
+@dispatcher.on("response.output_item.added")
+async def _on_output_item(session: Any, event: dict) -> None:
+    if engine is not None:
+        engine.note_item(event.get("item", {}))
+
+
+@dispatcher.on("response.function_call_arguments.done")
+async def _on_function_call(session: Any, event: dict) -> None:
+    if engine is not None:
+        engine.submit(session, event)
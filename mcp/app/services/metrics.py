@@ -0,0 +1,253 @@
+# mcp/app/services/metrics.py
+"""軽量メトリクス（Prometheus テキスト形式で /metrics に出力）
+----------------------------------------------------------------
+本番で常時有効にできるよう、記録側は bisect + 加算だけにしている。
+集計（累積バケット・分位点の推定）はスクレイプ時にのみ行う。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], _Metric] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        return type(self)(self.name, self.help)
+
+    def _series(self):
+        if self.labelnames:
+            return [(values, child) for values, child in self._children.items()]
+        return [((), self)]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._series():
+            lines += child._render_values(_fmt_labels(self.labelnames, values))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def _render_values(self, labels: str) -> list[str]:
+        return [f"{self.name}{labels} {self.value:g}"]
+
+    def summary(self):
+        if self.labelnames:
+            return {"/".join(v): c.value for v, c in self._children.items()}
+        return self.value
+
+
+class Gauge(Counter):
+    """set() するか、set_function() でスクレイプ時に値を取得する"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    def _render_values(self, labels: str) -> list[str]:
+        if self._fn is not None:
+            self.value = self._fn()
+        return super()._render_values(labels)
+
+    def summary(self):
+        if self._fn is not None:
+            self.value = self._fn()
+        return super().summary()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self):
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """バケット上限による分位点の推定（上側に丸める）"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def _render_values(self, labels: str) -> list[str]:
+        inner = labels[1:-1] + "," if labels else ""
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{{inner}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{{inner}le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum{labels} {self.sum:g}")
+        lines.append(f"{self.name}_count{labels} {self.count}")
+        return lines
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "p50": _json_bound(self.quantile(0.5)),
+            "p99": _json_bound(self.quantile(0.99)),
+        }
+
+
+def _json_bound(value: float | None) -> float | str | None:
+    """最上位バケットを超えた分位点は JSON に inf を書けないので Prometheus と同じ "+Inf" に"""
+    return "+Inf" if value == float("inf") else value
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        return {name: m.summary() for name, m in self._metrics.items()}
+
+
+# -----------------------------------------------------------------------------
+# リレーのメトリクス定義
+# -----------------------------------------------------------------------------
+
+REGISTRY = Registry()
+
+SESSIONS_ACTIVE = REGISTRY.gauge("relay_sessions_active", "Unity sessions currently relayed")
+SESSIONS_TOTAL = REGISTRY.counter("relay_sessions_total", "Unity sessions accepted")
+FRAMES = REGISTRY.counter("relay_frames_total", "Audio frames relayed", ("direction",))
+BYTES = REGISTRY.counter("relay_bytes_total", "Audio bytes relayed (client side)", ("direction",))
+DOWNLINK_QUEUED_BYTES = REGISTRY.gauge("relay_downlink_queued_bytes",
+                                       "Audio bytes waiting in downlink queues (all sessions)")
+
+UPSTREAM_CONNECT = REGISTRY.histogram("relay_upstream_connect_seconds",
+                                      "TCP/TLS + WebSocket handshake to the Realtime API")
+SESSION_CREATED_WAIT = REGISTRY.histogram("relay_session_created_wait_seconds",
+                                          "Connect to session.created")
+SESSION_UPDATED_WAIT = REGISTRY.histogram("relay_session_updated_wait_seconds",
+                                          "session.update to session.updated")
+UPSTREAM_CONNECT_RETRIES = REGISTRY.counter("relay_upstream_connect_retries_total",
+                                           "Upstream connects retried after 429/5xx", ("status",))
+SESSION_ACQUIRE = REGISTRY.histogram("relay_session_acquire_seconds",
+                                     "Admission to configured upstream session (pool or fresh)")
+
+SPEECH_END_TO_COMMIT = REGISTRY.histogram("relay_speech_end_to_commit_seconds",
+                                          "End of patient speech to input_audio_buffer.commit")
+COMMIT_TO_RESPONSE_CREATED = REGISTRY.histogram("relay_commit_to_response_created_seconds",
+                                                "response.create to response.created")
+COMMIT_TO_FIRST_AUDIO = REGISTRY.histogram("relay_commit_to_first_audio_seconds",
+                                           "response.create to first response.audio.delta")
+ONSET_TO_CANCEL = REGISTRY.histogram("relay_onset_to_cancel_seconds",
+                                     "Patient speech onset to response.cancel (barge-in)")
+CANCEL_TO_ACK = REGISTRY.histogram("relay_cancel_to_ack_seconds",
+                                   "response.cancel to cancelled response.done")
+
+ADMISSION_QUEUE = REGISTRY.gauge("relay_admission_queue", "Sessions waiting for admission")
+ADMISSION_WAIT = REGISTRY.histogram("relay_admission_wait_seconds",
+                                    "Time a new session waited in the admission queue",
+                                    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+ADMISSION_REJECTED = REGISTRY.counter("relay_admission_rejected_total",
+                                      "Sessions closed with 1013 (busy)", ("reason",))
+
+RESPONSE_CACHE = REGISTRY.counter("relay_response_cache_total",
+                                  "Response cache lookups by result (hit/miss/uncacheable/timeout/too_long)",
+                                  ("result",))
+
+TTS_SYNTHESIS = REGISTRY.histogram("relay_tts_synthesis_seconds",
+                                   "VOICEVOX audio_query + synthesis per sentence")
+TTS_FIRST_AUDIO = REGISTRY.histogram("relay_tts_first_audio_seconds",
+                                     "First text delta -> first synthesized audio (TTS_MODE=voicevox)")
+TTS_PHRASE_CACHE = REGISTRY.counter("relay_tts_phrase_cache_total",
+                                    "VOICEVOX phrase cache lookups", ("result",))
+
+LOG_DROPPED = REGISTRY.counter("relay_log_dropped_total", "Log records dropped (queue full)")
+
+LOOP_LAG = REGISTRY.histogram("relay_event_loop_lag_seconds", "Event loop scheduling delay",
+                              buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """sleep の遅れからイベントループの詰まりを測る（lifespan で起動）"""
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, time.monotonic() - start - interval))
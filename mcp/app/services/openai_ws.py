@@ -0,0 +1,370 @@
+# mcp/app/services/openai_ws.py
+"""Realtime API ヘルパー（接続・セッション初期化・事前接続プール）
+----------------------------------------------------------------
+- open_session(): 接続 → session.created 待ち → session.update → session.updated 待ち
+  * 429 / 5xx はバックオフ（Retry-After があればそれに従う）して再試行
+- UpstreamSessionPool: 設定済みセッションを N 本確保しておき、/ws/audio 受付時に即時に払い出す
+  * バックグラウンドで補充
+  * 最大寿命 (max_age) を超えたものは破棄
+  * 需要が idle_timeout 以上ないときはプールを空にする（アイドル失効）
+  * 定期的に ping してヘルスチェック
+- UpstreamParking: Unity 切断後も上流セッションをしばらく保持し、同じワーカーへの再接続で再利用
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Mapping
+
+import websockets
+from websockets.exceptions import InvalidStatusCode
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(Exception):
+    """Realtime API セッションの初期化に失敗（retry_after があれば混雑による失敗）"""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retryable(exc: InvalidStatusCode) -> bool:
+    return exc.status_code == 429 or exc.status_code >= 500
+
+
+def _retry_after(exc: InvalidStatusCode) -> float | None:
+    value = exc.headers.get("Retry-After") if exc.headers else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def connect_with_backoff(
+    url: str,
+    headers: Mapping[str, str],
+    *,
+    retries: int = 3,
+    backoff: float = 0.5,
+    max_backoff: float = 8.0,
+) -> websockets.WebSocketClientProtocol:
+    """429 / 5xx なら指数バックオフ + ジッターで再試行して接続する"""
+    for attempt in range(retries + 1):
+        try:
+            return await websockets.connect(
+                url,
+                extra_headers=list(headers.items()),
+                ping_interval=None,
+                ping_timeout=None,
+                close_timeout=10,
+            )
+        except InvalidStatusCode as exc:
+            if not _retryable(exc):
+                raise
+            metrics.UPSTREAM_CONNECT_RETRIES.labels(str(exc.status_code)).inc()
+            hinted = _retry_after(exc)
+            if attempt == retries:
+                raise UpstreamError(f"OpenAI WS status {exc.status_code} (retries exhausted)",
+                                    retry_after=hinted or max_backoff) from exc
+            if hinted is not None:
+                delay = hinted * random.uniform(1.0, 1.2)  # Retry-After より早くは再試行しない
+            else:
+                delay = min(max_backoff, backoff * 2 ** attempt) * random.uniform(0.8, 1.2)
+            logger.warning("⏳ OpenAI WS status %d, retry %d/%d in %.1fs",
+                           exc.status_code, attempt + 1, retries, delay)
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def expect_json(ws: websockets.WebSocketClientProtocol, typ: str, timeout: float):
+    try:
+        raw = await asyncio.wait_for(ws.recv(), timeout)
+        if isinstance(raw, str):
+            data = json.loads(raw)
+            if data.get("type") == typ:
+                return data
+    except asyncio.TimeoutError:
+        pass
+    return None
+
+
+async def safe_close(ws: websockets.WebSocketClientProtocol):
+    try:
+        await ws.close()
+    except Exception:
+        pass
+
+
+def is_open(ws: Any) -> bool:
+    state = getattr(ws, "state", None)
+    return getattr(state, "name", "OPEN") == "OPEN"
+
+
+async def open_session(
+    url: str,
+    headers: Mapping[str, str],
+    session_config: dict,
+    *,
+    created_timeout: float = 10,
+    updated_timeout: float = 5,
+    retries: int = 3,
+) -> websockets.WebSocketClientProtocol:
+    """接続してセッション設定まで済ませた WebSocket を返す"""
+    t0 = time.monotonic()
+    ws = await connect_with_backoff(url, headers, retries=retries)
+    t1 = time.monotonic()
+    metrics.UPSTREAM_CONNECT.observe(t1 - t0)
+    try:
+        # -- wait session.created ---------------------------------------------
+        created = await expect_json(ws, "session.created", created_timeout)
+        if created is None:
+            raise UpstreamError("session.created timeout")
+        t2 = time.monotonic()
+        metrics.SESSION_CREATED_WAIT.observe(t2 - t1)
+
+        # -- send session.update ----------------------------------------------
+        await ws.send(json.dumps({
+            "type": "session.update",
+            "session": session_config,
+        }))
+
+        # wait for session.updated
+        updated = await expect_json(ws, "session.updated", updated_timeout)
+        if updated is None:
+            logger.warning("session.updated not received within %.1fs", updated_timeout)
+        else:
+            metrics.SESSION_UPDATED_WAIT.observe(time.monotonic() - t2)
+    except BaseException:
+        await safe_close(ws)
+        raise
+    return ws
+
+
+class _Pooled:
+    __slots__ = ("ws", "created_at")
+
+    def __init__(self, ws: Any) -> None:
+        self.ws = ws
+        self.created_at = time.monotonic()
+
+
+class UpstreamSessionPool:
+    """設定済み Realtime セッションの事前接続プール"""
+
+    def __init__(
+        self,
+        opener: Callable[[], Awaitable[Any]],
+        size: int,
+        *,
+        max_age: float = 600.0,
+        idle_timeout: float = 300.0,
+        health_interval: float = 15.0,
+        ping_timeout: float = 5.0,
+    ) -> None:
+        self._opener = opener
+        self.size = size
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.ping_timeout = ping_timeout
+
+        self._ready: deque[_Pooled] = deque()
+        self._filling = 0
+        self._last_demand = time.monotonic()
+        self._refill_task: asyncio.Task | None = None
+        self._health_task: asyncio.Task | None = None
+        self._closed = True
+        self.stats = {
+            "hits": 0,         # プールから払い出し
+            "misses": 0,       # プールが空で都度接続
+            "opened": 0,
+            "open_failures": 0,
+            "expired": 0,      # max_age 超過
+            "unhealthy": 0,    # ping 失敗・切断
+            "drained": 0,      # アイドル失効で破棄
+        }
+
+    # ------------------------------------------------------------------ lifecycle
+
+    async def start(self) -> None:
+        if self.size <= 0 or not self._closed:
+            return
+        self._closed = False
+        self._last_demand = time.monotonic()
+        self._kick_refill()
+        self._health_task = asyncio.create_task(self._health_loop())
+        logger.info("🏊 upstream pool started (size=%d)", self.size)
+
+    async def stop(self) -> None:
+        self._closed = True
+        for task in (self._refill_task, self._health_task):
+            if task is not None:
+                task.cancel()
+        while self._ready:
+            await safe_close(self._ready.popleft().ws)
+
+    # ------------------------------------------------------------------ acquire
+
+    async def acquire(self) -> Any:
+        """設定済みセッションを1本取り出す（空なら都度接続）"""
+        self._last_demand = time.monotonic()
+        while self._ready:
+            pooled = self._ready.popleft()
+            if self._usable(pooled):
+                self.stats["hits"] += 1
+                self._kick_refill()
+                return pooled.ws
+            await safe_close(pooled.ws)
+        self.stats["misses"] += 1
+        self._kick_refill()
+        return await self._opener()
+
+    def metrics(self) -> dict:
+        return {
+            "target": self.size,
+            "ready": len(self._ready),
+            "filling": self._filling,
+            **self.stats,
+        }
+
+    # ------------------------------------------------------------------ internals
+
+    def _usable(self, pooled: _Pooled) -> bool:
+        if not is_open(pooled.ws):
+            self.stats["unhealthy"] += 1
+            return False
+        if time.monotonic() - pooled.created_at > self.max_age:
+            self.stats["expired"] += 1
+            return False
+        return True
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self._last_demand > self.idle_timeout
+
+    def _kick_refill(self) -> None:
+        if self._closed or (self._refill_task is not None and not self._refill_task.done()):
+            return
+        self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        backoff = 1.0
+        while not self._closed and not self._idle() and len(self._ready) < self.size:
+            self._filling = 1
+            try:
+                ws = await self._opener()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self.stats["open_failures"] += 1
+                logger.warning("pool refill failed: %s (retry in %.0fs)", exc, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            finally:
+                self._filling = 0
+            backoff = 1.0
+            self.stats["opened"] += 1
+            if self._closed:
+                await safe_close(ws)
+                return
+            self._ready.append(_Pooled(ws))
+
+    async def _health_loop(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self._check()
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                logger.exception("pool health check failed")
+
+    async def _check(self) -> None:
+        if self._idle():
+            while self._ready:
+                self.stats["drained"] += 1
+                await safe_close(self._ready.popleft().ws)
+            return
+        # 払い出しと並行しても良いようにスナップショットを走査する
+        for pooled in list(self._ready):
+            if self._usable(pooled) and await self._ping(pooled.ws):
+                continue
+            try:
+                self._ready.remove(pooled)
+            except ValueError:
+                continue  # チェック中に払い出し済み
+            await safe_close(pooled.ws)
+        self._kick_refill()
+
+    async def _ping(self, ws: Any) -> bool:
+        try:
+            waiter = await ws.ping()
+            await asyncio.wait_for(waiter, self.ping_timeout)
+            return True
+        except Exception:  # noqa: BLE001
+            self.stats["unhealthy"] += 1
+            return False
+
+
+class UpstreamParking:
+    """切断したクライアントの上流セッションを keepalive 秒だけ保持する（セッションID単位）"""
+
+    def __init__(self, keepalive: float) -> None:
+        self.keepalive = keepalive
+        self._parked: dict[str, tuple[Any, asyncio.TimerHandle]] = {}
+        self.stats = {"parked": 0, "reattached": 0, "expired": 0}
+
+    def __len__(self) -> int:
+        return len(self._parked)
+
+    def park(self, session_id: str, ws: Any) -> bool:
+        if self.keepalive <= 0 or not is_open(ws):
+            return False
+        self._release(session_id)
+        handle = asyncio.get_running_loop().call_later(self.keepalive, self._expire, session_id)
+        self._parked[session_id] = (ws, handle)
+        self.stats["parked"] += 1
+        return True
+
+    def has(self, session_id: str) -> bool:
+        return session_id in self._parked
+
+    def take(self, session_id: str) -> Any | None:
+        entry = self._parked.pop(session_id, None)
+        if entry is None:
+            return None
+        ws, handle = entry
+        handle.cancel()
+        if not is_open(ws):
+            return None
+        self.stats["reattached"] += 1
+        return ws
+
+    def _expire(self, session_id: str) -> None:
+        if session_id in self._parked:
+            self.stats["expired"] += 1
+            self._release(session_id)
+
+    def _release(self, session_id: str) -> None:
+        entry = self._parked.pop(session_id, None)
+        if entry is not None:
+            entry[1].cancel()
+            asyncio.create_task(safe_close(entry[0]))
+
+    async def close(self) -> None:
+        for session_id in list(self._parked):
+            ws, handle = self._parked.pop(session_id)
+            handle.cancel()
+            await safe_close(ws)
+
+    def metrics(self) -> dict:
+        return {"keepalive": self.keepalive, "held": len(self._parked), **self.stats}
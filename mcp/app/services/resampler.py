@@ -0,0 +1,81 @@
+# mcp/app/services/resampler.py
+"""ストリーミング用ポリフェーズリサンプラ（PCM16 mono）
+----------------------------------------------------------------
+- 有理数比 L/M（例: 16kHz→24kHz は 3/2）のポリフェーズFIR
+- チャンク境界をまたいでフィルタ状態（直近の入力サンプル）を保持
+- 入力チャンクごとに出力を即時に返す（追加遅延はフィルタの群遅延のみ）
+"""
+
+from __future__ import annotations
+
+from math import gcd
+
+import numpy as np
+
+TAPS_PER_PHASE = 16
+
+
+def design_lowpass(up: int, down: int, taps_per_phase: int = TAPS_PER_PHASE) -> np.ndarray:
+    """カイザー窓付きsincのプロトタイプLPFを (up, taps_per_phase) のフェーズ行列で返す"""
+    n_taps = up * taps_per_phase
+    cutoff = 0.5 / max(up, down) * 0.9  # アップサンプル後の正規化周波数
+    n = np.arange(n_taps) - (n_taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(n_taps, 6.0)
+    h *= up / h.sum()  # ゼロ挿入ぶんのゲイン補正
+    # phases[p, k] = h[p + k*up]
+    return h.reshape(taps_per_phase, up).T.astype(np.float32).copy()
+
+
+class StreamingResampler:
+    """チャンク単位で呼び出せるステートフルなリサンプラ"""
+
+    def __init__(self, src_rate: int, dst_rate: int, taps_per_phase: int = TAPS_PER_PHASE) -> None:
+        g = gcd(src_rate, dst_rate)
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.up = dst_rate // g
+        self.down = src_rate // g
+        self.passthrough = self.up == self.down
+        self._k = taps_per_phase
+        self._phases = design_lowpass(self.up, self.down, taps_per_phase)
+        self._taps = np.arange(taps_per_phase)
+        self.reset()
+
+    @property
+    def delay_ms(self) -> float:
+        """フィルタの群遅延（ミリ秒）"""
+        if self.passthrough:
+            return 0.0
+        return (self.up * self._k - 1) / 2 / (self.src_rate * self.up) * 1000
+
+    def reset(self) -> None:
+        self._history = np.zeros(self._k - 1, dtype=np.float32)
+        # 次の出力サンプルのアップサンプル領域での位置（バッファ先頭基準）
+        self._t = (self._k - 1) * self.up
+
+    def process(self, pcm: bytes | bytearray | memoryview) -> bytes:
+        """PCM16チャンクを変換して返す（出力長は入力に応じて前後する）"""
+        if self.passthrough:
+            return bytes(pcm)
+        x = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+        if x.size == 0:
+            return b""
+
+        buf = np.concatenate((self._history, x.astype(np.float32)))
+        end = buf.size * self.up
+        positions = np.arange(self._t, end, self.down)
+        if positions.size:
+            base = positions // self.up
+            phase = positions - base * self.up
+            windows = buf[base[:, None] - self._taps]
+            y = np.einsum("ij,ij->i", windows, self._phases[phase])
+            out = np.clip(np.rint(y), -32768, 32767).astype("<i2").tobytes()
+            next_t = int(positions[-1]) + self.down
+        else:
+            out = b""
+            next_t = self._t
+
+        keep = self._k - 1
+        self._t = next_t - (buf.size - keep) * self.up
+        self._history = buf[buf.size - keep:].copy()
+        return out
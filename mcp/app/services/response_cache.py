@@ -0,0 +1,285 @@
+# mcp/app/services/response_cache.py
+"""定型応答キャッシュ（あいさつ・受付時間など、承認済みの応答文の音声を再利用）
+----------------------------------------------------------------
+- 対象: 許可リストにある発話だけ。許可リストには発話ごとに承認済みの応答文（answer）を書く。
+  モデルが生成した応答は保存しない（医療内容を含みうるため）。許可リストの発話への応答は
+  承認済みの応答文をそのまま読み上げさせ、その音声を保存・再生する
+- キー: 正規化した患者の発話（文字起こし）+ 承認済みの応答文 + instructions + voice + 音声フォーマット
+- 値  : 承認済みの応答文と、それを読み上げた音声（Realtime API から届いたままのバイト列）
+  読み上げの文字起こしが応答文と一致しないとき（言い換え・付け足し）は保存しない
+- 保存: 音声は1エントリ1ファイルでディスクに書き、読み出しは mmap
+  （ページキャッシュを共有するのでワーカーが複数でもメモリを二重に持たない）
+  index.json にメタデータを保存し、再起動後も使える
+- ファイルの書き込み・削除と index.json の書き換えは書き込みスレッドで行う
+  （response.done のハンドラから呼ばれるのでイベントループを止めない）。
+  書き込みが終わるまでのエントリはメモリ上の音声を返す
+- 容量: 音声の合計バイト数の上限を超えたら LRU で削除
+- TTL: エントリごとに指定可（省略時は既定の TTL）
+- 文字起こしを待つのは may_match() が True のターンだけ（発話長が許可リストの最長の
+  発話 × ms_per_char 以下のとき。長い発話は待たずに応答を依頼する）
+
+許可リスト（JSON。answer のないエントリは読み込まない）:
+
+    [{"utterance": "こんにちは", "answer": "こんにちは。今日はどうされましたか？", "ttl": 604800}]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from .cache import make_key, normalize_text
+
+logger = logging.getLogger(__name__)
+
+_PUNCT = re.compile(r"[\s、。，．,.!?！？…・「」『』（）()]+")
+_INDEX = "index.json"
+
+
+def normalize_utterance(text: str) -> str:
+    """文字起こしの揺れ（句読点・空白・全半角・大小文字）を吸収する"""
+    return _PUNCT.sub("", normalize_text(text))
+
+
+class Approved(NamedTuple):
+    answer: str          # 承認済みの応答文
+    ttl: float | None    # 秒（None なら既定）
+
+
+def load_allowlist(path: str | Path) -> dict[str, Approved]:
+    """許可リスト JSON → {正規化した発話: Approved}"""
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    allowlist = {}
+    for e in entries:
+        if not e.get("answer"):
+            logger.warning("response cache allowlist entry without answer skipped: %s", e.get("utterance"))
+            continue
+        allowlist[normalize_utterance(e["utterance"])] = Approved(e["answer"], e.get("ttl"))
+    return allowlist
+
+
+class CachedResponse(NamedTuple):
+    answer: str          # 承認済みの応答文（会話履歴に入れる）
+    audio: memoryview    # 応答音声（mmap 上のビュー）
+
+
+class _Entry:
+    __slots__ = ("file", "answer", "size", "expires", "data", "_mm")
+
+    def __init__(self, file: str, answer: str, size: int, expires: float,
+                 data: bytes | None = None) -> None:
+        self.file = file
+        self.answer = answer
+        self.size = size
+        self.expires = expires   # time.time()（再起動をまたぐので壁時計）
+        self.data = data         # ディスクに書き終わるまでの音声（書き込みスレッドが None にする）
+        self._mm: mmap.mmap | None = None
+
+    def view(self, directory: Path) -> memoryview:
+        data = self.data
+        if data is not None:
+            return memoryview(data)
+        if self._mm is None:
+            with open(directory / self.file, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mm)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # 再生中のビューが残っている（GC に任せる）
+            self._mm = None
+
+    def to_json(self) -> dict:
+        return {"file": self.file, "answer": self.answer, "size": self.size, "expires": self.expires}
+
+
+class ResponseCache:
+    """ディスク永続化 + mmap 読み出しの LRU 応答キャッシュ"""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 200_000_000,
+        ttl: float = 86400.0,
+        allowlist: dict[str, Approved] | None = None,
+        ms_per_char: float = 250.0,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.allowlist = allowlist or {}
+        # 許可リストの発話として読み上げうる最長の発話長（ゆっくり話しても収まる目安）
+        self.max_speech_ms = max(map(len, self.allowlist), default=0) * ms_per_char
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "uncacheable": 0,
+                      "mismatched": 0, "write_errors": 0}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._index_pending = False
+        self._thread = threading.Thread(target=self._run, name="response-cache", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------ policy
+
+    def key(self, transcript: str, instructions: str, voice: str, audio_format: str) -> str | None:
+        """許可リストの発話ならキーを返す（それ以外は None）"""
+        utterance = normalize_utterance(transcript)
+        if utterance not in self.allowlist:
+            self.stats["uncacheable"] += 1
+            return None
+        return make_key("response", {
+            "utterance": utterance,
+            "answer": self.allowlist[utterance].answer,
+            "instructions": instructions,
+            "voice": voice,
+            "format": audio_format,
+        })
+
+    def may_match(self, speech_ms: float) -> bool:
+        """この長さの発話がキャッシュ対象になりうるか（文字起こしを待つ価値があるか）"""
+        return speech_ms <= self.max_speech_ms
+
+    def approved_answer(self, key: str) -> str:
+        """キーに対応する承認済みの応答文（キャッシュにないとき、これを読み上げさせる）"""
+        return json.loads(key.split(":", 1)[1])["answer"]
+
+    def _ttl_for(self, key: str) -> float:
+        utterance = json.loads(key.split(":", 1)[1])["utterance"]
+        approved = self.allowlist.get(utterance)
+        return self.ttl if approved is None or approved.ttl is None else float(approved.ttl)
+
+    # ------------------------------------------------------------------ access
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires < time.time():
+            if entry is not None:
+                self._remove(key)
+                self._save_index()
+            self.stats["misses"] += 1
+            return None
+        try:
+            audio = entry.view(self.directory)
+        except (OSError, ValueError) as exc:
+            logger.warning("response cache file unreadable (%s): %s", entry.file, exc)
+            self._remove(key)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return CachedResponse(entry.answer, audio)
+
+    def put(self, key: str, transcript: str, audio: bytes) -> None:
+        """読み上げた音声を保存（transcript が承認済みの応答文と一致するときだけ）"""
+        if not audio or len(audio) > self.max_bytes:
+            return
+        answer = self.approved_answer(key)
+        if normalize_utterance(transcript) != normalize_utterance(answer):
+            self.stats["mismatched"] += 1
+            logger.warning("response cache: read-aloud differs from approved answer, not stored")
+            return
+        if key in self._entries:
+            self._remove(key)
+        file = hashlib.sha256(key.encode()).hexdigest()[:32] + ".audio"
+        entry = _Entry(file, answer, len(audio), time.time() + self._ttl_for(key), audio)
+        self._entries[key] = entry
+        self._queue.put(("write", entry))
+        self._bytes += len(audio)
+        self.stats["stored"] += 1
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.stats["evicted"] += 1
+        self._save_index()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        entry.close()
+        self._queue.put(("unlink", entry.file))
+
+    # ------------------------------------------------------------------ persistence
+
+    def _load(self) -> None:
+        try:
+            index = json.loads((self.directory / _INDEX).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("response cache index unreadable: %s", exc)
+            return
+        now = time.time()
+        for key, data in index.items():  # 保存順 = LRU 順
+            entry = _Entry(data["file"], data["answer"], data["size"], data["expires"])
+            if entry.expires < now or not (self.directory / entry.file).exists():
+                continue
+            self._entries[key] = entry
+            self._bytes += entry.size
+        logger.info("💾 response cache loaded: %d entries, %d bytes", len(self._entries), self._bytes)
+
+    def _save_index(self) -> None:
+        """index.json の書き換えを依頼（まだ書いていなければ1回にまとめる）"""
+        if not self._index_pending:
+            self._index_pending = True
+            self._queue.put(("index", None))
+
+    # ------------------------------------------------------------------ writer thread
+
+    def _run(self) -> None:
+        while True:
+            op, arg = self._queue.get()
+            if op == "stop":
+                return
+            try:
+                if op == "write":
+                    self._write_audio(arg)
+                elif op == "unlink":
+                    (self.directory / arg).unlink(missing_ok=True)
+                elif op == "index":
+                    self._write_index()
+            except OSError as exc:
+                self.stats["write_errors"] += 1
+                logger.warning("response cache write failed (%s): %s", op, exc)
+
+    def _write_audio(self, entry: _Entry) -> None:
+        tmp = self.directory / (entry.file + ".tmp")
+        tmp.write_bytes(entry.data)
+        os.replace(tmp, self.directory / entry.file)
+        entry.data = None  # 以降は mmap で読む
+
+    def _write_index(self) -> None:
+        self._index_pending = False  # 以降の変更は次の書き換えで
+        snapshot = {k: e.to_json() for k, e in list(self._entries.items())}
+        tmp = self.directory / (_INDEX + ".tmp")
+        tmp.write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.directory / _INDEX)
+
+    def close(self) -> None:
+        """書き込み待ちを書き出してスレッドを止める（lifespan の終了時）"""
+        self._queue.put(("stop", None))
+        self._thread.join(timeout=10)
+        for entry in self._entries.values():
+            entry.close()
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "allowlist": len(self.allowlist),
+        }
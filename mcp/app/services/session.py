@@ -0,0 +1,74 @@
+# mcp/app/services/session.py
+"""1接続分のリレー状態（Unity ⇆ OpenAI）
+
+上り/下りタスクとイベントハンドラで共有する状態をまとめる。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from .audio_pipeline import AudioPipeline
+from .audio_queue import OutboundAudioQueue
+from .session_recorder import SessionTape
+from .session_registry import SessionRecord
+from .tts import SpeechStream
+from .turn_manager import TurnManager
+
+
+class ResponseRecording:
+    """キャッシュに保存するため、1つの応答の音声とテキストを集める"""
+
+    __slots__ = ("key", "response_id", "audio", "text")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.response_id = ""          # response.created で確定
+        self.audio = bytearray()       # Realtime API から届いたままの音声
+        self.text: list[str] = []      # response.audio_transcript.delta
+
+
+class RelaySession:
+    """/ws/audio 1接続分の共有状態"""
+
+    def __init__(
+        self,
+        unity_ws: Any,
+        openai_ws: Any,
+        pipeline: AudioPipeline,
+        queue_config: dict | None = None,
+        turn_config: dict | None = None,
+    ) -> None:
+        self.unity_ws = unity_ws
+        self.openai_ws = openai_ws
+        self.pipeline = pipeline
+        self.audio_out = OutboundAudioQueue(
+            unity_ws.send_bytes,
+            pipeline.client.output_rate,
+            sample_width=pipeline.output_codec.sample_width,
+            **(queue_config or {}),
+        )
+        self.turns = TurnManager(**(turn_config or {}))
+        self.assistant_speaking = asyncio.Event()
+        self.response_in_progress = asyncio.Event()  # 応答生成中フラグ
+        self.response_id = ""                          # 生成中・音声を受信中の応答（response.created で確定）
+        self.cancelled_responses: set[str] = set()     # バージインで打ち切った応答
+        self.cancel_before_created = False             # response.created より前にバージインした
+        # ターンごとの計測用タイムスタンプ（time.monotonic）
+        self.response_requested_at = 0.0                  # response.create 送信
+        self.created_pending = False                      # response.created を待っている
+        self.first_audio_pending = False                  # 最初の音声deltaを待っている
+        self.cancel_sent_at: float | None = None          # response.cancel 送信
+        self.response_task: asyncio.Task | None = None    # レート制限で待っている response.create
+        # 定型応答キャッシュ
+        self.transcript_wait: asyncio.Task | None = None  # 文字起こし待ち（response.create を保留中）
+        self.recording: ResponseRecording | None = None   # キャッシュ対象の応答を記録中
+        self.cached_items: set[str] = set()               # truncate できない item（キャッシュ再生・VOICEVOX）
+        self.record: SessionRecord | None = None          # セッションレジストリのレコード
+        self.tape: SessionTape | None = None              # セッション録音（SESSION_RECORD）
+        self.speech: SpeechStream | None = None           # VOICEVOX の文単位合成（TTS_MODE=voicevox）
+
+    @property
+    def id(self) -> int:
+        return id(self.unity_ws)
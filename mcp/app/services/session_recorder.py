@@ -0,0 +1,269 @@
+# mcp/app/services/session_recorder.py
+"""セッション録音（実セッションを後から再生・解析するため）
+----------------------------------------------------------------
+- 1接続ごとに SessionTape を開き、次を時刻付きで記録する
+    UPLINK   : Unity から届いた音声（変換前のバイト列そのまま）
+    DOWNLINK : Realtime API から届いたイベント（音声 delta を含む JSON 文字列）
+    UPSTREAM : リレーが Realtime API に送ったイベント（input_audio_buffer.append を除く）
+- 記録はイベントループ上ではバッファに詰めるだけで、ファイルへの書き込みは
+  SessionRecorder の書き込みスレッドが行う。書き込みが追いつかなければ捨てて数える
+- ファイル形式（追記のみ・リトルエンディアン）:
+    MAGIC (8 bytes) | record* 、record = kind u8 | t f64（接続からの秒） | length u32 | payload
+  各ファイルの先頭の record は META（JSON: session_id・クエリ・音声フォーマット等）
+- ローテーション: 1ファイルが max_file_bytes を超えたら次のセグメント（<name>.001.mcprec, ...）
+  ディレクトリの合計が max_total_bytes を超えたら古いファイルから削除
+
+benchmarks/replay.py が read_tape() で読み、リレーに流し直す。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import random
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MCPREC1\n"
+META, UPLINK, DOWNLINK, UPSTREAM = range(4)
+_HEADER = struct.Struct("<BdI")
+_SUFFIX = ".mcprec"
+_APPEND_PREFIX = '{"type": "input_audio_buffer.append"'  # realtime.py の json.dumps 出力
+
+
+class TapeRecord(NamedTuple):
+    kind: int
+    t: float          # 接続からの秒
+    payload: bytes
+
+    @property
+    def text(self) -> str:
+        return self.payload.decode("utf-8")
+
+
+def _pack(kind: int, t: float, payload: bytes) -> bytes:
+    return _HEADER.pack(kind, t, len(payload)) + payload
+
+
+class SessionTape:
+    """1接続分の記録。イベントループ側ではバッファに詰め、flush_bytes ごとに書き込みスレッドへ渡す"""
+
+    def __init__(self, recorder: "SessionRecorder", name: str, meta: dict) -> None:
+        self._recorder = recorder
+        self.name = name
+        self._t0 = time.perf_counter()
+        self._buf = bytearray()
+        self.closed = False
+        self.header = MAGIC + _pack(META, 0.0, json.dumps(meta, ensure_ascii=False).encode())
+        # 以下は書き込みスレッドだけが触る
+        self.file: Any = None
+        self.segment = 0
+        self.file_bytes = 0
+
+    def _add(self, kind: int, payload: bytes) -> None:
+        if self.closed:
+            return
+        self._buf += _HEADER.pack(kind, time.perf_counter() - self._t0, len(payload))
+        self._buf += payload
+        if len(self._buf) >= self._recorder.flush_bytes:
+            self.flush()
+
+    def uplink(self, data: bytes) -> None:
+        self._add(UPLINK, data)
+
+    def downlink(self, event: str) -> None:
+        self._add(DOWNLINK, event.encode("utf-8"))
+
+    def upstream(self, event: str) -> None:
+        self._add(UPSTREAM, event.encode("utf-8"))
+
+    def flush(self) -> None:
+        if self._buf:
+            self._recorder._submit(self, bytes(self._buf))
+            self._buf.clear()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.flush()
+            self.closed = True
+            self._recorder._submit(self, None)
+
+
+class TapedUpstream:
+    """上流 WebSocket のラッパー: 送受信したイベントをテープに記録する
+
+    input_audio_buffer.append は記録しない（上りは SessionTape.uplink() で変換前の音声を記録する）。
+    それ以外の属性（close, state 等）は元の WebSocket に委譲する。
+    """
+
+    def __init__(self, ws: Any, tape: SessionTape) -> None:
+        self._ws = ws
+        self.tape = tape
+
+    async def send(self, message: str | bytes) -> None:
+        if isinstance(message, str) and not message.startswith(_APPEND_PREFIX):
+            self.tape.upstream(message)
+        await self._ws.send(message)
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        async for message in self._ws:
+            if isinstance(message, str):
+                self.tape.downlink(message)
+            yield message
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._ws, name)
+
+
+class SessionRecorder:
+    """テープの書き込みスレッド・ローテーション・容量管理"""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        sample_rate: float = 1.0,
+        max_file_bytes: int = 64_000_000,
+        max_total_bytes: int = 2_000_000_000,
+        flush_bytes: int = 64 * 1024,
+        max_pending_bytes: int = 32_000_000,
+    ) -> None:
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.flush_bytes = flush_bytes
+        self.max_pending_bytes = max_pending_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._open: set[SessionTape] = set()
+        self.stats = {"tapes": 0, "written_bytes": 0, "dropped_bytes": 0, "files": 0,
+                      "deleted_files": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+
+    def open(self, session_id: str, meta: dict) -> SessionTape | None:
+        """録音対象（sample_rate で間引く）ならテープを開く"""
+        if random.random() >= self.sample_rate:
+            return None
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        name = f"{stamp}-{session_id}-{random.getrandbits(16):04x}"
+        tape = SessionTape(self, name, {"session_id": session_id, "started_at": time.time(), **meta})
+        self.stats["tapes"] += 1
+        return tape
+
+    # ------------------------------------------------------------------ writer thread
+
+    def _submit(self, tape: SessionTape, data: bytes | None) -> None:
+        if data is not None:
+            with self._lock:
+                if self._pending + len(data) > self.max_pending_bytes:
+                    self.stats["dropped_bytes"] += len(data)
+                    return
+                self._pending += len(data)
+        self._queue.put((tape, data))
+
+    def _run(self) -> None:
+        while True:
+            tape, data = self._queue.get()
+            if tape is None:
+                return
+            try:
+                if data is None:
+                    self._close_file(tape)
+                else:
+                    self._write(tape, data)
+            except OSError as exc:
+                self.stats["errors"] += 1
+                logger.warning("session recorder write failed (%s): %s", tape.name, exc)
+            finally:
+                if data is not None:
+                    with self._lock:
+                        self._pending -= len(data)
+
+    def _write(self, tape: SessionTape, data: bytes) -> None:
+        if tape.file is not None and tape.file_bytes >= self.max_file_bytes:
+            self._close_file(tape)
+            tape.segment += 1
+        if tape.file is None:
+            path = self.directory / f"{tape.name}.{tape.segment:03d}{_SUFFIX}"
+            tape.file = open(path, "ab")
+            tape.file.write(tape.header)
+            tape.file_bytes = len(tape.header)
+            self._open.add(tape)
+            self.stats["files"] += 1
+        tape.file.write(data)
+        tape.file_bytes += len(data)
+        self.stats["written_bytes"] += len(data)
+
+    def _close_file(self, tape: SessionTape) -> None:
+        if tape.file is None:
+            return
+        tape.file.close()
+        tape.file = None
+        self._open.discard(tape)
+        self._enforce_total()
+
+    def _enforce_total(self) -> None:
+        """合計サイズが上限を超えたら古いファイルから削除（書き込み中のファイルは残す）"""
+        active = {tape.file.name for tape in self._open if tape.file is not None}
+        files = sorted((p.stat().st_mtime, p) for p in self.directory.glob(f"*{_SUFFIX}"))
+        total = sum(p.stat().st_size for _, p in files)
+        for _, path in files:
+            if total <= self.max_total_bytes:
+                break
+            if str(path) in active:
+                continue
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            self.stats["deleted_files"] += 1
+
+    def close(self) -> None:
+        """書き込み待ちを書き出してスレッドを止める（lifespan の終了時）"""
+        self._queue.put((None, None))
+        self._thread.join(timeout=10)
+        for tape in list(self._open):
+            self._close_file(tape)
+
+    def metrics(self) -> dict:
+        return {**self.stats, "recording": len(self._open), "pending_bytes": self._pending}
+
+
+# -----------------------------------------------------------------------------
+# 読み出し（benchmarks/replay.py 用）
+# -----------------------------------------------------------------------------
+
+def tape_segments(path: str | Path) -> list[Path]:
+    """1つのセグメントのパスから、同じ接続の全セグメントを順に返す"""
+    path = Path(path)
+    base = path.name[:-len(_SUFFIX)].rsplit(".", 1)[0]
+    return sorted(path.parent.glob(f"{base}.[0-9][0-9][0-9]{_SUFFIX}"))
+
+
+def read_tape(path: str | Path) -> Iterator[TapeRecord]:
+    """全セグメントを続けて読む（META は最初の1件だけ。末尾の書きかけ record は無視）"""
+    for index, segment in enumerate(tape_segments(path)):
+        with open(segment, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"not a session tape: {segment}")
+        pos = len(MAGIC)
+        while pos + _HEADER.size <= len(data):
+            kind, t, length = _HEADER.unpack_from(data, pos)
+            pos += _HEADER.size
+            if pos + length > len(data):
+                break
+            if kind != META or index == 0:
+                yield TapeRecord(kind, t, data[pos:pos + length])
+            pos += length
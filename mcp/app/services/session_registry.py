@@ -0,0 +1,285 @@
+# mcp/app/services/session_registry.py
+"""セッションレジストリ（再接続時の再開・ワーカー間の振り分け用）
+----------------------------------------------------------------
+- SessionRecord: セッションID・上流の会話 item ID・ターン状態・会話の要約（直近のターン。
+  文字起こしを含むので、呼び出し側が明示的に許可したときだけ add_turn する）
+- セッションID と再開トークンはサーバーが発行する（new_session_id / new_resume_token）。
+  再開・照会には両方が必要で、レコードにはトークンのハッシュだけを保存する
+- SessionRegistry: レコードを Redis（なければ MemoryStore）に TTL 付きで保存
+  * 再接続したクライアントはどのワーカーでも load() で状態を取り戻せる
+  * 元のワーカーなら切断後も保持していた上流セッションに再接続（openai_ws.UpstreamParking）、
+    それ以外のワーカーでは要約（保存していれば）を conversation.item.create で再生して会話を再構築
+- ノード負荷: 各ワーカーが report_load() で定期的に書き込み、nodes() で一覧
+  （フロントエンドは負荷の低いワーカーに新規セッションを振る）
+
+Redis クライアントは redis.asyncio 互換なら何でもよい（fakeredis も可）。
+MemoryStore は同じインターフェースのプロセス内実装（単一ワーカー・開発用）。
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import time
+import uuid
+from typing import Any, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def valid_session_id(value: str) -> bool:
+    return bool(_SESSION_ID.match(value))
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def new_resume_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class ResumeRejected(Exception):
+    """発行済みのセッションだが再開トークンが一致しない"""
+
+
+class MemoryStore:
+    """redis.asyncio のうちレジストリが使う部分だけを持つプロセス内ストア"""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float | None, str]] = {}
+
+    def _alive(self, key: str) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        if entry[0] is not None and entry[0] < time.monotonic():
+            del self._data[key]
+            return False
+        return True
+
+    async def get(self, key: str) -> str | None:
+        return self._data[key][1] if self._alive(key) else None
+
+    async def set(self, key: str, value: str, ex: float | None = None) -> bool:
+        self._data[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(k, None) is not None for k in keys)
+
+    async def scan_iter(self, match: str = "*") -> AsyncIterator[str]:
+        for key in list(self._data):
+            if fnmatch.fnmatchcase(key, match) and self._alive(key):
+                yield key
+
+
+class SessionRecord:
+    """1患者セッションの再開に必要な状態"""
+
+    __slots__ = ("session_id", "token_hash", "node_id", "generation", "status", "created_at",
+                 "updated_at", "items", "turns", "state", "metadata")
+
+    MAX_ITEMS = 64
+    MAX_TURN_CHARS = 500
+
+    def __init__(self, session_id: str, node_id: str = "") -> None:
+        self.session_id = session_id
+        self.token_hash = ""               # 再開トークンの SHA-256
+        self.node_id = node_id             # 最後に接続していたワーカー
+        self.generation = 0                # 接続（アタッチ）ごとに +1
+        self.status = "active"             # active / detached
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.items: list[str] = []         # 上流の会話 item ID（新しい順に MAX_ITEMS 件）
+        self.turns: list[list[str]] = []   # [role, text]（要約として再生する）
+        self.state: dict[str, Any] = {}    # ターン状態（応答中か等）
+        self.metadata: dict[str, Any] = {} # 音声フォーマットなど
+
+    def check_token(self, token: str) -> bool:
+        return bool(self.token_hash) and hmac.compare_digest(self.token_hash, _hash_token(token))
+
+    def add_item(self, item_id: str) -> None:
+        if item_id and item_id not in self.items:
+            self.items.append(item_id)
+            del self.items[:-self.MAX_ITEMS]
+
+    def add_turn(self, role: str, text: str, max_turns: int) -> None:
+        text = text.strip()
+        if text:
+            self.turns.append([role, text[:self.MAX_TURN_CHARS]])
+            del self.turns[:-max_turns]
+
+    def to_json(self) -> str:
+        return json.dumps({k: getattr(self, k) for k in self.__slots__}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "SessionRecord":
+        data = json.loads(raw)
+        record = cls(data["session_id"])
+        for key in cls.__slots__:
+            if key in data:
+                setattr(record, key, data[key])
+        return record
+
+
+class SessionRegistry:
+    def __init__(
+        self,
+        client: Any,
+        node_id: str,
+        *,
+        ttl: float = 600.0,
+        max_turns: int = 20,
+        prefix: str = "mcp:",
+    ) -> None:
+        self.client = client
+        self.node_id = node_id
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.prefix = prefix
+        self.stats = {"created": 0, "resumed": 0, "rejected": 0, "errors": 0}
+
+    @classmethod
+    def from_url(cls, url: str | None, node_id: str, **kwargs) -> "SessionRegistry":
+        if url:
+            import redis.asyncio as aioredis
+            client = aioredis.from_url(url, decode_responses=True)
+        else:
+            client = MemoryStore()
+        return cls(client, node_id, **kwargs)
+
+    @property
+    def backend(self) -> str:
+        return "memory" if isinstance(self.client, MemoryStore) else "redis"
+
+    # ------------------------------------------------------------------ sessions
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    async def load(self, session_id: str) -> SessionRecord | None:
+        try:
+            raw = await self.client.get(self._key(session_id))
+        except Exception as exc:  # noqa: BLE001
+            self.stats["errors"] += 1
+            logger.warning("registry load failed: %s", exc)
+            return None
+        return SessionRecord.from_json(raw) if raw else None
+
+    async def verify(self, session_id: str, token: str) -> SessionRecord | None:
+        """再開トークンが一致する既存のセッション（期限切れ・不一致は None）"""
+        record = await self.load(session_id) if valid_session_id(session_id) else None
+        if record is None:
+            return None
+        if not record.check_token(token):
+            self.stats["rejected"] += 1
+            return None
+        return record
+
+    async def attach(self, session_id: str, token: str) -> tuple[SessionRecord, bool]:
+        """このワーカーに接続したことを記録（既存なら再開）。(record, resumed) を返す
+
+        session_id / token は new_session_id() / new_resume_token() で発行したもの。
+        既存のレコードとトークンが一致しなければ ResumeRejected（上書きしない）。
+        """
+        record = await self.load(session_id)
+        resumed = record is not None
+        if record is None:
+            record = SessionRecord(session_id)
+            record.token_hash = _hash_token(token)
+            self.stats["created"] += 1
+        elif not record.check_token(token):
+            self.stats["rejected"] += 1
+            raise ResumeRejected(session_id)
+        else:
+            self.stats["resumed"] += 1
+        record.node_id = self.node_id
+        record.generation += 1
+        record.status = "active"
+        await self.save(record)
+        return record, resumed
+
+    async def detach(self, record: SessionRecord) -> bool:
+        """切断を記録。別のワーカーで既に再開されていたら False（上書きしない）"""
+        current = await self.load(record.session_id)
+        if current is not None and current.generation != record.generation:
+            return False
+        record.status = "detached"
+        await self.save(record)
+        return True
+
+    async def save(self, record: SessionRecord) -> None:
+        record.updated_at = time.time()
+        try:
+            await self.client.set(self._key(record.session_id), record.to_json(),
+                                  ex=max(1, int(self.ttl)))
+        except Exception as exc:  # noqa: BLE001
+            self.stats["errors"] += 1
+            logger.warning("registry save failed: %s", exc)
+
+    # ------------------------------------------------------------------ node load
+
+    def _node_key(self, node_id: str) -> str:
+        return f"{self.prefix}node:{node_id}"
+
+    async def report_load(self, load: dict, ttl: float) -> None:
+        try:
+            await self.client.set(self._node_key(self.node_id),
+                                  json.dumps({"node_id": self.node_id, **load, "at": time.time()}),
+                                  ex=max(1, int(ttl)))
+        except Exception as exc:  # noqa: BLE001
+            self.stats["errors"] += 1
+            logger.warning("node load report failed: %s", exc)
+
+    async def nodes(self) -> list[dict]:
+        """報告中のワーカー一覧（負荷の低い順）"""
+        nodes = []
+        try:
+            async for key in self.client.scan_iter(match=self._node_key("*")):
+                raw = await self.client.get(key)
+                if raw:
+                    nodes.append(json.loads(raw))
+        except Exception as exc:  # noqa: BLE001
+            self.stats["errors"] += 1
+            logger.warning("node list failed: %s", exc)
+        return sorted(nodes, key=lambda n: (n.get("sessions", 0) + n.get("detached", 0),
+                                            n.get("cpu_percent", 0.0)))
+
+    def metrics(self) -> dict:
+        return {"backend": self.backend, "node_id": self.node_id, **self.stats}
+
+
+class ProcessLoad:
+    """このプロセスの CPU 使用率（前回呼び出しからの平均）と RSS"""
+
+    def __init__(self) -> None:
+        self._cpu = time.process_time()
+        self._at = time.monotonic()
+
+    def sample(self) -> dict:
+        cpu, now = time.process_time(), time.monotonic()
+        percent = (cpu - self._cpu) / max(now - self._at, 1e-6) * 100
+        self._cpu, self._at = cpu, now
+        return {"pid": os.getpid(), "cpu_percent": round(percent, 1), "rss_mb": _rss_mb()}
+
+
+def _rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
@@ -0,0 +1,121 @@
+# mcp/app/services/structured_log.py
+"""ログ出力をイベントループから切り離す（キュー + 別スレッドで整形・書き込み）
+----------------------------------------------------------------
+- setup_logging(): root には QueueHandler だけを付け、整形と stdout への書き込みは
+  QueueListener のスレッドで行う
+  * 標準の QueueHandler は enqueue 時（= イベントループ上）に format するので、
+    prepare() を上書きして LogRecord をそのまま渡す（% 展開も別スレッド）
+  * キューが満杯なら捨てて数える（stdout / ディスクが詰まってもリレーは止まらない）
+- 構造化: fmt="json" なら1行1 JSON（ts, level, logger, msg, session_id, extra のフィールド）
+- session_id はコンテキスト変数（bind_session()）から付与する。
+  asyncio のタスクは作成時のコンテキストを引き継ぐので、relay() で1回設定すれば
+  上り/下りタスクのログにも付く
+
+注意: 引数は別スレッドで展開されるので、ログに渡したオブジェクトを後から書き換えないこと。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+from typing import Callable
+
+_session_id: contextvars.ContextVar[str] = contextvars.ContextVar("session_id", default="")
+
+# LogRecord の標準属性（これ以外は extra として JSON に出す）
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime",
+                                                                               "session_id"}
+
+
+def bind_session(session_id: str) -> contextvars.Token:
+    """以降（このタスクと、ここから作るタスク）のログに session_id を付ける"""
+    return _session_id.set(session_id)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """整形せずに LogRecord を積む。満杯なら捨てる"""
+
+    def __init__(self, log_queue: queue.Queue, on_drop: Callable[[], None] | None = None) -> None:
+        super().__init__(log_queue)
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.session_id = _session_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.on_drop is not None:
+                self.on_drop()
+
+
+class TextFormatter(logging.Formatter):
+    """basicConfig 相当 + session_id"""
+
+    def __init__(self) -> None:
+        super().__init__("%(levelname)s:%(name)s:%(session)s%(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        sid = getattr(record, "session_id", "")
+        record.session = f"[{sid[:8]}] " if sid else ""
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """1行1 JSON（ログ基盤に取り込む用）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "session_id", ""):
+            entry["session_id"] = record.session_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _Listener(logging.handlers.QueueListener):
+    def __init__(self, log_queue: queue.Queue, handler: logging.Handler,
+                 queue_handler: _QueueHandler) -> None:
+        super().__init__(log_queue, handler, respect_handler_level=True)
+        self.queue_handler = queue_handler
+
+    def metrics(self) -> dict:
+        return {"queued": self.queue.qsize(), "dropped": self.queue_handler.dropped}
+
+
+def setup_logging(
+    level: int | str = logging.INFO,
+    fmt: str = "text",
+    queue_size: int = 10000,
+    on_drop: Callable[[], None] | None = None,
+) -> _Listener:
+    """root ロガーをキュー経由にしてリスナースレッドを起動する（stop() で残りを書き出す）"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(queue_size)
+    queue_handler = _QueueHandler(log_queue, on_drop)
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = _Listener(log_queue, handler, queue_handler)
+    listener.start()
+    return listener
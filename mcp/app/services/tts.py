@@ -0,0 +1,296 @@
+# mcp/app/services/tts.py
+"""VOICEVOX による文単位の音声合成（TTS_MODE=voicevox）
+----------------------------------------------------------------
+Realtime API にはテキストだけの応答を依頼し、response.text.delta を文に区切って
+届いたそばから VOICEVOX（audio_query → synthesis）で合成する。
+
+- SentenceSplitter: delta を貯めて 。！？ 等で文を切り出す（長すぎる文は 、 で切る）
+- PhraseCache     : 合成済み PCM の LRU（キー: 文そのまま + 話者 + 合成パラメータ、上限はバイト数）
+- VoicevoxClient  : httpx.AsyncClient（接続プール・keep-alive）で合成。同じ文の同時合成は1回にまとめる
+- SpeechStream    : 1応答分。文ごとに並列で合成し、文の順に sink へ渡す
+  （最初の文が合成できた時点で再生が始まる。前の応答の再生が終わるまでは待つ）
+
+PCM は VOICEVOX の outputSamplingRate（既定 24kHz = Realtime API の pcm16 と同じ）の
+16bit モノラルなので、下りは AudioPipeline.downlink() でそのままクライアントの形式に変換できる。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import re
+import time
+import wave
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import httpx
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"[。！？!?\n]+[」』）)]*")
+_SOFT_BREAK = "、，,"
+
+
+class SentenceSplitter:
+    """テキスト delta を文に区切る"""
+
+    def __init__(self, max_chars: int = 80) -> None:
+        self.max_chars = max_chars
+        self._buf = ""
+
+    def feed(self, delta: str) -> list[str]:
+        self._buf += delta
+        sentences = []
+        while True:
+            m = _SENTENCE_END.search(self._buf)
+            if m is None:
+                break
+            sentences.append(self._buf[:m.end()])
+            self._buf = self._buf[m.end():]
+        # 句点が来ないまま長くなったら読点で切る（最初の音声を遅らせない）
+        while len(self._buf) > self.max_chars:
+            cut = max(self._buf.rfind(c, 0, self.max_chars) for c in _SOFT_BREAK)
+            cut = cut + 1 if cut > 0 else self.max_chars
+            sentences.append(self._buf[:cut])
+            self._buf = self._buf[cut:]
+        return [s.strip() for s in sentences if s.strip()]
+
+    def flush(self) -> str | None:
+        rest, self._buf = self._buf.strip(), ""
+        return rest or None
+
+
+class PhraseCache:
+    """合成済み PCM の LRU（合計バイト数で上限）"""
+
+    def __init__(self, max_bytes: int = 64_000_000) -> None:
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def get(self, key: str) -> bytes | None:
+        pcm = self._data.get(key)
+        if pcm is None:
+            self.stats["misses"] += 1
+            metrics.TTS_PHRASE_CACHE.labels("miss").inc()
+            return None
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        metrics.TTS_PHRASE_CACHE.labels("hit").inc()
+        return pcm
+
+    def put(self, key: str, pcm: bytes) -> None:
+        if len(pcm) > self.max_bytes:
+            return
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._data[key] = pcm
+        self._bytes += len(pcm)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.stats["evicted"] += 1
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+        }
+
+
+def _wav_to_pcm(data: bytes) -> bytes:
+    try:
+        with wave.open(io.BytesIO(data)) as w:
+            width, channels = w.getsampwidth(), w.getnchannels()
+            pcm = w.readframes(w.getnframes())
+    except (wave.Error, EOFError) as exc:
+        raise ValueError(f"invalid wav: {exc}") from exc
+    if width != 2 or channels != 1:
+        raise ValueError(f"unexpected wav: width={width} channels={channels}")
+    return pcm
+
+
+class VoicevoxClient:
+    """VOICEVOX エンジンの HTTP クライアント（接続プール + フレーズキャッシュ）"""
+
+    def __init__(
+        self,
+        base_url: str,
+        speaker: int,
+        *,
+        params: dict | None = None,
+        sample_rate: int = 24000,
+        max_connections: int = 8,
+        timeout: float = 10.0,
+        cache: PhraseCache | None = None,
+    ) -> None:
+        self.speaker = speaker
+        self.sample_rate = sample_rate
+        # audio_query の結果に上書きする合成パラメータ（speedScale, pitchScale ...）
+        self.params = {**(params or {}), "outputSamplingRate": sample_rate, "outputStereo": False}
+        self.cache = cache
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.stats = {"synthesized": 0, "errors": 0}
+
+    def key(self, text: str) -> str:
+        """文は正規化しない（全角/半角・大文字小文字で読みが変わる。例: 薬剤名の綴り・数字）"""
+        body = json.dumps({"text": text, "speaker": self.speaker, "params": self.params},
+                          sort_keys=True, ensure_ascii=False)
+        return "tts:" + hashlib.sha256(body.encode()).hexdigest()
+
+    async def synthesize(self, text: str) -> bytes:
+        """1文を合成して PCM16 モノラルを返す（キャッシュ・同時合成のまとめ込み）"""
+        key = self.key(text)
+        if self.cache is not None:
+            pcm = self.cache.get(key)
+            if pcm is not None:
+                return pcm
+        task = self._inflight.get(key)
+        if task is None:
+            # 呼び出し側がバージインでキャンセルされても合成は最後まで行う（他の待ち手・キャッシュ用）
+            task = self._inflight[key] = asyncio.create_task(self._synthesize(key, text))
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # 誰も待っていなくても警告を出さない
+
+    async def _synthesize(self, key: str, text: str) -> bytes:
+        started = time.monotonic()
+        try:
+            r = await self._http.post("/audio_query", params={"text": text, "speaker": self.speaker})
+            r.raise_for_status()
+            query = {**r.json(), **self.params}
+            r = await self._http.post("/synthesis", params={"speaker": self.speaker}, json=query)
+            r.raise_for_status()
+            pcm = _wav_to_pcm(r.content)
+        except (httpx.HTTPError, ValueError):
+            self.stats["errors"] += 1
+            raise
+        self.stats["synthesized"] += 1
+        metrics.TTS_SYNTHESIS.observe(time.monotonic() - started)
+        if self.cache is not None:
+            self.cache.put(key, pcm)
+        return pcm
+
+    async def close(self) -> None:
+        await self._http.aclose()
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "speaker": self.speaker,
+            "cache": self.cache.metrics() if self.cache is not None else None,
+        }
+
+
+class SpeechStream:
+    """1応答分: 文が確定するたびに合成を始め、文の順に sink(pcm) へ渡す"""
+
+    def __init__(
+        self,
+        client: VoicevoxClient,
+        sink: Callable[[bytes], Awaitable[None]],
+        *,
+        parallel: int = 3,
+        after: "SpeechStream | None" = None,
+        max_chars: int = 80,
+        response_id: str = "",
+    ) -> None:
+        self.client = client
+        self.response_id = response_id
+        self.sink = sink
+        self.splitter = SentenceSplitter(max_chars)
+        self._slots = asyncio.Semaphore(parallel)
+        self._jobs: asyncio.Queue[asyncio.Task | None] = asyncio.Queue()
+        self._jobs_list: list[asyncio.Task] = []
+        self._started = time.monotonic()
+        self._first = True
+        self._finished = False
+        self.sentences = 0
+        # 前の応答がまだ再生中なら、その後ろに続ける
+        self._after = after if after is not None and after.active else None
+        previous = self._after._player if self._after is not None else None
+        self._player = asyncio.create_task(self._play(previous))
+
+    @property
+    def active(self) -> bool:
+        return not self._player.done()
+
+    def feed(self, delta: str) -> None:
+        for sentence in self.splitter.feed(delta):
+            self._start(sentence)
+
+    def finish(self) -> None:
+        """応答のテキストが終わった（残りを合成して終了）"""
+        if self._finished:
+            return
+        rest = self.splitter.flush()
+        if rest:
+            self._start(rest)
+        self._finished = True
+        self._jobs.put_nowait(None)
+
+    async def join(self) -> None:
+        """最後の文を sink に渡し終えるまで待つ"""
+        await asyncio.wait([self._player])
+
+    def cancel(self) -> None:
+        """バージイン: 合成中・再生待ちの文をすべて捨てる（まだ再生中の前の応答も）"""
+        self._finished = True
+        self._player.cancel()
+        for job in self._jobs_list:
+            job.cancel()
+        if self._after is not None:
+            self._after.cancel()
+            self._after = None
+
+    def _start(self, sentence: str) -> None:
+        if self._finished:
+            return
+        self.sentences += 1
+        job = asyncio.create_task(self._synthesize(sentence))
+        self._jobs_list.append(job)
+        self._jobs.put_nowait(job)
+
+    async def _synthesize(self, sentence: str) -> bytes | None:
+        async with self._slots:
+            try:
+                return await self.client.synthesize(sentence)
+            except (httpx.HTTPError, ValueError) as exc:
+                logger.warning("🗣️ VOICEVOX synthesis failed (%s): %r", sentence[:20], exc)
+                return None  # この文は飛ばして続ける
+
+    async def _play(self, previous: asyncio.Task | None) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        while True:
+            job = await self._jobs.get()
+            if job is None:
+                return
+            pcm = await job
+            if not pcm:
+                continue
+            if self._first:
+                self._first = False
+                metrics.TTS_FIRST_AUDIO.observe(time.monotonic() - self._started)
+            await self.sink(pcm)
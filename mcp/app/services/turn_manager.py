@@ -0,0 +1,146 @@
+# mcp/app/services/turn_manager.py
+"""フレーム単位のターン管理（バージイン・コミット判定）
+----------------------------------------------------------------
+固定の20チャンク窓ではなく、VAD の結果を1フレームごとに評価する:
+
+- 発話開始（ローカルVADの onset / サーバーの speech_started）でアシスタント発話中なら即 CANCEL
+- 発話終了を観測してから ``hangover_ms`` 経過で COMMIT（途中で再開したら取り消し）
+- 無音が ``clear_after_ms`` 溜まったら CLEAR（入力バッファを空に保つ）
+
+時間はフレーム長の積算（音声時間）で数えるので、台本化した音声でも再現できる。
+レイテンシ（発話終了→コミット、発話開始→キャンセル）も同じ時計で記録する。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+from .vad import VadFrame
+
+CANCEL = "cancel"
+COMMIT = "commit"
+CLEAR = "clear"
+
+_IDLE, _SPEAKING, _HANGOVER = range(3)
+
+
+class TurnManager:
+    """1セッション分のターン状態"""
+
+    def __init__(
+        self,
+        *,
+        hangover_ms: int = 150,
+        min_speech_ms: int = 200,
+        clear_after_ms: int = 1000,
+        history: int = 200,
+    ) -> None:
+        self.hangover_ms = hangover_ms
+        self.min_speech_ms = min_speech_ms
+        self.clear_after_ms = clear_after_ms
+
+        self.clock_ms = 0.0           # 受信した音声の累積時間
+        self._state = _IDLE
+        self._buffered_ms = 0.0       # 直近の commit/clear 以降に送った音声
+        self._speech_ms = 0.0         # 現在のターンの発話長
+        self._voiced_run_start: float | None = None  # 連続した有声フレームの開始
+        self._last_voiced_end = 0.0   # 最後の有声フレームの終端
+        self._end_seen_at = 0.0       # 発話終了を観測した時刻
+        self.last_speech_ms = 0.0     # 直近にコミットしたターンの発話長
+
+        self.latency = {
+            "speech_end_to_commit_ms": deque(maxlen=history),
+            "onset_to_cancel_ms": deque(maxlen=history),
+        }
+
+    @property
+    def speaking(self) -> bool:
+        return self._state == _SPEAKING
+
+    # ------------------------------------------------------------------ local VAD
+
+    def on_frame(self, frame: VadFrame, duration_ms: float, assistant_active: bool) -> list[str]:
+        """1フレーム分の判定を行い、実行すべきアクションを返す"""
+        start = self.clock_ms
+        self.clock_ms += duration_ms
+        self._buffered_ms += duration_ms
+
+        if frame.voiced:
+            if self._voiced_run_start is None:
+                self._voiced_run_start = start
+            self._last_voiced_end = self.clock_ms
+        else:
+            self._voiced_run_start = None
+
+        actions: list[str] = []
+        if frame.onset:
+            onset_at = self._voiced_run_start if self._voiced_run_start is not None else start
+            actions += self._speech_started(onset_at, assistant_active)
+        else:
+            if self._state == _HANGOVER and frame.is_speech and frame.voiced:
+                self._state = _SPEAKING  # サーバー側の終了判定後もローカルでは発話継続
+            if self._state == _SPEAKING:
+                self._speech_ms += duration_ms
+        if frame.offset and self._state == _SPEAKING:
+            self._speech_stopped()
+        actions += self._tick()
+        return actions
+
+    # ------------------------------------------------------------------ server VAD
+
+    def on_server_speech_started(self, assistant_active: bool) -> list[str]:
+        """input_audio_buffer.speech_started（ローカルで未検出のときだけ効く）"""
+        if self._state == _SPEAKING:
+            return []
+        return self._speech_started(self.clock_ms, assistant_active)
+
+    def on_server_speech_stopped(self) -> list[str]:
+        """input_audio_buffer.speech_stopped（ローカルより早ければこちらで終了扱い）"""
+        if self._state != _SPEAKING:
+            return []
+        self._speech_stopped(at=self.clock_ms)
+        return self._tick()
+
+    # ------------------------------------------------------------------ internals
+
+    def _speech_started(self, onset_at: float, assistant_active: bool) -> list[str]:
+        if self._state == _IDLE:
+            self._speech_ms = self.clock_ms - onset_at
+        self._state = _SPEAKING  # HANGOVER 中の再開ならコミットを取り消して継続
+        if assistant_active:
+            self.latency["onset_to_cancel_ms"].append(self.clock_ms - onset_at)
+            return [CANCEL]
+        return []
+
+    def _speech_stopped(self, at: float | None = None) -> None:
+        self._state = _HANGOVER
+        self._end_seen_at = at if at is not None else self.clock_ms
+
+    def _tick(self) -> list[str]:
+        if self._state == _HANGOVER and self.clock_ms - self._end_seen_at >= self.hangover_ms:
+            self._state = _IDLE
+            speech_end = min(self._last_voiced_end, self._end_seen_at)
+            if self._speech_ms >= self.min_speech_ms:
+                self.latency["speech_end_to_commit_ms"].append(self.clock_ms - speech_end)
+                self.last_speech_ms = self._speech_ms
+                self._buffered_ms = 0.0
+                return [COMMIT]
+            self._buffered_ms = 0.0
+            return [CLEAR]  # 短すぎる音（咳・物音）は捨てる
+        if (self._state == _IDLE and self._voiced_run_start is None
+                and self._buffered_ms >= self.clear_after_ms):
+            self._buffered_ms = 0.0
+            return [CLEAR]
+        return []
+
+    def metrics(self) -> dict:
+        out = {}
+        for name, values in self.latency.items():
+            if values:
+                ordered = sorted(values)
+                out[name] = {
+                    "count": len(ordered),
+                    "p50": ordered[len(ordered) // 2],
+                    "max": ordered[-1],
+                }
+        return out
@@ -0,0 +1,119 @@
+# mcp/app/services/vad.py
+"""フレーム単位の音声区間検出 (VAD)
+----------------------------------------------------------------
+- 受信したPCM16バッファを np.frombuffer でコピーせずに参照
+- フレームごとに peak / RMS / 適応ノイズフロアを計算
+- セッションごとに状態を保持し、ヒステリシス付きで発話/無音を判定
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class VadFrame(NamedTuple):
+    """1フレーム分の判定結果"""
+
+    peak: int
+    rms: float
+    noise_floor: float
+    is_speech: bool
+    voiced: bool   # このフレーム単体が終了閾値を超えている
+    onset: bool    # このフレームで発話開始と判定
+    offset: bool   # このフレームで発話終了と判定
+
+
+class VoiceActivityDetector:
+    """PCM16 (little endian, mono) 用のステートフルVAD
+
+    発話開始は ``attack_frames`` 連続で開始閾値を超えたとき、
+    発話終了は ``release_frames`` 連続で終了閾値を下回ったときに確定する。
+    ノイズフロアは無音区間でのみ追従させる（下降は速く、上昇は遅く）。
+    """
+
+    def __init__(
+        self,
+        *,
+        min_peak: int = 100,
+        min_rms: float = 60.0,
+        start_ratio: float = 3.0,
+        stop_ratio: float = 1.8,
+        attack_frames: int = 2,
+        release_frames: int = 4,
+        floor_rise: float = 0.02,
+        floor_fall: float = 0.3,
+        initial_floor: float = 30.0,
+        max_frame_samples: int = 4800,
+    ) -> None:
+        self.min_peak = min_peak
+        self.min_rms = min_rms
+        self.start_ratio = start_ratio
+        self.stop_ratio = stop_ratio
+        self.attack_frames = attack_frames
+        self.release_frames = release_frames
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.initial_floor = initial_floor
+
+        self.noise_floor = initial_floor
+        self.is_speech = False
+        self._above = 0
+        self._below = 0
+        # RMS計算用の作業領域（フレームごとの確保を避ける）
+        self._scratch = np.empty(max_frame_samples, dtype=np.float32)
+
+    def reset(self) -> None:
+        self.noise_floor = self.initial_floor
+        self.is_speech = False
+        self._above = 0
+        self._below = 0
+
+    def process(self, pcm: bytes | bytearray | memoryview) -> VadFrame:
+        """1フレームを判定して結果を返す"""
+        n = len(pcm) // 2
+        if n == 0:
+            return VadFrame(0, 0.0, self.noise_floor, self.is_speech, False, False, False)
+
+        samples = np.frombuffer(pcm, dtype="<i2", count=n)
+        # int16 の abs(-32768) はオーバーフローするので max/min から求める
+        peak = max(int(samples.max()), -int(samples.min()))
+
+        if n > self._scratch.shape[0]:
+            self._scratch = np.empty(n, dtype=np.float32)
+        work = self._scratch[:n]
+        np.copyto(work, samples, casting="unsafe")
+        rms = float(np.sqrt(np.dot(work, work) / n))
+
+        start_level = max(self.noise_floor * self.start_ratio, self.min_rms)
+        stop_level = max(self.noise_floor * self.stop_ratio, self.min_rms)
+
+        voiced = rms >= stop_level and peak > self.min_peak
+        onset = offset = False
+        if not self.is_speech:
+            if rms >= start_level and peak > self.min_peak:
+                self._above += 1
+                if self._above >= self.attack_frames:
+                    self.is_speech = True
+                    self._above = 0
+                    self._below = 0
+                    onset = True
+            else:
+                self._above = 0
+                self._track_floor(rms)
+        else:
+            if not voiced:
+                self._below += 1
+                if self._below >= self.release_frames:
+                    self.is_speech = False
+                    self._below = 0
+                    offset = True
+            else:
+                self._below = 0
+
+        return VadFrame(peak, rms, self.noise_floor, self.is_speech, voiced, onset, offset)
+
+    def _track_floor(self, rms: float) -> None:
+        rate = self.floor_fall if rms < self.noise_floor else self.floor_rise
+        self.noise_floor += (rms - self.noise_floor) * rate
@@ -0,0 +1 @@
+# mcp/benchmarks - 性能計測用スクリプト（`python -m benchmarks.<name>` で実行）
@@ -0,0 +1,91 @@
+# mcp/benchmarks/bench_codecs.py
+"""コーデックごとの帯域と CPU コスト
+
+1セッション分の上り（VAD 用デコード → 変換 → base64）と
+下り（base64 デコード → 変換）を、クライアント宣言ごとに比べる。
+帯域はクライアント側（Wi-Fi）と Realtime API 側（base64 後の JSON 本文）の両方を出す。
+
+    cd mcp && python -m benchmarks.bench_codecs --seconds 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import time
+
+import numpy as np
+
+from app.services.audio_pipeline import AudioPipeline, negotiate
+from app.services.codec import CODECS
+
+CHUNK_MS = 50
+
+CASES = [
+    # (ラベル, クエリパラメータ, native_g711)
+    ("pcm16 16k/24k", {"format": "pcm16"}, True),
+    ("pcm16 16k/16k", {"format": "pcm16", "output_rate": "16000"}, True),
+    ("g711_ulaw", {"format": "g711_ulaw"}, True),
+    ("g711_alaw", {"format": "g711_alaw"}, True),
+    ("g711_ulaw (transcode)", {"format": "g711_ulaw"}, False),
+    ("pcm16 in / ulaw out", {"input_format": "pcm16", "output_format": "g711_ulaw"}, True),
+]
+
+
+def _pcm(rate: int, ms: int, seed: int) -> bytes:
+    n = rate * ms // 1000
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / rate
+    x = 3000 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 300, n)
+    return x.clip(-32768, 32767).astype("<i2").tobytes()
+
+
+def _run(params: dict, native: bool, seconds: float) -> dict:
+    pipeline = AudioPipeline(negotiate(params, 16000, 24000), native_g711=native)
+    c = pipeline.client
+    up_chunk = CODECS[c.input_format].encode(_pcm(c.input_rate, CHUNK_MS, 1))
+    up_rate = CODECS[pipeline.upstream_output_format].sample_rate or pipeline.upstream_rate
+    down_raw = CODECS[pipeline.upstream_output_format].encode(_pcm(up_rate, CHUNK_MS, 2))
+    down_b64 = base64.b64encode(down_raw).decode()
+    steps = int(seconds * 1000 / CHUNK_MS)
+
+    up_bytes = up_b64 = down_bytes = 0
+    cpu0 = time.process_time()
+    for _ in range(steps):
+        pipeline.input_pcm(up_chunk)                     # VAD 用
+        up_b64 += len(base64.b64encode(pipeline.uplink(up_chunk)))
+        up_bytes += len(up_chunk)
+    up_cpu = time.process_time() - cpu0
+
+    cpu0 = time.process_time()
+    for _ in range(steps):
+        down_bytes += len(pipeline.downlink(base64.b64decode(down_b64)))
+    down_cpu = time.process_time() - cpu0
+
+    return {
+        "client_up": up_bytes / seconds / 1000,
+        "client_down": down_bytes / seconds / 1000,
+        "api_up": up_b64 / seconds / 1000,
+        "api_down": len(down_b64) * steps / seconds / 1000,
+        "up_us": up_cpu / seconds * 1e6,
+        "down_us": down_cpu / seconds * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=60.0, help="audio seconds per case")
+    args = parser.parse_args()
+
+    print(f"{'case':<22} {'client up':>10} {'client down':>12} {'API up':>9} {'API down':>9}"
+          f" {'CPU up':>11} {'CPU down':>11}")
+    print(f"{'':<22} {'KB/s':>10} {'KB/s':>12} {'KB/s':>9} {'KB/s':>9}"
+          f" {'µs/audio-s':>11} {'µs/audio-s':>11}")
+    for label, params, native in CASES:
+        r = _run(params, native, args.seconds)
+        print(f"{label:<22} {r['client_up']:10.1f} {r['client_down']:12.1f} {r['api_up']:9.1f}"
+              f" {r['api_down']:9.1f} {r['up_us']:11.0f} {r['down_us']:11.0f}")
+
+
+if __name__ == "__main__":
+    main()
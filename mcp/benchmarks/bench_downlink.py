@@ -0,0 +1,136 @@
+# mcp/benchmarks/bench_downlink.py
+"""下りイベント処理のベンチマーク（従来実装 vs 高速パス＋ディスパッチテーブル）
+
+Realtime API の応答を模したイベント列（音声deltaが大半）を再生し、
+events/sec と 1イベントあたりの一時確保メモリを比較する。
+--events-file に JSON Lines（1行1イベントの生テキスト）を渡すと録音済みストリームを再生する。
+
+    cd mcp && python -m benchmarks.bench_downlink --responses 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+import tracemalloc
+
+from app.services.downlink import EventDispatcher, parse_audio_delta
+
+DELTA_BYTES = 4800  # 24kHz × 100ms × 2bytes
+
+
+def synthetic_stream(responses: int, deltas_per_response: int = 30) -> list[str]:
+    """response.created → (audio.delta, transcript.delta)* → response.done の繰り返し"""
+    audio = base64.b64encode(os.urandom(DELTA_BYTES)).decode()
+    events: list[str] = []
+    for r in range(responses):
+        rid, iid = f"resp_{r:06d}", f"item_{r:06d}"
+        events.append(json.dumps({"type": "response.created", "event_id": f"ev_{r}_c",
+                                  "response": {"id": rid, "status": "in_progress"}},
+                                 separators=(",", ":")))
+        for i in range(deltas_per_response):
+            events.append(json.dumps({
+                "type": "response.audio.delta", "event_id": f"ev_{r}_{i}",
+                "response_id": rid, "item_id": iid, "output_index": 0,
+                "content_index": 0, "delta": audio,
+            }, separators=(",", ":")))
+            if i % 3 == 0:
+                events.append(json.dumps({
+                    "type": "response.audio_transcript.delta", "event_id": f"ev_{r}_{i}_t",
+                    "response_id": rid, "item_id": iid, "output_index": 0,
+                    "content_index": 0, "delta": "こんにちは",
+                }, separators=(",", ":")))
+        events.append(json.dumps({"type": "response.done", "event_id": f"ev_{r}_d",
+                                  "response": {"id": rid, "status": "completed"}},
+                                 separators=(",", ":")))
+    return events
+
+
+async def _sink(_: bytes) -> None:
+    return None
+
+
+async def legacy(m: str) -> None:
+    """realtime.py の旧実装（json.loads + if/elif + b64decode）"""
+    d = json.loads(m)
+    t = d.get("type", "?")
+    if t == "response.audio.delta":
+        delta = d.get("delta", "")
+        if delta:
+            await _sink(base64.b64decode(delta))
+    elif t == "response.done":
+        pass
+    elif t == "response.cancelled":
+        pass
+    elif t == "conversation.item.input_audio_transcription.completed":
+        pass
+    elif t == "response.audio_transcript.delta":
+        pass
+    elif t.startswith("error"):
+        pass
+
+
+_dispatcher = EventDispatcher()
+
+
+async def _noop(session, event) -> None:
+    return None
+
+
+for _t in ("response.done", "response.cancelled", "response.created",
+           "conversation.item.input_audio_transcription.completed",
+           "response.audio_transcript.delta"):
+    _dispatcher.register(_t, _noop)
+_dispatcher.on_default()(_noop)
+
+
+async def fast(m: str) -> None:
+    delta = parse_audio_delta(m)
+    if delta is not None:
+        await _sink(delta.audio)
+        return
+    await _dispatcher.dispatch(None, json.loads(m))
+
+
+async def _measure(label: str, fn, events: list[str]) -> None:
+    start = time.perf_counter()
+    for m in events:
+        await fn(m)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    transient = 0
+    for m in events:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        await fn(m)
+        _, peak = tracemalloc.get_traced_memory()
+        transient += peak - base
+    tracemalloc.stop()
+
+    print(f"{label:<8} {len(events) / elapsed:>12,.0f} events/sec   "
+          f"{transient / len(events):>10,.0f} B peak transient/event")
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--responses", type=int, default=50)
+    parser.add_argument("--events-file", help="JSON Lines of raw server events")
+    args = parser.parse_args()
+
+    if args.events_file:
+        with open(args.events_file, encoding="utf-8") as f:
+            events = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        events = synthetic_stream(args.responses)
+    print(f"{len(events)} events")
+    await _measure("legacy", legacy, events)
+    await _measure("fast", fast, events)
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,59 @@
+# mcp/benchmarks/bench_functions.py
+"""Function calling エンジンのキャッシュ効果測定
+
+遅いツール（--latency 秒）を同じ引数（表記揺れあり）で繰り返し呼び、
+初回とキャッシュヒット時の所要時間を比べる。--redis で Redis/fakeredis を L2 に使う。
+
+    cd mcp && python -m benchmarks.bench_functions --calls 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.services.cache import ResultCache, TTLCache
+from app.services.function import FunctionEngine, ToolSpec
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--redis", help="redis URL, or 'fake' for fakeredis")
+    args = parser.parse_args()
+
+    async def search_medical(arguments: dict) -> dict:
+        await asyncio.sleep(args.latency)
+        return {"results": [f"{arguments['query']} について"]}
+
+    redis = None
+    if args.redis == "fake":
+        import fakeredis.aioredis
+        redis = fakeredis.aioredis.FakeRedis()
+    elif args.redis:
+        import redis.asyncio as aioredis
+        redis = aioredis.from_url(args.redis)
+
+    spec = ToolSpec({"name": "search_medical", "runtime": {"cache_ttl": 600, "normalize": ["query"]}})
+    engine = FunctionEngine({"search_medical": spec}, ResultCache(TTLCache(), redis), {},
+                            router={"search_medical": search_medical})
+
+    start = time.perf_counter()
+    await engine.call("search_medical", {"query": "頭痛"})
+    first = time.perf_counter() - start
+
+    variants = [{"query": "頭痛"}, {"query": " 頭痛 "}, {"query": "頭痛　"}]
+    start = time.perf_counter()
+    for i in range(args.calls):
+        await engine.call("search_medical", variants[i % len(variants)])
+    hit = (time.perf_counter() - start) / args.calls
+
+    print(f"miss   {first * 1e3:9.1f} ms")
+    print(f"hit    {hit * 1e6:9.1f} µs")
+    print(f"stats  {engine.metrics()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
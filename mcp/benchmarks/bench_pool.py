@@ -0,0 +1,60 @@
+# mcp/benchmarks/bench_pool.py
+"""事前接続プールの効果測定（接続要求 → 設定済みセッション取得までの時間）
+
+ローカルの FakeRealtimeServer に対して、都度接続とプール払い出しを比較する。
+
+    cd mcp && python -m benchmarks.bench_pool --latency 0.1 --sessions 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.openai_ws import UpstreamSessionPool, open_session, safe_close
+
+from .fake_realtime import FakeRealtimeServer
+
+
+async def _timed(acquire, sessions: int, gap: float) -> list[float]:
+    samples = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        ws = await acquire()
+        samples.append((time.perf_counter() - start) * 1000)
+        await safe_close(ws)
+        await asyncio.sleep(gap)  # 患者の到着間隔
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    print(f"{label:<8} p50 {q[49]:7.1f} ms   p99 {q[98]:7.1f} ms   max {max(samples):7.1f} ms")
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.1, help="fake server handshake latency (s)")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--gap", type=float, default=0.5, help="seconds between arrivals")
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args()
+
+    async with FakeRealtimeServer(latency=args.latency) as server:
+        def opener():
+            return open_session(server.url, {"Authorization": "Bearer sk-test"}, {"voice": "alloy"})
+
+        _report("direct", await _timed(opener, args.sessions, args.gap))
+
+        pool = UpstreamSessionPool(opener, args.pool_size, health_interval=5)
+        await pool.start()
+        await asyncio.sleep(args.latency * 3)  # 初回充填を待つ
+        _report("pooled", await _timed(pool.acquire, args.sessions, args.gap))
+        print(f"pool     {pool.metrics()}")
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
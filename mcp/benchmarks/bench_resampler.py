@@ -0,0 +1,62 @@
+# mcp/benchmarks/bench_resampler.py
+"""リサンプラの同時セッション負荷ベンチマーク
+
+N セッション分の AudioPipeline（上り 16k→24k / 下り 24k→16k）に
+50ms チャンクを交互に流し、1セッションあたりのCPUコストを測る。
+
+    cd mcp && python -m benchmarks.bench_resampler --sessions 128 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.audio_pipeline import AudioPipeline, ClientAudioFormat
+
+CHUNK_MS = 50
+
+
+def _chunk(rate: int, seed: int) -> bytes:
+    n = rate * CHUNK_MS // 1000
+    rng = np.random.default_rng(seed)
+    return (rng.normal(0, 3000, n)).clip(-32768, 32767).astype("<i2").tobytes()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=128)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--input-rate", type=int, default=16000)
+    parser.add_argument("--output-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    fmt = ClientAudioFormat(args.input_rate, args.output_rate)
+    pipelines = [AudioPipeline(fmt) for _ in range(args.sessions)]
+    up_chunk = _chunk(args.input_rate, 1)
+    down_chunk = _chunk(24000, 2)
+    steps = int(args.seconds * 1000 / CHUNK_MS)
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(steps):
+        for p in pipelines:
+            p.uplink(up_chunk)
+            p.downlink(down_chunk)
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+
+    audio_seconds = args.sessions * args.seconds
+    per_session = cpu / audio_seconds * 100  # 1コアに対する割合 (%)
+    print(f"sessions           {args.sessions}")
+    print(f"audio processed    {audio_seconds:.0f} session-seconds (up + down)")
+    print(f"cpu                {cpu:.2f} s  (wall {wall:.2f} s)")
+    print(f"per-session cost   {per_session:.3f} % of one core")
+    print(f"sessions per core  {100 / per_session:,.0f}")
+    up_ms, down_ms = pipelines[0].delay_ms
+    print(f"added latency      up {up_ms:.2f} ms / down {down_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
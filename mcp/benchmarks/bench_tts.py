@@ -0,0 +1,128 @@
+# mcp/benchmarks/bench_tts.py
+"""VOICEVOX 文単位合成の最初の音声までの時間とフレーズキャッシュのヒット率
+
+応答テキストを LLM の生成ペース（--chars-per-sec）で delta として流し、
+最初の delta から最初の PCM が sink に届くまで（time-to-first-audio）を比べる:
+
+  whole    : 応答テキストが揃ってから全文を1回で合成（文単位にしない場合）
+  sentence : SpeechStream（文ごとに並列合成・キャッシュなし）
+  cached   : SpeechStream + PhraseCache（定型文が繰り返し出る応答列でのヒット率も出す）
+
+VOICEVOX はスタンドイン（benchmarks/fake_voicevox.py）を同じプロセスで起動する。
+
+    cd mcp && python -m benchmarks.bench_tts --responses 50 --rtf 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.services.tts import PhraseCache, SpeechStream, VoicevoxClient
+
+from .fake_voicevox import FakeVoicevoxServer
+
+# 応答によく出る定型文（キャッシュが効く）と、毎回変わる文
+COMMON = [
+    "承知しました。",
+    "お大事にしてください。",
+    "ほかに気になる症状はありますか？",
+    "受付時間は午前九時から午後六時までです。",
+    "症状が続く場合は医療機関を受診してください。",
+]
+VARIABLE = [
+    "{n}日前から{s}が続いているのですね。",
+    "{s}の程度を十段階で教えていただけますか？",
+    "体温は{t}度とのことですね。",
+    "{s}には水分をこまめにとることが大切です。",
+]
+SYMPTOMS = ["頭痛", "咳", "発熱", "喉の痛み", "腹痛", "めまい"]
+
+
+def _responses(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        parts = [rng.choice(VARIABLE).format(n=rng.randint(1, 9), s=rng.choice(SYMPTOMS),
+                                             t=f"{rng.uniform(36.5, 39.5):.1f}")]
+        parts += rng.sample(COMMON, rng.randint(1, 2))
+        rng.shuffle(parts)
+        out.append("".join(parts))
+    return out
+
+
+async def _deltas(text: str, chars_per_sec: float, chunk: int = 3):
+    for i in range(0, len(text), chunk):
+        yield text[i:i + chunk]
+        await asyncio.sleep(chunk / chars_per_sec)
+
+
+async def _whole(client: VoicevoxClient, text: str, chars_per_sec: float) -> float:
+    start = time.perf_counter()
+    buf = ""
+    async for delta in _deltas(text, chars_per_sec):
+        buf += delta
+    await client.synthesize(buf)
+    return time.perf_counter() - start
+
+
+async def _sentence(client: VoicevoxClient, text: str, chars_per_sec: float, parallel: int) -> float:
+    start = time.perf_counter()
+    first: list[float] = []
+
+    async def sink(pcm: bytes) -> None:
+        if not first:
+            first.append(time.perf_counter() - start)
+
+    stream = SpeechStream(client, sink, parallel=parallel)
+    async for delta in _deltas(text, chars_per_sec):
+        stream.feed(delta)
+    stream.finish()
+    await stream.join()
+    return first[0] if first else float("nan")
+
+
+def _fmt(samples: list[float]) -> str:
+    ms = sorted(v * 1000 for v in samples)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"p50 {statistics.median(ms):6.0f} ms  p95 {p95:6.0f} ms"
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=50)
+    parser.add_argument("--chars-per-sec", type=float, default=60.0, help="LLM text rate")
+    parser.add_argument("--rtf", type=float, default=0.15, help="stand-in synthesis real time factor")
+    parser.add_argument("--parallel", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = _responses(args.responses, args.seed)
+    async with FakeVoicevoxServer(rtf=args.rtf) as server:
+        plain = VoicevoxClient(server.url, 3)
+        cache = PhraseCache()
+        cached = VoicevoxClient(server.url, 3, cache=cache)
+        results = {"whole": [], "sentence": [], "cached": []}
+        for text in texts:
+            results["whole"].append(await _whole(plain, text, args.chars_per_sec))
+            results["sentence"].append(await _sentence(plain, text, args.chars_per_sec, args.parallel))
+            results["cached"].append(await _sentence(cached, text, args.chars_per_sec, args.parallel))
+        await plain.close()
+        await cached.close()
+
+    print(f"{len(texts)} responses, {statistics.mean(map(len, texts)):.0f} chars avg, "
+          f"{args.chars_per_sec:g} chars/s, rtf {args.rtf}")
+    print("time to first audio (first text delta → first PCM)")
+    for name, samples in results.items():
+        print(f"  {name:<9} {_fmt(samples)}")
+    m = cache.metrics()
+    print(f"phrase cache: hit rate {m['hit_rate']:.0%} ({m['hits']}/{m['hits'] + m['misses']}), "
+          f"{m['entries']} entries, {m['bytes'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,147 @@
+# mcp/benchmarks/bench_turns.py
+"""台本化した音声でターン判定のレイテンシを比較するハーネス
+
+従来の 20チャンク窓（idx == 0 でのみバージイン、1秒ごとに commit/clear）と
+VoiceActivityDetector + TurnManager を同じ音声列で動かし、
+発話終了→コミット / 発話開始→キャンセル の遅延と、発話途中のコミット数を比べる。
+新実装が改善していなければ終了コード 1 を返す。
+
+    cd mcp && python -m benchmarks.bench_turns --turns 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import struct
+import sys
+
+import numpy as np
+
+from app.services.turn_manager import CANCEL, COMMIT, TurnManager
+from app.services.vad import VoiceActivityDetector
+
+RATE = 16000
+FRAME_MS = 50
+FRAME_SAMPLES = RATE * FRAME_MS // 1000
+
+
+def make_script(turns: int, seed: int = 0) -> list[tuple[bool, int, bool]]:
+    """(speech?, duration_ms, assistant_speaking_at_start) のリスト"""
+    rng = np.random.default_rng(seed)
+    script = []
+    for i in range(turns):
+        script.append((False, int(rng.integers(12, 40)) * FRAME_MS, False))
+        script.append((True, int(rng.integers(4, 60)) * FRAME_MS, i % 2 == 1))
+    script.append((False, 2000, False))
+    return script
+
+
+def render(script) -> tuple[list[bytes], list[tuple[int, int, bool]]]:
+    """フレーム列と、発話区間 (start_ms, end_ms, barge_in) を返す"""
+    rng = np.random.default_rng(1)
+    t = np.arange(FRAME_SAMPLES) / RATE
+    frames, segments, clock = [], [], 0
+    for speech, ms, barge in script:
+        n = ms // FRAME_MS
+        for k in range(n):
+            x = rng.normal(0, 15, FRAME_SAMPLES)
+            if speech:
+                x += 2500 * np.sin(2 * np.pi * (180 + 40 * np.sin(k)) * t + k)
+            frames.append(x.clip(-32768, 32767).astype("<i2").tobytes())
+        if speech:
+            segments.append((clock, clock + ms, barge))
+        clock += ms
+    return frames, segments
+
+
+def run_legacy(frames, segments):
+    """旧 _unity_to_openai の判定を再現（時刻はフレーム終端の ms）"""
+    commits, cancels = [], []
+    idx = 0
+    has_voice = False
+    for i, pcm in enumerate(frames):
+        now = (i + 1) * FRAME_MS
+        if idx == 0 and _barge_active(segments, cancels, now):
+            cancels.append(now)
+        samples = struct.unpack(f"{len(pcm)//2}h", pcm)
+        if max(abs(s) for s in samples) > 100:
+            has_voice = True
+        idx += 1
+        if idx >= 20:
+            if has_voice:
+                commits.append(now)
+            idx = 0
+            has_voice = False
+    return commits, cancels
+
+
+def run_turn_manager(frames, segments):
+    vad = VoiceActivityDetector()
+    turns = TurnManager()
+    commits, cancels = [], []
+    for i, pcm in enumerate(frames):
+        now = (i + 1) * FRAME_MS
+        actions = turns.on_frame(vad.process(pcm), FRAME_MS, _barge_active(segments, cancels, now))
+        if CANCEL in actions:
+            cancels.append(now)
+        if COMMIT in actions:
+            commits.append(now)
+    return commits, cancels
+
+
+def _barge_active(segments, cancels, now) -> bool:
+    """アシスタントが話している最中にユーザーが話し始めた区間か（キャンセル済みなら False）"""
+    for start, end, barge in segments:
+        if barge and start < now <= end + 1000:
+            return not any(c > start for c in cancels)
+    return False
+
+
+def score(commits, cancels, segments) -> dict:
+    end_to_commit, onset_to_cancel, premature = [], [], 0
+    for start, end, barge in segments:
+        after = [c - end for c in commits if c >= end]
+        if after:
+            end_to_commit.append(after[0])
+        premature += sum(1 for c in commits if start < c < end)
+        if barge:
+            hits = [c - start for c in cancels if c >= start]
+            if hits:
+                onset_to_cancel.append(hits[0])
+    return {"end_to_commit": end_to_commit, "onset_to_cancel": onset_to_cancel,
+            "premature": premature}
+
+
+def _fmt(values) -> str:
+    if not values:
+        return "n/a"
+    return f"p50 {statistics.median(values):6.0f} ms  max {max(values):6.0f} ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=40)
+    args = parser.parse_args()
+
+    frames, segments = render(make_script(args.turns))
+    results = {
+        "legacy": score(*run_legacy(frames, segments), segments),
+        "turns": score(*run_turn_manager(frames, segments), segments),
+    }
+    for name, r in results.items():
+        print(f"{name:<7} speech-end→commit {_fmt(r['end_to_commit'])}   "
+              f"onset→cancel {_fmt(r['onset_to_cancel'])}   mid-speech commits {r['premature']}")
+
+    old, new = results["legacy"], results["turns"]
+    improved = (
+        statistics.median(new["end_to_commit"]) < statistics.median(old["end_to_commit"])
+        and statistics.median(new["onset_to_cancel"]) < statistics.median(old["onset_to_cancel"])
+        and new["premature"] <= old["premature"]
+    )
+    print("OK: turn manager improves latency" if improved else "FAIL: no improvement")
+    return 0 if improved else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# mcp/benchmarks/bench_vad.py
+"""VAD マイクロベンチマーク（1コアあたりの frames/sec）
+
+従来の struct.unpack + generator 実装と VoiceActivityDetector を比較する。
+
+    cd mcp && python -m benchmarks.bench_vad --frames 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import struct
+import time
+
+import numpy as np
+
+from app.services.vad import VoiceActivityDetector
+
+FRAME_BYTES = 1600  # 16kHz × 50ms × 2bytes
+
+
+def _legacy_is_voice(pcm: bytes) -> bool:
+    """realtime.py の旧実装（チャンクごとの struct.unpack）"""
+    samples = struct.unpack(f"{len(pcm)//2}h", pcm)
+    max_amplitude = max(abs(s) for s in samples) if samples else 0
+    return max_amplitude > 100
+
+
+def _make_frames(count: int) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    n = FRAME_BYTES // 2
+    t = np.arange(n) / 16000
+    frames = []
+    for i in range(count):
+        noise = rng.normal(0, 20, n)
+        if (i // 40) % 2:  # 2秒ごとに発話/無音を切り替え
+            noise += 3000 * np.sin(2 * np.pi * 220 * t + i)
+        frames.append(noise.clip(-32768, 32767).astype("<i2").tobytes())
+    return frames
+
+
+def _bench(label: str, fn, frames: list[bytes]) -> float:
+    start = time.perf_counter()
+    for pcm in frames:
+        fn(pcm)
+    elapsed = time.perf_counter() - start
+    rate = len(frames) / elapsed
+    print(f"{label:<10} {rate:>12,.0f} frames/sec  ({elapsed * 1e6 / len(frames):.1f} µs/frame)")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+
+    frames = _make_frames(args.frames)
+    legacy = _bench("legacy", _legacy_is_voice, frames)
+    vad = VoiceActivityDetector()
+    current = _bench("vad", vad.process, frames)
+    print(f"speedup    {current / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# mcp/benchmarks/fake_realtime.py
+"""ローカル用の Realtime API スタンドイン（ベンチマーク・負荷試験用）
+
+realtime.py が使うイベントだけを話す:
+  session.created / session.update → session.updated（input/output_audio_format に従う）
+  input_audio_buffer.append / commit / clear → committed / cleared
+  response.create → response.created → response.audio.delta* → response.done
+    （modalities が ["text"] なら response.text.delta* → response.text.done → response.done）
+  response.cancel → response.done(status=cancelled)
+  conversation.item.create / truncate → created / truncated
+  input_audio_transcription 設定時は commit 後に ...input_audio_transcription.completed
+応答までの遅延、音声の長さ・delta サイズ、エラー率を設定できる。
+
+    cd mcp && python -m benchmarks.fake_realtime --port 9100 --response-latency 0.3
+    OPENAI_REALTIME_URL=ws://127.0.0.1:9100/v1/realtime uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import random
+
+import websockets
+
+# フォーマット → 1秒あたりのバイト数（pcm16 は 24kHz、g711_* は 8kHz）
+BYTES_PER_SEC = {"pcm16": 48000, "g711_ulaw": 8000, "g711_alaw": 8000}
+_ids = itertools.count(1)
+
+
+def _event(typ: str, **fields) -> str:
+    return json.dumps({"type": typ, "event_id": f"event_{next(_ids)}", **fields},
+                      separators=(",", ":"))
+
+
+class FakeRealtimeServer:
+    """Realtime API のスタンドイン
+
+    latency          : 接続直後・session.update への応答遅延（秒）。TLS/ハンドシェイクの代わり
+    response_latency : response.create から最初の音声 delta までの遅延（秒）
+    audio_ms         : 1応答あたりの音声長
+    delta_ms         : 1 delta あたりの音声長
+    speed            : 音声 delta の送出速度（実時間の何倍か。0 なら待たずに一気に送る）
+    error_rate       : response.create をエラーで返す確率
+    transcript       : 患者の発話の文字起こし（毎ターン同じ）
+    answer           : 応答テキスト（response.audio_transcript.delta / response.text.delta）
+    text_delta_ms    : テキストのみの応答で text.delta（text_delta_chars 文字）を送る間隔
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency: float = 0.05,
+        response_latency: float = 0.3,
+        audio_ms: int = 2000,
+        delta_ms: int = 100,
+        speed: float = 4.0,
+        error_rate: float = 0.0,
+        transcript: str = "こんにちは。",
+        answer: str = "こんにちは。今日はどうされましたか？",
+        transcribe_latency: float = 0.2,
+        text_delta_ms: int = 30,
+        text_delta_chars: int = 3,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.response_latency = response_latency
+        self.audio_ms = audio_ms
+        self.delta_ms = delta_ms
+        self.speed = speed
+        self.error_rate = error_rate
+        self.transcript = transcript
+        self.answer = answer
+        self.transcribe_latency = transcribe_latency
+        self.text_delta_ms = text_delta_ms
+        self.text_delta_chars = text_delta_chars
+        self.connections = 0
+        self.stats = {"appended_bytes": 0, "commits": 0, "responses": 0, "cancels": 0, "errors": 0}
+        self._server = None
+        # 無音の delta をフォーマットごとに用意（G.711 の無音は 0xFF / 0xD5）
+        silence = {"pcm16": b"\x00\x00", "g711_ulaw": b"\xff", "g711_alaw": b"\xd5"}
+        self._deltas = {
+            fmt: base64.b64encode(silence[fmt] * (BYTES_PER_SEC[fmt] * delta_ms // 1000
+                                                  // len(silence[fmt]))).decode()
+            for fmt in BYTES_PER_SEC
+        }
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/v1/realtime"
+
+    async def start(self) -> "FakeRealtimeServer":
+        self._server = await websockets.serve(self._handle, self.host, self.port, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> "FakeRealtimeServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    # ------------------------------------------------------------------ session
+
+    async def _handle(self, ws, path: str = "") -> None:
+        self.connections += 1
+        session_id = f"sess_{self.connections}"
+        items = itertools.count(1)
+        buffered = 0
+        formats = {"input_audio_format": "pcm16", "output_audio_format": "pcm16"}
+        transcribe = False
+        modalities = ["text", "audio"]
+        responding: asyncio.Task | None = None
+
+        await asyncio.sleep(self.latency)
+        await ws.send(_event("session.created", session={"id": session_id}))
+        try:
+            async for raw in ws:
+                if not isinstance(raw, str):
+                    continue
+                msg = json.loads(raw)
+                typ = msg.get("type")
+                if typ == "session.update":
+                    transcribe = bool(msg.get("session", {}).get("input_audio_transcription"))
+                    modalities = msg.get("session", {}).get("modalities", modalities)
+                    formats.update({k: v for k, v in msg.get("session", {}).items()
+                                    if k in formats and v in BYTES_PER_SEC})
+                    await asyncio.sleep(self.latency)
+                    await ws.send(_event("session.updated", session=msg.get("session", {})))
+                elif typ == "input_audio_buffer.append":
+                    n = len(msg.get("audio", "")) * 3 // 4
+                    buffered += n
+                    self.stats["appended_bytes"] += n
+                elif typ == "input_audio_buffer.commit":
+                    if buffered < BYTES_PER_SEC[formats["input_audio_format"]] // 10:  # 100ms 未満
+                        await ws.send(_event("error", error={
+                            "type": "invalid_request_error",
+                            "code": "input_audio_buffer_commit_empty"}))
+                        continue
+                    buffered = 0
+                    self.stats["commits"] += 1
+                    item_id = f"item_u{next(items)}"
+                    await ws.send(_event("input_audio_buffer.committed", item_id=item_id))
+                    await ws.send(_event("conversation.item.created", item={
+                        "id": item_id, "type": "message", "role": "user"}))
+                    if transcribe:
+                        asyncio.create_task(self._transcribe(ws, item_id))
+                elif typ == "input_audio_buffer.clear":
+                    buffered = 0
+                    await ws.send(_event("input_audio_buffer.cleared"))
+                elif typ == "response.create":
+                    if responding is not None and not responding.done():
+                        await ws.send(_event("error", error={
+                            "type": "invalid_request_error",
+                            "code": "conversation_already_has_active_response"}))
+                        continue
+                    text_only = "audio" not in (msg.get("response", {}).get("modalities") or modalities)
+                    responding = asyncio.create_task(self._respond(
+                        ws, f"item_a{next(items)}", self._deltas[formats["output_audio_format"]],
+                        text_only))
+                elif typ == "response.cancel":
+                    if responding is not None and not responding.done():
+                        self.stats["cancels"] += 1
+                        responding.cancel()
+                elif typ == "conversation.item.create":
+                    await ws.send(_event("conversation.item.created", item=msg.get("item", {})))
+                elif typ == "conversation.item.truncate":
+                    await ws.send(_event("conversation.item.truncated", item_id=msg.get("item_id"),
+                                         content_index=0, audio_end_ms=msg.get("audio_end_ms")))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if responding is not None:
+                responding.cancel()
+
+    async def _transcribe(self, ws, item_id: str) -> None:
+        await asyncio.sleep(self.transcribe_latency)
+        try:
+            await ws.send(_event("conversation.item.input_audio_transcription.completed",
+                                 item_id=item_id, content_index=0, transcript=self.transcript))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _respond(self, ws, item_id: str, delta: str, text_only: bool = False) -> None:
+        self.stats["responses"] += 1
+        response_id = f"resp_{next(_ids)}"
+        status = "completed"
+        await ws.send(_event("response.created", response={"id": response_id, "status": "in_progress"}))
+        try:
+            await asyncio.sleep(self.response_latency)
+            if random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                await ws.send(_event("error", error={"type": "server_error", "code": "server_error"}))
+                status = "failed"
+                return
+            if text_only:
+                await self._respond_text(ws, response_id, item_id)
+                return
+            await ws.send(_event("response.audio_transcript.delta", response_id=response_id,
+                                 item_id=item_id, output_index=0, content_index=0,
+                                 delta=self.answer))
+            pace = self.delta_ms / 1000 / self.speed if self.speed > 0 else 0
+            for _ in range(max(1, self.audio_ms // self.delta_ms)):
+                await ws.send(_event("response.audio.delta", response_id=response_id,
+                                     item_id=item_id, output_index=0, content_index=0,
+                                     delta=delta))
+                if pace:
+                    await asyncio.sleep(pace)
+        except asyncio.CancelledError:
+            status = "cancelled"
+        finally:
+            try:
+                content = ({"type": "text", "text": self.answer} if text_only
+                           else {"type": "audio", "transcript": self.answer})
+                await ws.send(_event("response.done", response={
+                    "id": response_id, "status": status,
+                    "output": [{"id": item_id, "type": "message", "role": "assistant",
+                                "content": [content]}],
+                }))
+            except websockets.ConnectionClosed:
+                pass
+
+
+    async def _respond_text(self, ws, response_id: str, item_id: str) -> None:
+        """テキストのみの応答（LLM のトークン生成のペースで delta を送る）"""
+        n = self.text_delta_chars
+        for i in range(0, len(self.answer), n):
+            await ws.send(_event("response.text.delta", response_id=response_id, item_id=item_id,
+                                 output_index=0, content_index=0, delta=self.answer[i:i + n]))
+            await asyncio.sleep(self.text_delta_ms / 1000)
+        await ws.send(_event("response.text.done", response_id=response_id, item_id=item_id,
+                             output_index=0, content_index=0, text=self.answer))
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--response-latency", type=float, default=0.3)
+    parser.add_argument("--audio-ms", type=int, default=2000)
+    parser.add_argument("--delta-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=4.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--transcript", default="こんにちは。")
+    parser.add_argument("--answer", default="こんにちは。今日はどうされましたか？")
+    args = parser.parse_args()
+    server = await FakeRealtimeServer(
+        args.host, args.port, latency=args.latency, response_latency=args.response_latency,
+        audio_ms=args.audio_ms, delta_ms=args.delta_ms, speed=args.speed,
+        error_rate=args.error_rate, transcript=args.transcript, answer=args.answer,
+    ).start()
+    print(f"fake realtime server: {server.url}", flush=True)
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
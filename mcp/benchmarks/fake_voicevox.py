@@ -0,0 +1,156 @@
+# mcp/benchmarks/fake_voicevox.py
+"""ローカル用の VOICEVOX エンジンのスタンドイン（ベンチマーク・負荷試験用）
+
+tts.VoicevoxClient が使う API だけを話す:
+  POST /audio_query?text=...&speaker=N → AudioQuery（JSON）
+  POST /synthesis?speaker=N（AudioQuery）→ WAV（16bit モノラル、outputSamplingRate）
+音声の長さは文字数 × ms_per_char / speedScale。合成時間は synth_latency + 音声長 × rtf
+（実エンジンの CPU 版はおよそ rtf 0.1〜0.3）。同時合成数は max_parallel で制限できる。
+
+    cd mcp && python -m benchmarks.fake_voicevox --port 50021
+    TTS_MODE=voicevox VOICEVOX_URL=http://127.0.0.1:50021 uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import wave
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+class FakeVoicevoxServer:
+    """VOICEVOX エンジンのスタンドイン
+
+    query_latency : audio_query の応答遅延（秒）
+    synth_latency : synthesis の固定遅延（秒）
+    rtf           : 合成時間 / 音声長（real time factor）
+    ms_per_char   : 1文字あたりの音声長
+    max_parallel  : 同時に合成できる数（実エンジンは CPU コア数程度）
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        query_latency: float = 0.02,
+        synth_latency: float = 0.05,
+        rtf: float = 0.15,
+        ms_per_char: int = 120,
+        max_parallel: int = 4,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.query_latency = query_latency
+        self.synth_latency = synth_latency
+        self.rtf = rtf
+        self.ms_per_char = ms_per_char
+        self._slots = asyncio.Semaphore(max_parallel)
+        self.stats = {"audio_query": 0, "synthesis": 0, "max_concurrent": 0}
+        self._concurrent = 0
+        self._server: uvicorn.Server | None = None
+        self._task: asyncio.Task | None = None
+        self.app = self._make_app()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _make_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/version")
+        async def version():
+            return "0.0.0-fake"
+
+        @app.post("/audio_query")
+        async def audio_query(text: str, speaker: int):
+            self.stats["audio_query"] += 1
+            await asyncio.sleep(self.query_latency)
+            return {
+                "accent_phrases": [],
+                "speedScale": 1.0,
+                "pitchScale": 0.0,
+                "intonationScale": 1.0,
+                "volumeScale": 1.0,
+                "prePhonemeLength": 0.1,
+                "postPhonemeLength": 0.1,
+                "outputSamplingRate": 24000,
+                "outputStereo": False,
+                "kana": text,
+            }
+
+        @app.post("/synthesis")
+        async def synthesis(speaker: int, request: Request):
+            query = await request.json()
+            rate = int(query.get("outputSamplingRate", 24000))
+            seconds = len(query.get("kana", "")) * self.ms_per_char / 1000 / float(
+                query.get("speedScale", 1.0) or 1.0)
+            async with self._slots:
+                self._concurrent += 1
+                self.stats["max_concurrent"] = max(self.stats["max_concurrent"], self._concurrent)
+                try:
+                    await asyncio.sleep(self.synth_latency + seconds * self.rtf)
+                finally:
+                    self._concurrent -= 1
+            self.stats["synthesis"] += 1
+            return Response(_wav(rate, seconds, speaker), media_type="audio/wav")
+
+        return app
+
+    async def start(self) -> "FakeVoicevoxServer":
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning",
+                                lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            await asyncio.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._task
+
+    async def __aenter__(self) -> "FakeVoicevoxServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+
+def _wav(rate: int, seconds: float, speaker: int) -> bytes:
+    t = np.arange(int(rate * seconds)) / rate
+    pcm = (3000 * np.sin(2 * np.pi * (200 + 20 * speaker) * t)).astype("<i2").tobytes()
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50021)
+    parser.add_argument("--synth-latency", type=float, default=0.05)
+    parser.add_argument("--rtf", type=float, default=0.15)
+    parser.add_argument("--max-parallel", type=int, default=4)
+    args = parser.parse_args()
+    server = await FakeVoicevoxServer(args.host, args.port, synth_latency=args.synth_latency,
+                                      rtf=args.rtf, max_parallel=args.max_parallel).start()
+    print(f"fake voicevox engine: {server.url}", flush=True)
+    await server._task
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,177 @@
+# mcp/benchmarks/load_test.py
+"""リレー1ワーカーの負荷試験（容量見積もり用）
+
+FakeRealtimeServer と uvicorn（1ワーカー）を子プロセスで起動し、
+合成クライアント数を段階的に増やしながら次を測る:
+
+  - ターンレイテンシ p50 / p99（発話終了 → 最初の下り音声）
+  - CPU / セッション（1コアに対する %、/proc/<pid>/stat の utime+stime）
+  - メモリ / セッション（VmRSS の増分）
+  - 1ワーカーあたりの最大同時セッション数
+    （p99 が --slo-ms 以内・失敗なし・CPU が --cpu-limit 未満だった最大段）
+
+OpenAI には一切接続しない（OPENAI_REALTIME_URL をスタンドインに向ける）。Linux 専用。
+--tts voicevox ではテキスト応答 + VOICEVOX のスタンドイン（benchmarks/fake_voicevox.py）で測る。
+
+    cd mcp && python -m benchmarks.load_test --levels 5,10,20,40 --duration 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from app.services.codec import CODECS
+
+from .swarm import run_swarm
+
+MCP_DIR = Path(__file__).resolve().parent.parent
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / _CLK_TCK  # utime + stime
+
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _wait_http(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"relay did not come up: {url}")
+
+
+def _wait_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"stand-in server did not come up on :{port}")
+
+
+def _spawn(args: argparse.Namespace) -> tuple[list[subprocess.Popen], subprocess.Popen, int]:
+    fake_port, relay_port = _free_port(), _free_port()
+    fakes = [subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_realtime", "--port", str(fake_port),
+         "--response-latency", str(args.response_latency), "--audio-ms", str(args.audio_ms)],
+        cwd=MCP_DIR, stdout=subprocess.DEVNULL,
+    )]
+    _wait_port(fake_port)
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-loadtest"),
+        "OPENAI_REALTIME_URL": f"ws://127.0.0.1:{fake_port}/v1/realtime",
+        "TTS_MODE": args.tts,
+    }
+    if args.tts == "voicevox":
+        tts_port = _free_port()
+        fakes.append(subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.fake_voicevox", "--port", str(tts_port)],
+            cwd=MCP_DIR, stdout=subprocess.DEVNULL,
+        ))
+        _wait_port(tts_port)
+        env["VOICEVOX_URL"] = f"http://127.0.0.1:{tts_port}"
+    relay = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(relay_port),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=MCP_DIR, env=env, stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    _wait_http(f"http://127.0.0.1:{relay_port}/health")
+    return fakes, relay, relay_port
+
+
+async def _run(args: argparse.Namespace) -> int:
+    fakes, relay, port = _spawn(args)
+    url = f"ws://127.0.0.1:{port}/ws/audio"
+    best = 0
+    try:
+        await asyncio.sleep(1.0)  # 事前接続プールの充填を待つ
+        base_rss = _rss_mb(relay.pid)
+        print(f"relay pid {relay.pid}  baseline RSS {base_rss:.1f} MB")
+        print(f"{'sessions':>8}  {'p50':>8}  {'p99':>8}  {'CPU/sess':>9}  "
+              f"{'RSS/sess':>9}  {'CPU':>6}  unanswered  failed")
+        for level in args.levels:
+            cpu0, t0 = _cpu_seconds(relay.pid), time.monotonic()
+            result = await run_swarm(url, level, args.duration, ramp=args.ramp,
+                                     speech_ms=args.speech_ms, silence_ms=args.silence_ms,
+                                     audio_format=args.format)
+            # 全員が接続している時点の RSS を見たいので終了直後に読む
+            rss = _rss_mb(relay.pid)
+            cpu = (_cpu_seconds(relay.pid) - cpu0) / (time.monotonic() - t0) * 100
+            p50, p99 = result.quantile(0.5), result.quantile(0.99)
+            ok = (p99 is not None and p99 <= args.slo_ms and not result.failed
+                  and cpu < args.cpu_limit)
+            print(f"{level:8d}  {p50 or 0:6.0f}ms  {p99 or 0:6.0f}ms  {cpu / level:8.2f}%  "
+                  f"{max(0.0, rss - base_rss) / level:6.2f} MB  {cpu:5.1f}%  "
+                  f"{result.unanswered:10d}  {result.failed:6d}  {'ok' if ok else 'over'}")
+            if ok:
+                best = level
+            elif args.stop_on_fail:
+                break
+            await asyncio.sleep(1.0)
+    finally:
+        for proc in (relay, *fakes):
+            proc.terminate()
+            try:
+                proc.wait(5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    print(f"max concurrent sessions per worker (p99 ≤ {args.slo_ms:.0f} ms, "
+          f"CPU < {args.cpu_limit:.0f}%): {best if best else 'none'}")
+    return 0 if best else 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")],
+                        default=[5, 10, 20, 40], help="comma separated session counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds to connect all clients")
+    parser.add_argument("--speech-ms", type=int, default=1500)
+    parser.add_argument("--silence-ms", type=int, default=3000)
+    parser.add_argument("--format", default="pcm16", choices=sorted(CODECS))
+    parser.add_argument("--response-latency", type=float, default=0.3)
+    parser.add_argument("--audio-ms", type=int, default=2000)
+    parser.add_argument("--tts", default="realtime", choices=["realtime", "voicevox"],
+                        help="TTS_MODE of the relay")
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="p99 turn latency budget")
+    parser.add_argument("--cpu-limit", type=float, default=85.0, help="%% of one core")
+    parser.add_argument("--stop-on-fail", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="show relay logs")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
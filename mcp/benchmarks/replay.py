@@ -0,0 +1,284 @@
+# mcp/benchmarks/replay.py
+"""録音したセッション（SESSION_RECORD=true）をリレーに流し直す
+
+テープの上り音声を記録時と同じ間隔（--speed 倍速）で Unity 側から送り、
+Realtime API 側にはテープの下りイベントを返すスタンドイン（ScriptedRealtimeServer）を置く。
+リレーが送ったイベント（commit / response.create / cancel ...）の n 回目に、
+記録時の n 回目の後に届いたイベントを同じ遅延で返すので、
+リレー側の判断（ターン判定・バージイン・キャッシュ）が変わらなければ同じセッションが再現される。
+
+出力（ターンごと）:
+  commit   : コミットの時刻（記録時 / 再生時、上り音声の先頭から。drift はターン判定のずれ）
+  first    : response.create → Unity に最初の下り音声が届くまで（再生時）
+  upstream : 記録時の response.create → 最初の音声 delta（上流の遅延。スタンドインが再現する分）
+
+--speed を上げると上り音声と上流の遅延は縮むが、Unity への下り音声は実時間でペーシングされるので
+応答の再生中に次の発話が来てバージインになることがある（divergence に truncate 等が出る）。
+ターン判定の再現には --speed 1 を使う。
+
+    cd mcp && python -m benchmarks.replay recordings/20250101T000000-abcd...-1f2e.000.mcprec --speed 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+import websockets
+
+from app.services.session_recorder import DOWNLINK, UPLINK, UPSTREAM, read_tape
+
+from .load_test import MCP_DIR, _free_port, _wait_http
+
+# リレーが送るとスタンドインが記録済みのイベントを返すもの
+_TRIGGERS = frozenset({
+    "input_audio_buffer.commit",
+    "input_audio_buffer.clear",
+    "response.create",
+    "response.cancel",
+    "conversation.item.create",
+    "conversation.item.truncate",
+})
+_SKIP = frozenset({"session.created", "session.updated"})
+_ids = itertools.count(1)
+
+
+def _type(text: str) -> str:
+    return json.loads(text).get("type", "")
+
+
+class Script:
+    """テープ → 再生用の台本"""
+
+    def __init__(self, path: str) -> None:
+        records = list(read_tape(path))
+        if not records:
+            raise ValueError(f"empty tape: {path}")
+        self.meta = json.loads(records[0].text)
+        uplink = [r for r in records if r.kind == UPLINK]
+        if not uplink:
+            raise ValueError(f"no uplink audio in tape: {path}")
+        origin = uplink[0].t
+        self.uplink = [(r.t - origin, r.payload) for r in uplink]
+        # トリガー種別 → n 回目に返すイベント [(トリガーからの遅延, イベント)]
+        self.groups: dict[str, list[list[tuple[float, str]]]] = defaultdict(list)
+        # サーバー VAD のイベントは上り音声のタイムライン上に置く
+        self.timed: list[tuple[float, str]] = []
+        self.commits: list[float] = []
+        self.upstream_first_audio: list[float | None] = []
+
+        current: tuple[float, list[tuple[float, str]]] | None = None
+        waiting_audio: float | None = None
+        for r in records:
+            if r.kind == UPSTREAM:
+                typ = _type(r.text)
+                if typ not in _TRIGGERS:
+                    continue
+                current = (r.t, [])
+                self.groups[typ].append(current[1])
+                if typ == "input_audio_buffer.commit":
+                    self.commits.append(r.t - origin)
+                elif typ == "response.create":
+                    if waiting_audio is not None:
+                        self.upstream_first_audio.append(None)
+                    waiting_audio = r.t
+            elif r.kind == DOWNLINK:
+                typ = _type(r.text)
+                if typ in _SKIP:
+                    continue
+                if typ.startswith("input_audio_buffer.speech_"):
+                    self.timed.append((r.t - origin, r.text))
+                elif current is not None:
+                    current[1].append((r.t - current[0], r.text))
+                if typ == "response.audio.delta" and waiting_audio is not None:
+                    self.upstream_first_audio.append(r.t - waiting_audio)
+                    waiting_audio = None
+        if waiting_audio is not None:
+            self.upstream_first_audio.append(None)
+
+    @property
+    def query(self) -> str:
+        params = {k: v for k, v in self.meta.get("query", {}).items() if k != "session_id"}
+        return urlencode(params)
+
+
+class ScriptedRealtimeServer:
+    """台本どおりに返す Realtime API のスタンドイン（接続ごとに台本の先頭から）"""
+
+    def __init__(self, script: Script, speed: float = 1.0) -> None:
+        self.script = script
+        self.speed = speed
+        self.origin: float | None = None                  # クライアントが上り音声を送り始めた時刻
+        self.observed: list[tuple[str, float]] = []      # (トリガー, perf_counter)
+        self.divergences: list[str] = []
+        self._server = None
+        self.port = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/v1/realtime"
+
+    async def start(self) -> "ScriptedRealtimeServer":
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, ws, path: str = "") -> None:
+        cursors: dict[str, int] = defaultdict(int)
+        tasks: list[asyncio.Task] = []
+        timed: asyncio.Task | None = None
+        await ws.send(json.dumps({"type": "session.created", "session": {"id": "sess_replay"}}))
+        try:
+            async for raw in ws:
+                if not isinstance(raw, str):
+                    continue
+                typ = _type(raw)
+                if typ == "session.update":
+                    await ws.send(json.dumps({"type": "session.updated",
+                                              "session": json.loads(raw).get("session", {})}))
+                elif typ == "input_audio_buffer.append":
+                    if timed is None and self.script.timed:
+                        timed = asyncio.create_task(self._play_timed(ws))
+                        tasks.append(timed)
+                elif typ in _TRIGGERS:
+                    self.observed.append((typ, time.perf_counter()))
+                    n = cursors[typ]
+                    cursors[typ] += 1
+                    groups = self.script.groups.get(typ, [])
+                    if n < len(groups):
+                        tasks.append(asyncio.create_task(self._play(ws, groups[n])))
+                    else:
+                        self.divergences.append(f"{typ} #{n + 1} not in recording")
+                        if typ == "response.create":
+                            tasks.append(asyncio.create_task(self._empty_response(ws)))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _play(self, ws, events: list[tuple[float, str]]) -> None:
+        start = time.perf_counter()
+        for delay, event in events:
+            await asyncio.sleep(max(0.0, start + delay / self.speed - time.perf_counter()))
+            await ws.send(event)
+
+    async def _play_timed(self, ws) -> None:
+        for t, event in self.script.timed:
+            await asyncio.sleep(max(0.0, (self.origin or 0) + t / self.speed - time.perf_counter()))
+            await ws.send(event)
+
+    async def _empty_response(self, ws) -> None:
+        response_id = f"resp_replay_{next(_ids)}"
+        await ws.send(json.dumps({"type": "response.created", "response": {"id": response_id}}))
+        await ws.send(json.dumps({"type": "response.done",
+                                  "response": {"id": response_id, "status": "completed", "output": []}}))
+
+
+async def _run_client(url: str, script: Script, server: ScriptedRealtimeServer,
+                      speed: float, tail: float) -> list[float]:
+    """上り音声を記録時の間隔で送り、下り音声の到着時刻を返す"""
+    arrivals: list[float] = []
+
+    async def receive(ws) -> None:
+        try:
+            async for msg in ws:
+                if isinstance(msg, bytes):
+                    arrivals.append(time.perf_counter())
+        except websockets.ConnectionClosed:
+            pass
+
+    async with websockets.connect(f"{url}?{script.query}", max_size=None) as ws:
+        receiver = asyncio.create_task(receive(ws))
+        server.origin = origin = time.perf_counter()
+        for t, frame in script.uplink:
+            await asyncio.sleep(max(0.0, origin + t / speed - time.perf_counter()))
+            await ws.send(frame)
+        await asyncio.sleep(tail)  # 最後の応答を待つ
+        receiver.cancel()
+    return arrivals
+
+
+def _report(script: Script, server: ScriptedRealtimeServer, arrivals: list[float],
+            speed: float) -> None:
+    origin = server.origin or 0.0
+    commits = [(t - origin) * speed for typ, t in server.observed if typ == "input_audio_buffer.commit"]
+    creates = [t for typ, t in server.observed if typ == "response.create"]
+
+    print(f"session {script.meta.get('session_id', '?')}  format {script.meta.get('format', {})}")
+    print(f"{'turn':>4}  {'commit rec':>10}  {'commit replay':>13}  {'drift':>8}"
+          f"  {'first':>8}  {'upstream':>8}")
+    firsts = []
+    for i in range(max(len(script.commits), len(commits), len(creates))):
+        rec = script.commits[i] if i < len(script.commits) else None
+        rep = commits[i] if i < len(commits) else None
+        first = None
+        if i < len(creates):
+            end = creates[i + 1] if i + 1 < len(creates) else float("inf")
+            first = next(((a - creates[i]) * 1000 for a in arrivals if creates[i] <= a < end), None)
+        if first is not None:
+            firsts.append(first)
+        up = script.upstream_first_audio[i] if i < len(script.upstream_first_audio) else None
+        fmt = lambda v, unit="s": "-" if v is None else (f"{v:.2f}s" if unit == "s" else f"{v:.0f}ms")  # noqa: E731
+        drift = None if rec is None or rep is None else (rep - rec) * 1000
+        print(f"{i + 1:4d}  {fmt(rec):>10}  {fmt(rep):>13}  {fmt(drift, 'ms'):>8}"
+              f"  {fmt(first, 'ms'):>8}  {fmt(None if up is None else up * 1000, 'ms'):>8}")
+
+    if firsts:
+        p99 = statistics.quantiles(firsts, n=100, method="inclusive")[98] if len(firsts) > 1 else firsts[0]
+        print(f"first audio: p50 {statistics.median(firsts):.0f} ms  p99 {p99:.0f} ms  ({len(firsts)} responses)")
+    print(f"turns: recorded {len(script.commits)}  replayed {len(commits)}")
+    for divergence in server.divergences:
+        print(f"  divergence: {divergence}")
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tape", help="any segment (*.mcprec) of the recorded session")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (2 = twice as fast)")
+    parser.add_argument("--tail", type=float, default=3.0, help="seconds to wait after the last frame")
+    parser.add_argument("--verbose", action="store_true", help="show relay logs")
+    args = parser.parse_args()
+
+    script = Script(args.tape)
+    server = await ScriptedRealtimeServer(script, args.speed).start()
+    relay_port = _free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-replay"),
+        "OPENAI_REALTIME_URL": server.url,
+        "SESSION_RECORD": "false",
+    }
+    relay = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(relay_port),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=MCP_DIR, env=env, stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        await asyncio.to_thread(_wait_http, f"http://127.0.0.1:{relay_port}/health")
+        arrivals = await _run_client(f"ws://127.0.0.1:{relay_port}/ws/audio", script, server,
+                                     args.speed, args.tail)
+        _report(script, server, arrivals, args.speed)
+    finally:
+        relay.terminate()
+        await asyncio.to_thread(relay.wait)  # 終了時の close ハンドシェイクにスタンドインが応答できるように
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,185 @@
+# mcp/benchmarks/swarm.py
+"""合成 Unity クライアントの群れ（/ws/audio に実時間ペースで PCM16 を流す）
+
+各クライアントは「発話 → 無音」を繰り返し、発話の最後のフレームを送ってから
+最初の下り音声バイトが届くまでをターンレイテンシとして記録する。
+
+    cd mcp && python -m benchmarks.swarm --url ws://127.0.0.1:8000/ws/audio --clients 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import websockets
+
+from app.services.codec import CODECS
+
+RATE = 16000
+FRAME_MS = 50
+
+
+@dataclass
+class ClientResult:
+    turns: int = 0
+    latencies_ms: list[float] = field(default_factory=list)
+    downlink_bytes: int = 0
+    error: str | None = None
+    busy: bool = False          # 受付制御で断られた（クローズコード 1013）
+
+
+@dataclass
+class SwarmResult:
+    clients: list[ClientResult]
+    elapsed: float
+
+    @property
+    def latencies_ms(self) -> list[float]:
+        return [v for c in self.clients for v in c.latencies_ms]
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for c in self.clients if c.error)
+
+    @property
+    def busy(self) -> int:
+        return sum(1 for c in self.clients if c.busy)
+
+    @property
+    def unanswered(self) -> int:
+        return sum(c.turns - len(c.latencies_ms) for c in self.clients)
+
+    def quantile(self, q: float) -> float | None:
+        samples = self.latencies_ms
+        if len(samples) < 2:
+            return samples[0] if samples else None
+        return statistics.quantiles(samples, n=100, method="inclusive")[int(q * 100) - 1]
+
+
+def _frames(speech: bool, ms: int, rng: np.random.Generator, rate: int) -> list[bytes]:
+    n = rate * FRAME_MS // 1000
+    t = np.arange(n) / rate
+    out = []
+    for k in range(ms // FRAME_MS):
+        x = rng.normal(0, 15, n)
+        if speech:
+            x += 2500 * np.sin(2 * np.pi * (180 + 40 * np.sin(k)) * t + k)
+        out.append(x.clip(-32768, 32767).astype("<i2").tobytes())
+    return out
+
+
+async def run_client(
+    url: str,
+    duration: float,
+    *,
+    speech_ms: int = 1500,
+    silence_ms: int = 3000,
+    rate: int = RATE,
+    audio_format: str = "pcm16",
+    session_id: str | None = None,
+    resume_token: str | None = None,
+    seed: int = 0,
+) -> ClientResult:
+    """1クライアント分: duration 秒のあいだ発話と無音を繰り返す"""
+    result = ClientResult()
+    rng = np.random.default_rng(seed)
+    codec = CODECS[audio_format]
+    rate = codec.sample_rate or rate
+    query = f"format={audio_format}" if codec.sample_rate else f"input_rate={rate}"
+    if session_id and resume_token:
+        # 再接続（セッション再開）: 前回の X-Session-Id / X-Resume-Token
+        query += f"&session_id={session_id}&resume_token={resume_token}"
+
+    def frames(speech: bool, ms: int) -> list[bytes]:
+        return [codec.encode(f) for f in _frames(speech, ms, rng, rate)]
+
+    # 開始位置をずらして全クライアントの発話終了が揃わないようにする
+    lead = frames(False, FRAME_MS * int(rng.integers(4, 40)))
+    speech = frames(True, speech_ms)
+    silence = frames(False, silence_ms)
+    speech_end: float | None = None
+
+    async def receive(ws) -> None:
+        nonlocal speech_end
+        try:
+            async for msg in ws:
+                if not isinstance(msg, bytes):
+                    continue
+                result.downlink_bytes += len(msg)
+                if speech_end is not None:
+                    result.latencies_ms.append((time.perf_counter() - speech_end) * 1000)
+                    speech_end = None
+        except websockets.ConnectionClosed:
+            pass  # 送信側が同じ例外を受けて記録する
+
+    try:
+        async with websockets.connect(f"{url}?{query}", max_size=None) as ws:
+            receiver = asyncio.create_task(receive(ws))
+            loop = asyncio.get_running_loop()
+            start = next_at = loop.time()
+            first = lead
+            while loop.time() - start < duration:
+                for chunk in first + speech:
+                    await ws.send(chunk)
+                    next_at += FRAME_MS / 1000
+                    await asyncio.sleep(max(0.0, next_at - loop.time()))
+                result.turns += 1
+                speech_end = time.perf_counter()
+                for chunk in silence:
+                    await ws.send(chunk)
+                    next_at += FRAME_MS / 1000
+                    await asyncio.sleep(max(0.0, next_at - loop.time()))
+                first = []
+            receiver.cancel()
+    except (OSError, websockets.WebSocketException) as exc:
+        result.error = repr(exc)
+        result.busy = isinstance(exc, websockets.ConnectionClosed) and exc.code == 1013
+    return result
+
+
+async def run_swarm(url: str, clients: int, duration: float, *, ramp: float = 1.0,
+                    **client_kwargs) -> SwarmResult:
+    """clients 個を ramp 秒かけて順に接続し、全員の終了を待つ"""
+    start = time.perf_counter()
+
+    async def delayed(i: int) -> ClientResult:
+        await asyncio.sleep(ramp * i / max(1, clients))
+        return await run_client(url, duration, seed=i, **client_kwargs)
+
+    results = await asyncio.gather(*(delayed(i) for i in range(clients)))
+    return SwarmResult(list(results), time.perf_counter() - start)
+
+
+def format_result(result: SwarmResult) -> str:
+    p50, p99 = result.quantile(0.5), result.quantile(0.99)
+    fmt = lambda v: f"{v:7.1f} ms" if v is not None else "      - ms"  # noqa: E731
+    return (f"turns {sum(c.turns for c in result.clients):4d}  "
+            f"p50 {fmt(p50)}  p99 {fmt(p99)}  "
+            f"unanswered {result.unanswered}  failed {result.failed} (busy {result.busy})")
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/audio")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--speech-ms", type=int, default=1500)
+    parser.add_argument("--silence-ms", type=int, default=3000)
+    parser.add_argument("--format", default="pcm16", choices=sorted(CODECS))
+    args = parser.parse_args()
+    result = await run_swarm(args.url, args.clients, args.duration,
+                             speech_ms=args.speech_ms, silence_ms=args.silence_ms,
+                             audio_format=args.format)
+    print(format_result(result))
+    for c in result.clients:
+        if c.error:
+            print(f"  error: {c.error}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
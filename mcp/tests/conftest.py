@@ -0,0 +1,6 @@
+# mcp/tests/conftest.py
+"""app.core.config は import 時に OPENAI_API_KEY を確認するので、テスト用の値を入れておく"""
+
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
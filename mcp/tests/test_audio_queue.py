@@ -0,0 +1,54 @@
+# mcp/tests/test_audio_queue.py
+"""OutboundAudioQueue: バージイン時のフラッシュと truncate 位置"""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.services.audio_queue import OutboundAudioQueue, Truncation
+
+RATE = 8000  # 16bit mono → 16 bytes/ms
+
+
+def _queue(sent: list[bytes]) -> OutboundAudioQueue:
+    async def send(frame: bytes) -> None:
+        sent.append(frame)
+    return OutboundAudioQueue(send, RATE, lead_ms=100, frame_ms=20)
+
+
+def test_flush_reports_delivered_position_once():
+    async def main():
+        sent: list[bytes] = []
+        queue = _queue(sent)
+        sender = asyncio.create_task(queue.run())
+        try:
+            await queue.put("item_1", b"\0" * 16 * 1000)  # 1秒分
+            await asyncio.sleep(0.05)
+            first = queue.flush()
+            assert isinstance(first, Truncation) and first.item_id == "item_1"
+            assert first.audio_end_ms == len(b"".join(sent)) // 16
+
+            # 次の応答の音声が届く前の2回目のバージイン: 同じ item を再び truncate しない
+            assert queue.flush() is None
+
+            await queue.put("item_2", b"\0" * 16 * 40)
+            await asyncio.sleep(0.05)
+            second = queue.flush()
+            assert second == Truncation("item_2", 40)
+        finally:
+            sender.cancel()
+
+    asyncio.run(main())
+
+
+def test_flush_discards_queued_audio():
+    async def main():
+        sent: list[bytes] = []
+        queue = _queue(sent)
+        await queue.put("item_1", b"\0" * 16 * 500)
+        assert queue.queued_bytes == 16 * 500
+        assert queue.flush() is None  # まだ何も送っていない
+        assert queue.queued_bytes == 0 and not queue.pending
+        assert queue.metrics()["flushed_bytes"] == 16 * 500
+
+    asyncio.run(main())
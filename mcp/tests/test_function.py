@@ -0,0 +1,69 @@
+# mcp/tests/test_function.py
+"""FunctionEngine: 結果キャッシュのキーと、上流が切れたときの後始末"""
+
+from __future__ import annotations
+
+import asyncio
+
+from websockets.exceptions import ConnectionClosed
+
+from app.services.cache import ResultCache, TTLCache, make_key
+from app.services.function import FunctionEngine, ToolSpec
+
+
+def test_identifiers_are_keyed_verbatim():
+    assert make_key("patient_lookup", {"patient_id": "ab12"}) != make_key("patient_lookup", {"patient_id": "AB12"})
+    assert make_key("patient_lookup", {"patient_id": "12"}) != make_key("patient_lookup", {"patient_id": "１２"})
+    assert make_key("t", {"a": 1, "b": "x"}) == make_key("t", {"b": "x", "a": 1})
+
+
+def test_declared_free_text_fields_are_normalized():
+    fields = ("query",)
+    assert make_key("search_medical", {"query": " 頭痛　"}, fields) == make_key("search_medical", {"query": "頭痛"}, fields)
+    assert (make_key("search_medical", {"query": "頭痛", "patient_id": "AB12"}, fields)
+            != make_key("search_medical", {"query": "頭痛", "patient_id": "ab12"}, fields))
+
+
+def _engine(handler, runtime=None) -> FunctionEngine:
+    spec = ToolSpec({"name": "patient_lookup", "runtime": {"cache_ttl": 60, **(runtime or {})}})
+    return FunctionEngine({"patient_lookup": spec}, ResultCache(TTLCache()), {},
+                          router={"patient_lookup": handler})
+
+
+def test_patients_differing_by_case_do_not_share_results():
+    async def lookup(args: dict) -> dict:
+        return {"patient_id": args["patient_id"]}
+
+    async def main():
+        engine = _engine(lookup)
+        assert await engine.call("patient_lookup", {"patient_id": "ab12"}) == {"patient_id": "ab12"}
+        assert await engine.call("patient_lookup", {"patient_id": "AB12"}) == {"patient_id": "AB12"}
+        assert engine.stats["cache_hits"] == 0
+
+    asyncio.run(main())
+
+
+class _ClosedUpstream:
+    async def send(self, message: str) -> None:
+        raise ConnectionClosed(None, None)
+
+
+class _Session:
+    id = 1
+    openai_ws = _ClosedUpstream()
+
+
+def test_closed_upstream_drops_pending_response():
+    async def lookup(args: dict) -> dict:
+        return {}
+
+    async def main():
+        engine = _engine(lookup)
+        session = _Session()
+        engine.submit(session, {"response_id": "r1", "call_id": "c1", "name": "patient_lookup",
+                                "arguments": '{"patient_id": "ab12"}'})
+        tasks = list(engine._tasks[session.id])
+        await asyncio.gather(*tasks)  # 例外で終わらない
+        assert engine._pending == {}
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+# mcp/tests/test_reattach.py
+"""保持していた上流セッションへの再接続: 切断時にキャンセルした応答の残りを流さない"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+
+
+def test_reattach_discards_rest_of_cancelled_response():
+    from app.routers import realtime
+    from app.services.audio_pipeline import AudioPipeline, negotiate
+    from app.services.downlink import dispatcher
+    from app.services.session import RelaySession
+    from app.services.session_registry import SessionRecord
+
+    class Unity:
+        def __init__(self) -> None:
+            self.received = 0
+
+        async def send_bytes(self, data: bytes) -> None:
+            self.received += len(data)
+
+    class Upstream:
+        async def send(self, message: str) -> None:
+            pass
+
+    def delta(response_id: str) -> dict:
+        return {"type": "response.audio.delta", "response_id": response_id, "item_id": "i1",
+                "delta": base64.b64encode(b"\0" * 4800).decode()}
+
+    def new_session(unity: Unity, record: SessionRecord) -> RelaySession:
+        pipeline = AudioPipeline(negotiate({}, 24000, 24000), 24000, False)
+        session = RelaySession(unity, Upstream(), pipeline,
+                               realtime.DOWNLINK_QUEUE_CONFIG, realtime.TURN_CONFIG)
+        session.record = record
+        return session
+
+    async def main():
+        record = SessionRecord("s1", "n1")
+        before = new_session(Unity(), record)
+        await realtime._request_response(before)
+        await dispatcher.dispatch(before, {"type": "response.created", "response": {"id": "r1"}})
+        await dispatcher.dispatch(before, delta("r1"))
+        realtime._save_turn_state(before)  # 切断（_detach）
+
+        unity = Unity()
+        after = new_session(unity, record)
+        realtime._restore_turn_state(after, record.state)
+        sender = asyncio.create_task(after.audio_out.run())
+        try:
+            await dispatcher.dispatch(after, delta("r1"))  # 保持中のソケットに残っていた音声
+            await asyncio.sleep(0.1)
+            assert unity.received == 0
+            assert after.response_in_progress.is_set()  # キャンセル完了までは次の応答を依頼しない
+
+            await dispatcher.dispatch(after, {"type": "response.done",
+                                              "response": {"id": "r1", "status": "cancelled"}})
+            assert not after.response_in_progress.is_set()
+            await dispatcher.dispatch(after, {"type": "response.created", "response": {"id": "r2"}})
+            await dispatcher.dispatch(after, delta("r2"))
+            await asyncio.sleep(0.1)
+            assert unity.received > 0
+        finally:
+            sender.cancel()
+
+    asyncio.run(main())
+
+
+def test_reattach_before_response_created():
+    from app.routers import realtime
+    from app.services.audio_pipeline import AudioPipeline, negotiate
+    from app.services.session import RelaySession
+
+    class Unity:
+        async def send_bytes(self, data: bytes) -> None:
+            pass
+
+    session = RelaySession(Unity(), None, AudioPipeline(negotiate({}, 24000, 24000), 24000, False))
+    realtime._restore_turn_state(session, {"response_in_progress": True, "response_id": "",
+                                           "created_pending": True})
+    assert session.cancel_before_created
+    assert session.cancelled_responses == set()
+
+
+def test_transcripts_are_not_stored_by_default():
+    from app.routers import realtime
+    from app.services.session_registry import SessionRecord
+
+    class Session:
+        record = SessionRecord("s1", "n1")
+
+    realtime._record_assistant_turn(Session(), {"output": [
+        {"type": "message", "content": [{"type": "audio", "transcript": "頭痛はいつからですか"}]},
+    ]})
+    assert Session.record.turns == []
+    assert "input_audio_transcription" not in realtime._session_config()
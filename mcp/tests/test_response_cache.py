@@ -0,0 +1,45 @@
+# mcp/tests/test_response_cache.py
+"""ResponseCache: 許可リストの発話に、承認済みの応答文の音声だけを返す"""
+
+from __future__ import annotations
+
+import json
+
+from app.services.response_cache import ResponseCache, load_allowlist
+
+
+def _cache(tmp_path) -> ResponseCache:
+    path = tmp_path / "allowlist.json"
+    path.write_text(json.dumps([
+        {"utterance": "こんにちは", "answer": "こんにちは。今日はどうされましたか？"},
+        {"utterance": "頭が痛いです"},  # 承認済みの応答文がないので対象外
+    ], ensure_ascii=False), encoding="utf-8")
+    return ResponseCache(tmp_path / "cache", allowlist=load_allowlist(path))
+
+
+def test_only_allowlisted_utterances_with_approved_answers_are_cacheable(tmp_path):
+    cache = _cache(tmp_path)
+    try:
+        key = cache.key("こんにちは。", "inst", "alloy", "pcm16")
+        assert key is not None
+        assert cache.approved_answer(key) == "こんにちは。今日はどうされましたか？"
+        assert cache.key("頭が痛いです", "inst", "alloy", "pcm16") is None
+        assert cache.key("熱があります", "inst", "alloy", "pcm16") is None
+    finally:
+        cache.close()
+
+
+def test_only_verbatim_read_aloud_is_stored(tmp_path):
+    cache = _cache(tmp_path)
+    try:
+        key = cache.key("こんにちは", "inst", "alloy", "pcm16")
+        cache.put(key, "こんにちは。お薬は一日二回飲んでください。", b"\x01" * 10)
+        assert cache.get(key) is None
+        assert cache.stats["mismatched"] == 1
+
+        cache.put(key, "こんにちは、今日はどうされましたか", b"\x02" * 10)
+        cached = cache.get(key)
+        assert cached.answer == "こんにちは。今日はどうされましたか？"
+        assert bytes(cached.audio) == b"\x02" * 10
+    finally:
+        cache.close()
@@ -0,0 +1,87 @@
+# mcp/tests/test_session_registry.py
+"""SessionRegistry: 再開トークンとアタッチ/デタッチの世代管理（fakeredis）"""
+
+from __future__ import annotations
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.session_registry import (
+    ResumeRejected,
+    SessionRegistry,
+    new_resume_token,
+    new_session_id,
+)
+
+
+def _registry(client=None, node_id: str = "node-a") -> SessionRegistry:
+    client = client or fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return SessionRegistry(client, node_id, ttl=60)
+
+
+def test_attach_then_resume_with_token():
+    async def main():
+        registry = _registry()
+        session_id, token = new_session_id(), new_resume_token()
+        record, resumed = await registry.attach(session_id, token)
+        assert not resumed and record.generation == 1
+        record.add_turn("user", "頭が痛いです", registry.max_turns)
+        await registry.save(record)
+
+        again, resumed = await registry.attach(session_id, token)
+        assert resumed and again.generation == 2
+        assert again.turns == [["user", "頭が痛いです"]]
+        assert token not in again.to_json()  # ハッシュだけを保存する
+
+    asyncio.run(main())
+
+
+def test_wrong_token_is_rejected_without_overwriting():
+    async def main():
+        registry = _registry()
+        session_id, token = new_session_id(), new_resume_token()
+        record, _ = await registry.attach(session_id, token)
+        record.add_turn("user", "薬を飲みました", registry.max_turns)
+        await registry.save(record)
+
+        with pytest.raises(ResumeRejected):
+            await registry.attach(session_id, "not-the-token")
+        assert await registry.verify(session_id, "not-the-token") is None
+        assert await registry.verify(session_id, "") is None
+        kept = await registry.verify(session_id, token)
+        assert kept is not None and kept.generation == 1 and kept.turns == record.turns
+        assert registry.metrics()["rejected"] == 3
+
+    asyncio.run(main())
+
+
+def test_verify_unknown_or_invalid_session():
+    async def main():
+        registry = _registry()
+        assert await registry.verify(new_session_id(), new_resume_token()) is None
+        assert await registry.verify("patient01", "x") is None
+        assert await registry.verify("../../etc", "x") is None
+
+    asyncio.run(main())
+
+
+def test_detach_from_stale_worker_keeps_newer_attach():
+    async def main():
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        worker_a, worker_b = _registry(client, "node-a"), _registry(client, "node-b")
+        session_id, token = new_session_id(), new_resume_token()
+
+        old, _ = await worker_a.attach(session_id, token)
+        new, resumed = await worker_b.attach(session_id, token)  # 別のワーカーで再開
+        assert resumed and new.generation == old.generation + 1
+
+        assert not await worker_a.detach(old)  # 古い接続の切断は記録しない
+        current = await worker_b.load(session_id)
+        assert current.status == "active" and current.node_id == "node-b"
+
+        assert await worker_b.detach(new)
+        assert (await worker_a.load(session_id)).status == "detached"
+
+    asyncio.run(main())
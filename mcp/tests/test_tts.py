@@ -0,0 +1,174 @@
+# mcp/tests/test_tts.py
+"""VOICEVOX 文単位合成: 文の区切り・再生順・キャンセル・バージイン（benchmarks/fake_voicevox.py）"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+
+from app.services.tts import SentenceSplitter, SpeechStream, VoicevoxClient
+from benchmarks.fake_voicevox import FakeVoicevoxServer
+
+# スタンドインの音声長: 1文字 120ms、24kHz 16bit → 1文字 5760 bytes
+BYTES_PER_CHAR = 24000 * 2 * 120 // 1000
+
+
+def test_splitter_sentence_boundaries():
+    splitter = SentenceSplitter()
+    assert splitter.feed("こんにちは。今日は") == ["こんにちは。"]
+    assert splitter.feed("どうされましたか？「頭が痛い」") == ["今日はどうされましたか？"]
+    assert splitter.feed("とのことですね！！\n") == ["「頭が痛い」とのことですね！！\n".strip()]
+    assert splitter.feed("お大事に") == []
+    assert splitter.flush() == "お大事に"
+    assert splitter.flush() is None
+
+
+def test_splitter_keeps_closing_brackets_with_sentence():
+    splitter = SentenceSplitter()
+    assert splitter.feed("「わかりました。」次に") == ["「わかりました。」"]
+    assert splitter.flush() == "次に"
+
+
+def test_splitter_cuts_long_sentences_at_commas():
+    splitter = SentenceSplitter(max_chars=12)
+    assert splitter.feed("それでは、次に体温を測って") == ["それでは、"]
+    assert splitter.flush() == "次に体温を測って"
+    # 読点がなければ max_chars で切る
+    assert SentenceSplitter(max_chars=5).feed("あいうえおかきくけこさ") == ["あいうえお", "かきくけこ"]
+
+
+def test_phrase_key_is_exact_text():
+    client = VoicevoxClient("http://127.0.0.1:1", 3)
+    try:
+        texts = ["１２３錠です。", "123錠です。", "Loxonin です。", "loxonin です。", "ロキソニン  です。",
+                 "ロキソニン です。"]
+        assert len({client.key(t) for t in texts}) == len(texts)
+        assert client.key("123錠です。") == client.key("123錠です。")
+        assert client.key("はい。") != VoicevoxClient("http://127.0.0.1:1", 8).key("はい。")
+    finally:
+        asyncio.run(client.close())
+
+
+def _with_engine(coro_fn, **server_kwargs):
+    async def main():
+        async with FakeVoicevoxServer(**server_kwargs) as server:
+            client = VoicevoxClient(server.url, 3)
+            try:
+                return await coro_fn(client, server)
+            finally:
+                await client.close()
+    return asyncio.run(main())
+
+
+def test_speech_stream_plays_sentences_in_order():
+    async def run(client, server):
+        played: list[int] = []
+
+        async def sink(pcm: bytes) -> None:
+            played.append(len(pcm) // BYTES_PER_CHAR)
+
+        stream = SpeechStream(client, sink, parallel=3)
+        # 長い文ほど合成が遅い（rtf）ので、後の短い文が先に合成し終わる
+        stream.feed("あいうえおかきくけこさしすせそ。あいう。あ。")
+        stream.finish()
+        await stream.join()
+        assert played == [16, 4, 2]
+        assert server.stats["max_concurrent"] > 1  # 文ごとに並列で合成している
+    _with_engine(run, rtf=0.5)
+
+
+def test_speech_stream_waits_for_previous_response():
+    async def run(client, server):
+        played: list[str] = []
+
+        def sink_for(name):
+            async def sink(pcm: bytes) -> None:
+                played.append(name)
+                await asyncio.sleep(0.05)
+            return sink
+
+        first = SpeechStream(client, sink_for("first"))
+        first.feed("一つ目の応答です。二文目です。")
+        first.finish()
+        second = SpeechStream(client, sink_for("second"), after=first)
+        second.feed("はい。")
+        second.finish()
+        await second.join()
+        assert played == ["first", "first", "second"]
+    _with_engine(run)
+
+
+def test_cancel_stops_the_whole_chain():
+    async def run(client, server):
+        played: list[str] = []
+
+        def sink_for(name):
+            async def sink(pcm: bytes) -> None:
+                played.append(name)
+                await asyncio.sleep(0.2)
+            return sink
+
+        first = SpeechStream(client, sink_for("first"))
+        first.feed("一つ目。二つ目。三つ目。")
+        first.finish()
+        second = SpeechStream(client, sink_for("second"), after=first)
+        second.feed("四つ目。")
+        second.finish()
+        while not played:
+            await asyncio.sleep(0.01)
+        second.cancel()  # バージインは最新のストリームだけを持っている
+        await asyncio.wait([first._player, second._player])
+        assert played == ["first"]
+        assert not first.active and not second.active
+    _with_engine(run)
+
+
+def test_barge_in_does_not_resynthesize_cancelled_answer(monkeypatch):
+    from app.routers import realtime
+    from app.services.audio_pipeline import AudioPipeline, negotiate
+    from app.services.downlink import dispatcher
+    from app.services.session import RelaySession
+
+    class Unity:
+        received = 0
+
+        async def send_bytes(self, data: bytes) -> None:
+            Unity.received += len(data)
+
+    class Upstream:
+        def __init__(self) -> None:
+            self.sent: list[str] = []
+
+        async def send(self, message: str) -> None:
+            self.sent.append(message)
+
+    async def run(client, server):
+        monkeypatch.setattr(realtime, "tts", client)
+        pipeline = AudioPipeline(negotiate({}, 24000, 24000), 24000, False)
+        session = RelaySession(Unity(), Upstream(), pipeline,
+                               realtime.DOWNLINK_QUEUE_CONFIG, realtime.TURN_CONFIG)
+        sender = asyncio.create_task(session.audio_out.run())
+        try:
+            await realtime._request_response(session)
+            await dispatcher.dispatch(session, {"type": "response.created", "response": {"id": "r1"}})
+            await dispatcher.dispatch(session, {"type": "response.text.delta", "response_id": "r1",
+                                                "item_id": "i1", "delta": "こんにちは。"})
+            await realtime._barge_in(session)  # 最初の文の合成が終わる前
+            await dispatcher.dispatch(session, {"type": "response.text.delta", "response_id": "r1",
+                                                "item_id": "i1", "delta": "今日はどうされましたか。"})
+            await dispatcher.dispatch(session, {"type": "response.text.done", "response_id": "r1",
+                                                "item_id": "i1", "text": ""})
+            await asyncio.sleep(0.5)
+            assert Unity.received == 0
+            assert session.speech is None
+
+            # 音声モードでも response.created 直後のバージインで残りの delta を捨てる
+            await dispatcher.dispatch(session, {
+                "type": "response.audio.delta", "response_id": "r1", "item_id": "i1",
+                "delta": base64.b64encode(b"\0" * 4800).decode(),
+            })
+            await asyncio.sleep(0.1)
+            assert Unity.received == 0
+        finally:
+            sender.cancel()
+    _with_engine(run)